@@ -3,13 +3,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .services.db import init_db, close_db
-from .routers import auth, read, insert, landing_page_assistant, realtime_router, upload, payments, registration
+from .services.realtime_service import shutdown_post_call_workers
+from .routers import auth, read, insert, landing_page_assistant, realtime_router, upload, payments, registration, health
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown"""
     await init_db()
     yield
+    shutdown_post_call_workers()
     await close_db()
 
 # Create FastAPI app
@@ -38,6 +40,7 @@ app.include_router(realtime_router.router)
 app.include_router(payments.router)
 app.include_router(landing_page_assistant.router)
 app.include_router(registration.router)
+app.include_router(health.router)
 
 @app.get("/")
 async def root():
@@ -1,24 +1,25 @@
 import os
-
-async def master_prompt(level: str,  bot_prompt: str):
-
+from functools import lru_cache
+
+LEVEL_FILES = {
+    "BÁSICO": "basic.txt",
+    "INTERMEDIO": "intermedio.txt",
+    "AVANZADO": "avanzado.txt",
+}
+
+@lru_cache(maxsize=None)
+def read_level_prompt(level: str) -> str:
+    # Los ficheros de nivel no cambian en caliente: se leen una vez por proceso
+    filename = LEVEL_FILES.get(level)
+    if filename is None:
+        return ""
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    if level == "BÁSICO": 
-        level_txt = os.path.join(script_dir, "basic.txt")
-        with open(level_txt, "r") as f:
-            level_prompt = f.read()
+    with open(os.path.join(script_dir, filename), "r") as f:
+        return f.read()
 
-    elif level == "INTERMEDIO": 
-        level_txt = os.path.join(script_dir, "intermedio.txt")
-        with open(level_txt, "r") as f:
-            level_prompt = f.read()
+async def master_prompt(level: str,  bot_prompt: str):
 
-    elif level == "AVANZADO": 
-        level_txt = os.path.join(script_dir, "avanzado.txt")
-        with open(level_txt, "r") as f:
-            level_prompt = f.read()
-    else: 
-        level_prompt = ""
+    level_prompt = read_level_prompt(level)
 
     master_prompt = f"""
     # CONTEXTO, ROL Y OBJETIVO 
@@ -29,4 +30,3 @@ async def master_prompt(level: str,  bot_prompt: str):
     """
 
     return master_prompt
-
@@ -0,0 +1,34 @@
+PACKED_TRANSCRIPT_PLACEHOLDER = "(las transcripciones están en la sección CONVERSACIONES, más abajo)"
+
+
+def packed(single_prompt, transcripts):
+    # Reutiliza la rúbrica de una métrica individual (generada con el placeholder
+    # en lugar de la transcripción) y la aplica a varias conversaciones a la vez.
+    # `transcripts` es un dict {identificador: transcripción}
+    conversaciones = "\n\n".join(
+        f"## CONVERSACIÓN {conv_key}:\n\n{transcript}"
+        for conv_key, transcript in transcripts.items()
+    )
+
+    prompt = f"""
+    {single_prompt}
+
+    # CONVERSACIONES:
+
+    Las instrucciones anteriores se aplican POR SEPARADO a cada una de las siguientes conversaciones. Evalúa cada conversación de forma independiente, sin mezclar información entre ellas.
+
+    {conversaciones}
+
+    # FORMATO DE TU RESPUESTA (sustituye al formato anterior):
+
+    Responde ÚNICAMENTE devolviendo un JSON con el siguiente formato, con una entrada por cada conversación:
+
+    {{
+      "conversaciones": {{
+        "<identificador de la conversación>": <objeto JSON con exactamente el formato pedido en las instrucciones anteriores>
+      }}
+    }}
+
+    Identificadores que deben aparecer: {", ".join(transcripts.keys())}
+    """
+    return prompt
@@ -0,0 +1,55 @@
+# Realtime gateway: serves only /ws/audio (its pre-warm/stats endpoints and /health/*)
+# Runs as its own process pool, away from the REST API's sync handlers, PDF
+# parsing and LLM calls, so nothing else shares the event loop with the audio:
+#
+#   uvicorn app.realtime_main:app --port 8001 --workers 4
+#
+# It shares the service code with app/main.py but only the realtime and health
+# routers. The post-call pipeline (scoring/profiling, with its blocking LLM
+# calls) never runs on this event loop: it goes to the post-call worker
+# processes of realtime_service, started with the gateway.
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from .services.db import init_db, close_db
+from .services.realtime_service import shutdown_post_call_workers, start_post_call_workers
+from .services.realtime_sessions import session_registry
+from .routers import realtime_router, health
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Handle gateway startup and shutdown"""
+    await init_db()
+    start_post_call_workers()
+    yield
+    shutdown_post_call_workers()
+    await close_db()
+
+app = FastAPI(
+    title="Conversa Realtime Gateway",
+    description="Realtime audio bridge (/ws/audio)",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+app.include_router(realtime_router.router)
+app.include_router(health.router)
+
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "service": "conversa-realtime",
+        "version": "1.0.0",
+        "active_sessions": session_registry.active,
+    }
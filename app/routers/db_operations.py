@@ -1,10 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session,select
+from fastapi import APIRouter, HTTPException
 from uuid import UUID
 from typing import List
 
 from app.services.database import (
-    get_session,
     create_profile, get_profile,
     create_recording, list_recordings_for_user, update_transcription,
     add_analysis, get_analyses_for_recording,
@@ -16,36 +14,39 @@ router = APIRouter(prefix="/dbops", tags=["db operations"])
 
 
 @router.post("/profiles/", response_model=Profile)
-def post_profile(profile: Profile, session: Session = Depends(get_session)):
-    return create_profile(session, profile)
+async def post_profile(profile: Profile):
+    return await create_profile(profile)
 
 @router.get("/profiles/{profile_id}", response_model=Profile)
-def get_profile_endpoint(profile_id: UUID, session: Session = Depends(get_session)):
-    profile = get_profile(session, profile_id)
+async def get_profile_endpoint(profile_id: UUID):
+    profile = await get_profile(profile_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile
 
 @router.post("/recordings/", response_model=Recording)
-def post_recording(recording: Recording, session: Session = Depends(get_session)):
-    return create_recording(session, recording)
+async def post_recording(recording: Recording):
+    return await create_recording(recording)
 
 @router.get("/recordings/user/{user_id}", response_model=List[Recording])
-def get_recordings(user_id: UUID, session: Session = Depends(get_session)):
-    return list_recordings_for_user(session, user_id)
+async def get_recordings(user_id: UUID):
+    return await list_recordings_for_user(user_id)
 
 @router.patch("/recordings/{recording_id}/transcription", response_model=Recording)
-def patch_transcription(recording_id: UUID, text: str, session: Session = Depends(get_session)):
-    return update_transcription(session, recording_id, text)
+async def patch_transcription(recording_id: UUID, text: str):
+    recording = await update_transcription(recording_id, text)
+    if not recording:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    return recording
 
 @router.post("/analyses/", response_model=RecordingAnalysis)
-def post_analysis(analysis: RecordingAnalysis, session: Session = Depends(get_session)):
-    return add_analysis(session, analysis)
+async def post_analysis(analysis: RecordingAnalysis):
+    return await add_analysis(analysis)
 
 @router.get("/analyses/recording/{recording_id}", response_model=List[RecordingAnalysis])
-def get_analyses(recording_id: UUID, session: Session = Depends(get_session)):
-    return get_analyses_for_recording(session, recording_id)
+async def get_analyses(recording_id: UUID):
+    return await get_analyses_for_recording(recording_id)
 
 @router.post("/webhook-logs/", response_model=WebhookLog)
-def post_webhook(log: WebhookLog, session: Session = Depends(get_session)):
-    return log_webhook_event(session, log)
+async def post_webhook(log: WebhookLog):
+    return await log_webhook_event(log)
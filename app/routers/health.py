@@ -1,9 +1,11 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from app.services.database import get_session, engine
+from fastapi import APIRouter, Depends, HTTPException
+from app.services.auth_service import validate_user
+from app.services.db import execute_query_one, get_pool_stats
+from app.services.query_registry import QueryOrder, top_queries
 from app.services.schemas import HealthResponse
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -11,10 +13,14 @@ router = APIRouter(prefix="/health", tags=["health"])
 
 
 @router.get("/readiness", summary="Check database connection")
-def health_check(session: Session = Depends(get_session)):
-    """Execute a simple SELECT 1 against the DB to verify connectivity."""
-    result = session.exec(select(1)).one()
-    return {"database": result}
+async def health_check():
+    """Execute a simple SELECT 1 against the DB (asyncpg pool) to verify connectivity."""
+    try:
+        row = await execute_query_one("SELECT 1 AS ok")
+    except Exception as e:
+        logger.error(f"Readiness check failed: {e}")
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"database": row["ok"]}
 
 @router.get("/liveness", response_model=HealthResponse)
 async def liveness_check():
@@ -22,4 +28,15 @@ async def liveness_check():
     return HealthResponse(
         status="alive",
         timestamp=datetime.utcnow()
-    ) 
\ No newline at end of file
+    )
+
+# DB diagnostics of this worker: SQL text and slow-query params, so not public
+@router.get("/db/queries")
+async def db_query_stats(limit: int = 20, order_by: QueryOrder = "total_ms", _: dict = Depends(validate_user)):
+    """Top queries of this worker by total time (or calls, errors, rows, mean_ms, max_ms)"""
+    return {"pid": os.getpid(), "queries": top_queries(limit, order_by)}
+
+@router.get("/db/pool")
+async def db_pool_stats(_: dict = Depends(validate_user)):
+    """Pool size/idle/in use, acquire waits and recent slow queries of this worker"""
+    return {"pid": os.getpid(), **get_pool_stats()}
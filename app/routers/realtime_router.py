@@ -1,15 +1,65 @@
 # app/routers/realtime_router.py
-from fastapi import APIRouter, WebSocket
-from app.services.realtime_bridge_elevenlabs import RealtimeBridge
+from fastapi import APIRouter, Depends, WebSocket
+from app.schemas.realtime import PrewarmSessionRequest
+from app.services.auth_service import validate_user
+from app.services.realtime_bridge import RealtimeBridge
+from app.services.realtime_frames import BINARY_SUBPROTOCOLS, CODEC_PCM16, dumps
+from app.services.realtime_prewarm import prewarm_session
+from app.services.realtime_metrics import worker_latency_stats
+from app.services.realtime_sessions import session_registry, WS_CLOSE_TRY_AGAIN_LATER
+from app.utils.responses import error
 
 router = APIRouter()
 
 @router.websocket("/ws/audio")
 async def websocket_audio_bridge(websocket: WebSocket):
+    # Clients that offer a binary sub-protocol get binary audio frames (PCM16 or
+    # μ-law, first one offered wins); the rest keep the OpenAI-compatible JSON format
+    offered = websocket.scope.get("subprotocols", [])
+    subprotocol = next((p for p in offered if p in BINARY_SUBPROTOCOLS), None)
+    binary_audio = subprotocol is not None
+
     # Accept the WebSocket connection from the frontend
-    await websocket.accept()
-    print("🎧 Frontend connected to /ws/audio")
+    await websocket.accept(subprotocol=subprotocol)
+    print(f"🎧 Frontend connected to /ws/audio ({subprotocol or 'json'} audio)")
 
     # Create RealtimeBridge instance and run it
-    bridge = RealtimeBridge(frontend_ws=websocket)
-    await bridge.run()
+    bridge = RealtimeBridge(
+        frontend_ws=websocket,
+        binary_audio=binary_audio,
+        audio_codec=BINARY_SUBPROTOCOLS.get(subprotocol, CODEC_PCM16),
+    )
+
+    # Worker full: reject before touching ElevenLabs or the DB
+    if not session_registry.admit(bridge):
+        print(f"🚫 Realtime session rejected: {session_registry.active}/{session_registry.max_sessions} active")
+        await websocket.send_text(dumps({
+            "type": "error",
+            "error": {"code": "server_busy", "message": "Too many active sessions, try again later"},
+        }))
+        await websocket.close(code=WS_CLOSE_TRY_AGAIN_LATER)
+        return
+
+    try:
+        await bridge.run()
+    finally:
+        session_registry.release(bridge)
+
+@router.post("/realtime/prewarm")
+async def prewarm_realtime_session(request: PrewarmSessionRequest, user: dict = Depends(validate_user)):
+    """
+    Pre-warm a /ws/audio session while the user is on the stage screen:
+    resolves voice/agent, renders the master prompt and opens an upstream connection
+    (paid upstream sockets: only for the authenticated user's own session)
+    """
+    if str(user["user_id"]) != str(request.user_id):
+        error(403, "Cannot prewarm a session for another user")
+    try:
+        return await prewarm_session(request.user_id, request.course_id, request.stage_id)
+    except Exception as e:
+        error(500, f"Failed to prewarm session: {str(e)}")
+
+@router.get("/realtime/stats")
+async def realtime_stats(_: dict = Depends(validate_user)):
+    """Capacity and latency histograms of the realtime sessions served by this worker"""
+    return {"capacity": session_registry.stats(), **worker_latency_stats()}
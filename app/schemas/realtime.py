@@ -0,0 +1,11 @@
+# Pydantic models for realtime endpoints
+# Handles payload validation for the /ws/audio session helpers
+
+from pydantic import BaseModel
+from uuid import UUID
+
+class PrewarmSessionRequest(BaseModel):
+    """Pre-warm payload: same ids the frontend later sends in input_audio_session.start"""
+    user_id: UUID
+    course_id: UUID
+    stage_id: UUID
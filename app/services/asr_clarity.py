@@ -0,0 +1,64 @@
+# Articulation/clarity indicator from ASR token log-probabilities
+# The OpenAI provider asks for item.input_audio_transcription.logprobs; every
+# user transcript then carries the log-probability of each transcribed token.
+# Tokens the recogniser was unsure about (logprob below ASR_LOW_LOGPROB, i.e.
+# p < ~0.37 by default) are a proxy for mumbled or unclear speech, measured
+# without an LLM call. Only the gpt-4o(-mini)-transcribe models return
+# logprobs; with whisper-1 the tracker stays empty and scoring falls back to the
+# clarity LLM call.
+
+import math
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+ASR_LOW_LOGPROB = float(os.getenv("ASR_LOW_LOGPROB", "-1.0"))
+
+
+def turn_logprob_stats(logprobs: List[float]) -> Optional[Dict]:
+    """Token log-probability stats of one transcribed turn (None without tokens)."""
+    if not logprobs:
+        return None
+    values = np.asarray(logprobs, dtype=np.float64)
+    return {
+        "tokens": len(values),
+        "mean_logprob": round(float(values.mean()), 4),
+        "min_logprob": round(float(values.min()), 4),
+        "low_tokens": int((values < ASR_LOW_LOGPROB).sum()),
+    }
+
+
+class AsrClarityTracker:
+    """Per-turn transcription confidence of the seller over one session."""
+
+    def __init__(self):
+        self.turns: List[Dict] = []
+        self.transcripts = 0   # user transcripts seen, with or without logprobs
+
+    def add_turn(self, logprobs: Optional[List[float]]):
+        self.transcripts += 1
+        stats = turn_logprob_stats(logprobs)
+        if stats:
+            self.turns.append(stats)
+
+    def stats(self) -> Dict:
+        """Session indicator: clarity = % of tokens recognised with confidence."""
+        tokens = sum(t["tokens"] for t in self.turns)
+        if not tokens:
+            return {"turns": 0, "transcripts": self.transcripts, "tokens": 0}
+        low = sum(t["low_tokens"] for t in self.turns)
+        mean_logprob = sum(t["mean_logprob"] * t["tokens"] for t in self.turns) / tokens
+        return {
+            "turns": len(self.turns),
+            "transcripts": self.transcripts,
+            "tokens": tokens,
+            "mean_logprob": round(mean_logprob, 4),
+            "mean_confidence": round(math.exp(mean_logprob), 4),
+            "low_fraction": round(low / tokens, 4),
+            "clarity": round(100 * (1 - low / tokens), 1),
+            "per_turn": self.turns,
+        }
@@ -0,0 +1,100 @@
+# Agent audio coalescing on the upstream -> frontend path
+# Providers stream TTS audio in bursts of small chunks; forwarding each one as
+# its own websocket message costs per-message overhead on both ends and makes
+# browser playback bursty. The coalescer groups agent audio into frames of at
+# least AGENT_AUDIO_FRAME_MS before they are queued for the browser.
+#
+# - Latency cap: audio is never held more than AGENT_AUDIO_MAX_DELAY_MS after
+#   the first chunk of a pending frame arrived; a timer flushes whatever there is.
+# - Chunks already longer than the target go out whole (never split).
+# - Interruption: pending audio is discarded, not flushed, so
+#   response.audio.clear goes out immediately and nothing stale follows it.
+# AGENT_AUDIO_FRAME_MS=0 disables coalescing (one frame per provider chunk).
+
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+AGENT_AUDIO_FRAME_MS = int(os.getenv("AGENT_AUDIO_FRAME_MS", "100"))
+AGENT_AUDIO_MAX_DELAY_MS = int(os.getenv("AGENT_AUDIO_MAX_DELAY_MS", "40"))
+
+
+class AudioCoalescer:
+    """
+    Buffers raw agent audio and hands it to `emit` in frames of a target duration.
+
+    add() appends a chunk and emits once the target is reached; the first chunk of
+    a pending frame arms a timer that emits it anyway after max_delay_ms.
+    """
+
+    def __init__(self, emit: Callable[[bytes], Awaitable], bytes_per_second: int,
+                 frame_ms: int = AGENT_AUDIO_FRAME_MS, max_delay_ms: int = AGENT_AUDIO_MAX_DELAY_MS):
+        self._emit = emit
+        self.frame_ms = frame_ms
+        self.max_delay = max_delay_ms / 1000
+        self.set_bytes_per_second(bytes_per_second)
+
+        self._buffer = bytearray()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = asyncio.Lock()  # keeps timer and inline flushes in order
+
+        # Stats
+        self.chunks_in = 0
+        self.frames_out = 0
+        self.discarded_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.frame_ms > 0
+
+    def set_bytes_per_second(self, bytes_per_second: int):
+        # Whole 16-bit samples, so frames never split a sample
+        self.target_bytes = (bytes_per_second * self.frame_ms // 1000) & ~1
+
+    async def add(self, audio: bytes):
+        self.chunks_in += 1
+        self._buffer += audio
+        if len(self._buffer) >= self.target_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._on_timer)
+
+    async def flush(self):
+        """Emit everything pending now."""
+        self._cancel_timer()
+        async with self._lock:
+            if not self._buffer:
+                return
+            frame = bytes(self._buffer)
+            self._buffer.clear()
+            await self._emit(frame)
+            self.frames_out += 1
+
+    def discard(self) -> int:
+        """Drop pending audio (interruption). Returns how many bytes were dropped."""
+        self._cancel_timer()
+        dropped = len(self._buffer)
+        self._buffer.clear()
+        self.discarded_bytes += dropped
+        return dropped
+
+    def _on_timer(self):
+        self._timer = None
+        asyncio.ensure_future(self.flush())
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def stats(self) -> dict:
+        return {
+            "frame_ms": self.frame_ms,
+            "chunks_in": self.chunks_in,
+            "frames_out": self.frames_out,
+            "discarded_bytes": self.discarded_bytes,
+        }
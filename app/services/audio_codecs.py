@@ -0,0 +1,61 @@
+# Audio codecs for the browser link
+# G.711 μ-law halves the bytes of PCM16 audio (8 bits per sample) at close to
+# toll quality. Both directions are table lookups over the whole chunk in
+# NumPy, so there is no native dependency and no per-sample Python loop.
+# (IMA-ADPCM would save another half but every sample depends on the previous
+# one, which can't be vectorised.)
+
+import numpy as np
+
+from app.services.realtime_frames import CODEC_MULAW, CODEC_PCM16
+
+MULAW_BIAS = 0x84
+MULAW_CLIP = 32635
+
+
+def _build_mulaw_tables():
+    # Encode table indexed by the int16 sample viewed as uint16 (65536 entries)
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), MULAW_CLIP) + MULAW_BIAS
+    exponent = np.floor(np.log2(np.maximum(magnitude >> 7, 1))).astype(np.int32)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    encode = (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+    # Decode table indexed by the μ-law byte (256 entries)
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    linear = ((((codes & 0x0F) << 3) + MULAW_BIAS) << exponent) - MULAW_BIAS
+    decode = np.where(codes & 0x80, -linear, linear).astype(np.int16)
+    return encode, decode
+
+
+_MULAW_ENCODE, _MULAW_DECODE = _build_mulaw_tables()
+
+
+def mulaw_encode(pcm: np.ndarray) -> bytes:
+    """int16 samples -> μ-law bytes."""
+    return _MULAW_ENCODE[pcm.view(np.uint16)].tobytes()
+
+
+def mulaw_decode(data: bytes) -> np.ndarray:
+    """μ-law bytes -> int16 samples."""
+    return _MULAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+
+def decode_audio(payload: bytes, codec: int) -> bytes:
+    """Payload of a binary audio frame -> raw PCM16 bytes."""
+    if codec == CODEC_PCM16:
+        return payload
+    if codec == CODEC_MULAW:
+        return mulaw_decode(payload).tobytes()
+    raise ValueError(f"Unsupported audio codec {codec}")
+
+
+def encode_audio(pcm: bytes, codec: int) -> bytes:
+    """Raw PCM16 bytes -> payload of a binary audio frame."""
+    if codec == CODEC_PCM16:
+        return pcm
+    if codec == CODEC_MULAW:
+        return mulaw_encode(np.frombuffer(pcm, dtype=np.int16))
+    raise ValueError(f"Unsupported audio codec {codec}")
@@ -0,0 +1,262 @@
+# Streaming audio helpers for the realtime bridge
+# Everything here works on PCM16 little-endian chunks as they arrive and keeps
+# whatever state is needed between chunks, so nothing depends on how the browser
+# or the provider happens to split the stream.
+
+import base64
+import os
+from math import gcd
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+DEFAULT_SAMPLE_RATE = 16000
+
+# Speech levels shared by the VAD and the silence gate (RMS normalised to [0, 1]):
+# speech starts above SPEECH_OPEN_RMS and continues down to SPEECH_CLOSE_RMS.
+# Calibrated for quiet microphones too: grabacion.wav never goes above ~0.045.
+SPEECH_OPEN_RMS = float(os.getenv("SILENCE_GATE_OPEN_RMS", "0.02"))
+SPEECH_CLOSE_RMS = float(os.getenv("SILENCE_GATE_CLOSE_RMS", "0.008"))
+
+# Voice activity: RMS per 20 ms frame with that hysteresis; after VAD_HANGOVER_MS
+# below SPEECH_CLOSE_RMS speech has to reach SPEECH_OPEN_RMS again
+VAD_FRAME_MS = 20
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "300"))
+
+# Pauses: silence between two speech frames of the same turn, at least this long
+PAUSE_MIN_MS = 500
+
+# Resampler: FIR taps per polyphase branch (input samples under the filter) and
+# passband edge as a fraction of the output Nyquist frequency
+RESAMPLER_TAPS = 32
+RESAMPLER_CUTOFF = 0.9
+
+
+def pcm16_from_b64(audio_b64: str) -> np.ndarray:
+    """Decode a base64 PCM16 chunk into int16 samples."""
+    return np.frombuffer(base64.b64decode(audio_b64), dtype=np.int16)
+
+
+def pcm16_from_bytes(pcm: bytes) -> np.ndarray:
+    """View raw PCM16 bytes (binary frames) as int16 samples."""
+    return np.frombuffer(pcm, dtype=np.int16)
+
+
+def pcm16_rms(pcm: np.ndarray) -> float:
+    """RMS level of int16 samples, normalised to [0, 1]."""
+    if len(pcm) == 0:
+        return 0.0
+    samples = pcm.astype(np.float32) / 32768.0
+    return float(np.sqrt(np.mean(samples * samples)))
+
+
+def b64_decoded_len(audio_b64: str) -> int:
+    """Number of bytes encoded in a base64 string, without decoding it."""
+    return len(audio_b64) * 3 // 4 - audio_b64.count("=", -2)
+
+
+def audio_format_sample_rate(audio_format: str | None, default: int = DEFAULT_SAMPLE_RATE) -> int:
+    """Sample rate from an ElevenLabs audio format name such as "pcm_16000" or "ulaw_8000"."""
+    try:
+        return int(audio_format.rsplit("_", 1)[1])
+    except (AttributeError, IndexError, ValueError):
+        return default
+
+
+def audio_format_bytes_per_second(audio_format: str | None, default_rate: int = DEFAULT_SAMPLE_RATE) -> int:
+    """Bytes per second of audio for an ElevenLabs audio format (PCM16 or 8-bit μ-law)."""
+    rate = audio_format_sample_rate(audio_format, default_rate)
+    bytes_per_sample = 1 if audio_format and audio_format.startswith("ulaw") else 2
+    return rate * bytes_per_sample
+
+
+class VoiceActivityTracker:
+    """
+    Streaming voice-activity tracker for one speaker.
+
+    Splits the stream into fixed frames (carrying the remainder across chunks)
+    and classifies each frame by RMS energy with hysteresis: a frame above
+    open_rms starts speech, and while speaking any frame above close_rms is
+    speech; after hangover_ms of quieter frames open_rms is needed again. The
+    turn duration is the speech span (first to last speech frame of the turn),
+    so the gaps between words count and trailing silence doesn't, and it comes
+    from the audio itself instead of wall time.
+    """
+
+    def __init__(self, sample_rate: int = DEFAULT_SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS,
+                 open_rms: float = SPEECH_OPEN_RMS, close_rms: float = SPEECH_CLOSE_RMS,
+                 hangover_ms: int = VAD_HANGOVER_MS):
+        self.open_rms = open_rms
+        self.close_rms = min(close_rms, open_rms)
+        self.frame_ms = frame_ms
+        self.hangover_frames = max(1, -(-hangover_ms // frame_ms))
+        self.set_sample_rate(sample_rate)
+
+        self._carry = np.empty(0, dtype=np.int16)
+        self._speaking = False
+        self._quiet_frames = 0        # frames below close_rms since the last speech frame
+        self.position = 0             # samples seen since the start of the stream
+        self.turn_start = None        # stream position of the first speech frame of the turn
+        self.last_speech_end = None   # stream position where the last speech frame ended
+
+    def set_sample_rate(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.frame_size = max(1, sample_rate * self.frame_ms // 1000)
+
+    def feed(self, pcm: np.ndarray) -> np.ndarray:
+        """Process a chunk of int16 samples. Returns the speech flag of every complete frame."""
+        if len(self._carry):
+            pcm = np.concatenate((self._carry, pcm))
+        n_frames = len(pcm) // self.frame_size
+        used = n_frames * self.frame_size
+        self._carry = pcm[used:]
+
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = pcm[:used].reshape(n_frames, self.frame_size).astype(np.float32) / 32768.0
+        levels = np.sqrt(np.mean(frames * frames, axis=1))
+
+        # Hysteresis is sequential, but there are only a handful of frames per chunk
+        speech = np.zeros(n_frames, dtype=bool)
+        for i, level in enumerate(levels.tolist()):
+            if self._speaking and level > self.close_rms:
+                speech[i] = True
+                self._quiet_frames = 0
+            elif level > self.open_rms:
+                speech[i] = self._speaking = True
+                self._quiet_frames = 0
+            elif self._speaking:
+                self._quiet_frames += 1
+                if self._quiet_frames >= self.hangover_frames:
+                    self._speaking = False
+
+        idx = np.flatnonzero(speech)
+        if len(idx):
+            if self.turn_start is None:
+                self.turn_start = self.position + int(idx[0]) * self.frame_size
+            self.last_speech_end = self.position + (int(idx[-1]) + 1) * self.frame_size
+        self.position += used
+        return speech
+
+    @property
+    def turn_has_speech(self) -> bool:
+        return self.turn_start is not None
+
+    def seconds(self, samples: int) -> float:
+        return samples / self.sample_rate
+
+    def end_turn(self) -> float | None:
+        """Close the current turn. Returns its speech span in seconds (None if no speech)."""
+        start, self.turn_start = self.turn_start, None
+        if start is None:
+            return None
+        return self.seconds(self.last_speech_end - start)
+
+
+class PauseDetector:
+    """
+    Mid-turn pauses of one speaker, from the per-frame speech flags of a
+    VoiceActivityTracker.
+
+    A pause is a run of non-speech frames of at least PAUSE_MIN_MS between two
+    speech frames of the same turn; the silence before the first word and after
+    the last one (turn taking) is not a pause. Runs are carried across chunks.
+    """
+
+    def __init__(self, frame_ms: int = VAD_FRAME_MS, min_pause_ms: int = PAUSE_MIN_MS):
+        self.frame_ms = frame_ms
+        self.min_frames = max(1, -(-min_pause_ms // frame_ms))
+
+        self._silent_frames = 0     # non-speech frames since the last speech frame
+        self._turn_has_speech = False
+
+        self.count = 0
+        self.total_frames = 0
+        self.longest_frames = 0
+        self.speech_frames = 0
+
+    def feed(self, speech: np.ndarray):
+        """Process the speech flags returned by VoiceActivityTracker.feed()."""
+        idx = np.flatnonzero(speech)
+        if len(idx) == 0:
+            self._silent_frames += len(speech)
+            return
+        gaps = np.diff(idx) - 1
+        if self._turn_has_speech:
+            gaps = np.append(gaps, self._silent_frames + idx[0])
+        pauses = gaps[gaps >= self.min_frames]
+        if len(pauses):
+            self.count += len(pauses)
+            self.total_frames += int(pauses.sum())
+            self.longest_frames = max(self.longest_frames, int(pauses.max()))
+
+        self.speech_frames += len(idx)
+        self._silent_frames = len(speech) - 1 - int(idx[-1])
+        self._turn_has_speech = True
+
+    def end_turn(self):
+        """The speaker's turn ended: trailing silence is not a pause."""
+        self._silent_frames = 0
+        self._turn_has_speech = False
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total_frames * self.frame_ms / 1000, 2),
+            "longest_seconds": round(self.longest_frames * self.frame_ms / 1000, 2),
+            "speech_seconds": round(self.speech_frames * self.frame_ms / 1000, 2),
+        }
+
+
+class StreamingResampler:
+    """
+    Streaming polyphase resampler for PCM16 (e.g. 48 kHz or 44.1 kHz -> 16 kHz).
+
+    Rational L/M conversion: a windowed-sinc lowpass FIR designed at L x the input
+    rate, split into L polyphase branches of RESAMPLER_TAPS taps, so each output
+    sample is one dot product with the branch of its fractional position. The
+    last input samples and the fractional position are kept between chunks, so
+    the output is identical however the stream is split (no clicks at chunk
+    boundaries). Each chunk is a single vectorised gather + multiply.
+    """
+
+    def __init__(self, input_rate: int, output_rate: int, taps: int = RESAMPLER_TAPS,
+                 cutoff: float = RESAMPLER_CUTOFF):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        g = gcd(input_rate, output_rate)
+        self.up = output_rate // g
+        self.down = input_rate // g
+        self.taps = taps
+
+        # Lowpass at the lower of both Nyquist frequencies, in cycles per sample
+        # of the upsampled stream; Kaiser window for ~80 dB stopband
+        n = taps * self.up
+        fc = cutoff * 0.5 / max(self.up, self.down)
+        t = np.arange(n) - (n - 1) / 2
+        h = 2 * fc * np.sinc(2 * fc * t) * np.kaiser(n, 8.0) * self.up
+        # bank[p, j] = h[p + j * up]: branch p weighs x[base - j]
+        self._bank = h.reshape(taps, self.up).T.astype(np.float32)
+
+        self._history = np.zeros(taps - 1, dtype=np.float32)
+        self._position = 0  # next output, in 1/up input samples from the chunk start
+
+    def process(self, pcm: np.ndarray) -> np.ndarray:
+        """Resample a chunk of int16 samples. Returns int16 samples at output_rate."""
+        if len(pcm) == 0:
+            return np.zeros(0, dtype=np.int16)
+        buf = np.concatenate((self._history, pcm.astype(np.float32)))
+        span = len(pcm) * self.up
+        n_out = max(0, -(-(span - self._position) // self.down))
+
+        positions = self._position + np.arange(n_out) * self.down
+        base = positions // self.up + (self.taps - 1)
+        window = buf[base[:, None] - np.arange(self.taps)]
+        out = np.einsum("ij,ij->i", window, self._bank[positions % self.up])
+
+        self._position += n_out * self.down - span
+        self._history = buf[len(buf) - (self.taps - 1):]
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
@@ -2,41 +2,57 @@
 # Handles conversation creation and retrieval from conversaApp.conversations
 # Note: course_id is accepted in payload but not stored (no field in table)
 
+import json
 from tokenize import String
 from .db import execute_query, execute_query_one
+from .query_registry import register_query
+from scoring_scripts.scoring_weights import PESOS, pesos_efectivos
 from uuid import UUID
 from typing import List, Dict, Optional
 
-async def get_conversation_details(conversation_id: UUID) -> Optional[Dict]:
-    """Get conversation details for a conversation ID"""
-    query = """
+def scoring_weights(row) -> Dict:
+    """
+    Weights the general_score of a scoring_by_conversation row was computed with:
+    without a pauses or rhythm measure their weight went to the other metrics
+    (pesos_efectivos). Unscored conversations get the nominal weights.
+    """
+    if row["general_score"] is None:
+        pesos = PESOS
+    else:
+        medidas = {"pausas": row["pauses_scoring"], "ppm": row["rhythm_scoring"]}
+        pesos = pesos_efectivos({k: v for k, v in medidas.items() if v is not None})
+    return {
+        "fillerwords_weight": round(pesos["muletillas_pausas"], 4),
+        "pauses_weight": round(pesos.get("pausas", 0.0), 4),
+        "clarity_weight": round(pesos["claridad"], 4),
+        "participation_weight": round(pesos["participacion"], 4),
+        "keythemes_weight": round(pesos["cobertura"], 4),
+        "rhythm_weight": round(pesos.get("ppm", 0.0), 4),
+        "objective_weight": round(pesos["objetivo"], 4),
+    }
+
+GET_CONVERSATION_DETAILS_QUERY = register_query("conversations_service.get_conversation_details", """
     SELECT c.conversation_id, c.start_timestamp, c.end_timestamp, c.status, c.created_at
     , c.updated_at, c.course_id, c.stage_id, sbc.general_score, sbc.fillerwords_scoring, sbc.clarity_scoring
     , sbc.participation_scoring, sbc.keythemes_scoring, sbc.indexofquestions_scoring
     , sbc.rhythm_scoring, sbc.fillerwords_feedback, sbc.clarity_feedback, sbc.participation_feedback
     , sbc.keythemes_feedback, sbc.indexofquestions_feedback, sbc.rhythm_feedback, sbc.is_accomplished
+    , sbc.pauses_scoring, sbc.pauses_feedback
     , cs.stage_objectives
     FROM conversaApp.conversations c
     LEFT JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
     LEFT JOIN conversaconfig.course_stages cs ON c.stage_id = cs.stage_id
     WHERE c.conversation_id = $1
     ORDER BY start_timestamp DESC
-    """
-    weights = { # TO DO: import this from a constants file to make sure these weights are in sync with the ones used in the scoring model
-        "fillerwords_weight": 0.05,
-        "clarity_weight": 0.10,
-        "participation_weight": 0.10,
-        "keythemes_weight": 0.20,
-        "rhythm_weight": 0.05,
-        "objective_weight": 0.5,
-    }
-    results = await execute_query(query, conversation_id)
-    return [dict(row)|weights for row in results]
+""")
 
+async def get_conversation_details(conversation_id: UUID) -> Optional[Dict]:
+    """Get conversation details for a conversation ID"""
+    results = await execute_query(GET_CONVERSATION_DETAILS_QUERY, conversation_id)
+    return [dict(row) | scoring_weights(row) for row in results]
 
-async def get_user_conversations(user_id: UUID) -> List[Dict]:
-    """Get all conversations for a user, ordered by start time (newest first)"""
-    query = """
+
+GET_USER_CONVERSATIONS_QUERY = register_query("conversations_service.get_user_conversations", """
     SELECT 
         c.conversation_id, c.start_timestamp, c.end_timestamp, c.status, c.created_at, 
         c.updated_at, c.course_id, 
@@ -69,16 +85,17 @@ async def get_user_conversations(user_id: UUID) -> List[Dict]:
     WHERE user_id = $1
     ORDER BY start_timestamp DESC
     LIMIT 10
-    """
+""")
+
+async def get_user_conversations(user_id: UUID) -> List[Dict]:
+    """Get all conversations for a user, ordered by start time (newest first)"""
     
-    results = await execute_query(query, user_id)
+    results = await execute_query(GET_USER_CONVERSATIONS_QUERY, user_id)
     return [dict(row) for row in results]
 
 
 
-async def get_user_profiling_by_conversations(user_id: UUID) -> List[Dict]:
-    """Get last 10 conversations for a user, ordered by start time (newest first)"""
-    query = """
+GET_USER_PROFILING_BY_CONVERSATIONS_QUERY = register_query("conversations_service.get_user_profiling_by_conversations", """
     SELECT 
         pbc.empathy_scoring, 
         pbc.prospection_scoring, 
@@ -112,9 +129,12 @@ async def get_user_profiling_by_conversations(user_id: UUID) -> List[Dict]:
     and pbc.negotiation_feedback IS NOT NULL
     ORDER BY start_timestamp DESC
     LIMIT 10
-    """
+""")
+
+async def get_user_profiling_by_conversations(user_id: UUID) -> List[Dict]:
+    """Get last 10 conversations for a user, ordered by start time (newest first)"""
     try:
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_USER_PROFILING_BY_CONVERSATIONS_QUERY, user_id)
 
         if not results:
             return {}
@@ -140,54 +160,67 @@ async def get_user_profiling_by_conversations(user_id: UUID) -> List[Dict]:
     #     return None
 
 
-async def get_voice_agent(stage_id: UUID) -> Optional[Dict]:
-    """Get voice and agent from the stage of the course"""
-    query = """
+GET_VOICE_AGENT_QUERY = register_query("conversations_service.get_voice_agent", """
     SELECT voice_id, agent_id
     FROM conversaconfig.course_stages WHERE stage_id = $1
-    """
-    result = await execute_query(query, stage_id)
+""")
+
+async def get_voice_agent(stage_id: UUID) -> Optional[Dict]:
+    """Get voice and agent from the stage of the course"""
+    result = await execute_query(GET_VOICE_AGENT_QUERY, stage_id)
     
     return result[0] if result else None
 
+CREATE_CONVERSATION_QUERY = register_query("conversations_service.create_conversation", """
+    INSERT INTO conversaApp.conversations (user_id, course_id, stage_id, conversation_id, start_timestamp, status, created_at, updated_at)
+    VALUES ($1,$2,$3, gen_random_uuid(), now(), 'OPEN', now(), now())
+    RETURNING conversation_id, user_id, course_id, stage_id, start_timestamp, status, created_at
+""")
+
 async def create_conversation(user_id: UUID, course_id: UUID, stage_id: UUID) -> Optional[Dict]:
     """
     Create new conversation for user
     Note: course_id accepted for compatibility but not stored in DB
     """
-    query = """
-    INSERT INTO conversaApp.conversations (user_id, course_id, stage_id, conversation_id, start_timestamp, status, created_at, updated_at)
-    VALUES ($1,$2,$3, gen_random_uuid(), now(), 'OPEN', now(), now())
-    RETURNING conversation_id, user_id, course_id, stage_id, start_timestamp, status, created_at
-    """
     
-    result = await execute_query_one(query, user_id, course_id, stage_id)
+    result = await execute_query_one(CREATE_CONVERSATION_QUERY, user_id, course_id, stage_id)
     
     if result:
         return dict(result)
     return None
 
+CLOSE_CONVERSATION_QUERY = register_query("conversations_service.close_conversation", """
+    UPDATE conversaApp.conversations SET status = 'FINISHED', end_timestamp = now(), conversation_id_elevenlabs = $3, agent_id = $4
+    WHERE user_id = $1 AND conversation_id = $2
+""")
+
 async def close_conversation(user_id: UUID, conversation_id: UUID, conversation_id_elevenlabs: str, agent_id: str) -> Optional[Dict]:
     """
     Close conversation
     """
-    query = """
-    UPDATE conversaApp.conversations SET status = 'FINISHED', end_timestamp = now(), conversation_id_elevenlabs = $3, agent_id = $4
-    WHERE user_id = $1 AND conversation_id = $2
-    """
-    await execute_query(query, user_id, conversation_id, conversation_id_elevenlabs, agent_id)
+    await execute_query(CLOSE_CONVERSATION_QUERY, user_id, conversation_id, conversation_id_elevenlabs, agent_id)
     return True
 
+GET_CONVERSATION_STATUS_QUERY = register_query("conversations_service.get_conversation_status", """
+    SELECT status FROM conversaApp.conversations WHERE conversation_id = $1 AND user_id = $2
+""")
+
 async def get_conversation_status(conversation_id: UUID, user_id: UUID) -> Optional[str]:
     print('Gettin conver status')
-    query = """
-    SELECT status FROM conversaApp.conversations WHERE conversation_id = $1 AND user_id = $2
-    """
-    row = await execute_query_one(query, conversation_id, user_id)
+    row = await execute_query_one(GET_CONVERSATION_STATUS_QUERY, conversation_id, user_id)
     if not row:
         return None
     return row["status"]
 
+SET_CONVERSATION_SCORING_QUERY = register_query("conversations_service.set_conversation_scoring", """
+    INSERT INTO conversaapp.scoring_by_conversation
+    (scoring_id, conversation_id, fillerwords_scoring, clarity_scoring, participation_scoring
+    , keythemes_scoring, indexofquestions_scoring, rhythm_scoring, fillerwords_feedback
+    , clarity_feedback, indexofquestions_feedback, participation_feedback, keythemes_feedback,
+     rhythm_feedback, general_score, is_accomplished, pauses_scoring, pauses_feedback)
+    VALUES (gen_random_uuid(), $15,$1, $2, $3, $4, $5, $6, $7, $8, $11, $9, $10,  $12, $13, $14, $16, $17)
+""")
+
 async def set_conversation_scoring(
     fillerwords_scoring: float, 
     clarity_scoring: float, 
@@ -203,18 +236,12 @@ async def set_conversation_scoring(
     rhythm_feedback: str, 
     puntuacion_global: float, 
     objetivo: bool,
-    conv_id: UUID) -> Optional[str]:
+    conv_id: UUID,
+    pauses_scoring: Optional[float] = None,
+    pauses_feedback: Optional[str] = None) -> Optional[str]:
     print('Setting conversation scoring')
-    query = """
-    INSERT INTO conversaapp.scoring_by_conversation
-    (scoring_id, conversation_id, fillerwords_scoring, clarity_scoring, participation_scoring
-    , keythemes_scoring, indexofquestions_scoring, rhythm_scoring, fillerwords_feedback
-    , clarity_feedback, indexofquestions_feedback, participation_feedback, keythemes_feedback,
-     rhythm_feedback, general_score, is_accomplished)
-    VALUES (gen_random_uuid(), $15,$1, $2, $3, $4, $5, $6, $7, $8, $11, $9, $10,  $12, $13, $14)
-    """
     row = await execute_query_one(
-        query,
+        SET_CONVERSATION_SCORING_QUERY,
         fillerwords_scoring,
         clarity_scoring,
         participation_scoring,
@@ -230,8 +257,18 @@ async def set_conversation_scoring(
         puntuacion_global,
         objetivo,
         conv_id,  # UUID ok
+        pauses_scoring,
+        pauses_feedback,
     )
 
+SET_CONVERSATION_PROFILING_QUERY = register_query("conversations_service.set_conversation_profiling", """
+    INSERT INTO conversaapp.profiling_by_conversation
+    (profiling_id, conversation_id, prospection_scoring, empathy_scoring, technical_domain_scoring
+    , negotiation_scoring, resilience_scoring, prospection_feedback, empathy_feedback, technical_domain_feedback
+    , negotiation_feedback, resilience_feedback)
+    VALUES (gen_random_uuid(), $11,$1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+""")
+
 async def set_conversation_profiling(
     prospection_scoring: int, 
     empathy_scoring: int, 
@@ -245,15 +282,8 @@ async def set_conversation_profiling(
     resilience_feedback: str, 
     conv_id: UUID) -> Optional[str]:
     print('Setting conversation profiling')
-    query = """
-    INSERT INTO conversaapp.profiling_by_conversation
-    (profiling_id, conversation_id, prospection_scoring, empathy_scoring, technical_domain_scoring
-    , negotiation_scoring, resilience_scoring, prospection_feedback, empathy_feedback, technical_domain_feedback
-    , negotiation_feedback, resilience_feedback)
-    VALUES (gen_random_uuid(), $11,$1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-    """
     row = await execute_query_one(
-        query,
+        SET_CONVERSATION_PROFILING_QUERY,
         prospection_scoring,
         empathy_scoring,
         technical_domain_scoring,
@@ -267,20 +297,7 @@ async def set_conversation_profiling(
         conv_id,  # UUID ok
     )
 
-async def set_general_profiling(
-    prospection_scoring: int, 
-    empathy_scoring: int, 
-    technical_domain_scoring: int, 
-    negotiation_scoring: int, 
-    resilience_scoring: int, 
-    prospection_feedback: str, 
-    empathy_feedback: str, 
-    technical_domain_feedback: str, 
-    negotiation_feedback: str, 
-    resilience_feedback: str, 
-    user_id: UUID) -> Optional[str]:
-    print('Setting general profiling')
-    query = """
+SET_GENERAL_PROFILING_QUERY = register_query("conversations_service.set_general_profiling", """
     INSERT INTO conversascoring.user_profile
     (prospection_score, empathy_score, technical_domain_score, negotiation_score, resilience_score, prospection_feedback, empathy_feedback, technical_domain_feedback, negotiation_feedback, resilience_feedback, user_id, event_timestamp)
     VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, NOW())
@@ -297,10 +314,24 @@ async def set_general_profiling(
         technical_domain_feedback = EXCLUDED.technical_domain_feedback,
         negotiation_feedback = EXCLUDED.negotiation_feedback,
         resilience_feedback = EXCLUDED.resilience_feedback;
-    """
+""")
+
+async def set_general_profiling(
+    prospection_scoring: int, 
+    empathy_scoring: int, 
+    technical_domain_scoring: int, 
+    negotiation_scoring: int, 
+    resilience_scoring: int, 
+    prospection_feedback: str, 
+    empathy_feedback: str, 
+    technical_domain_feedback: str, 
+    negotiation_feedback: str, 
+    resilience_feedback: str, 
+    user_id: UUID) -> Optional[str]:
+    print('Setting general profiling')
     print("setting general profiling for user_id:", user_id)
     row = await execute_query_one(
-        query,
+        SET_GENERAL_PROFILING_QUERY,
         prospection_scoring,
         empathy_scoring,
         technical_domain_scoring,
@@ -315,14 +346,7 @@ async def set_general_profiling(
     )
     print("general profiling was set successfully for user_id:", user_id)
 
-async def set_user_profile(
-    user_id: UUID, 
-    general_score: float,  
-    profile_type: str
-) -> Optional[str]:
-    print(f'Setting user profile for user {user_id}')
-    
-    query = """
+SET_USER_PROFILE_QUERY = register_query("conversations_service.set_user_profile", """
     INSERT INTO conversascoring.user_profile
     (user_id, event_timestamp, general_score, profile_type)
     VALUES ($1, NOW(), $2, $3)
@@ -331,11 +355,103 @@ async def set_user_profile(
         event_timestamp = NOW(),
         general_score = EXCLUDED.general_score,
         profile_type = EXCLUDED.profile_type;
-    """
+""")
 
+async def set_user_profile(
+    user_id: UUID, 
+    general_score: float,  
+    profile_type: str
+) -> Optional[str]:
+    print(f'Setting user profile for user {user_id}')
+    
     row = await execute_query_one(
-        query,
+        SET_USER_PROFILE_QUERY,
         user_id,
         general_score,
         profile_type
     )
+
+SET_REALTIME_SESSION_METRICS_QUERY = register_query("conversations_service.set_realtime_session_metrics", """
+    INSERT INTO conversaapp.realtime_session_metrics
+    (conversation_id, time_to_first_audio_ms, turns, interruptions, response_p50_ms, response_p90_ms, summary,
+     pause_count, pause_total_seconds, pause_longest_seconds, speech_seconds,
+     asr_turns, asr_tokens, asr_mean_logprob, asr_low_fraction, created_at)
+    VALUES ($1, $2, $3, $4, $5, $6, $7::jsonb, $8, $9, $10, $11, $12, $13, $14, $15, now())
+    ON CONFLICT (conversation_id) DO NOTHING
+""")
+
+async def set_realtime_session_metrics(
+    conv_id: UUID,
+    time_to_first_audio_ms: Optional[float],
+    turns: int,
+    interruptions: int,
+    response_p50_ms: Optional[float],
+    response_p90_ms: Optional[float],
+    summary: Dict,
+    pauses: Optional[Dict] = None,
+    asr_clarity: Optional[Dict] = None,
+) -> None:
+    """
+    Save the realtime latency summary of a conversation (one row per conversation).
+    response_* = user speech end -> first agent audio; summary holds every
+    per-session histogram plus queue and silence gate stats (jsonb);
+    pause_* = seller's mid-turn pauses measured on the audio (PauseDetector);
+    asr_* = transcription confidence of the seller (AsrClarityTracker)
+    """
+    pauses = pauses or {}
+    asr_clarity = asr_clarity or {}
+    await execute_query(
+        SET_REALTIME_SESSION_METRICS_QUERY,
+        conv_id,
+        time_to_first_audio_ms,
+        turns,
+        interruptions,
+        response_p50_ms,
+        response_p90_ms,
+        json.dumps(summary),
+        pauses.get("count"),
+        pauses.get("total_seconds"),
+        pauses.get("longest_seconds"),
+        pauses.get("speech_seconds"),
+        asr_clarity.get("turns"),
+        asr_clarity.get("tokens"),
+        asr_clarity.get("mean_logprob"),
+        asr_clarity.get("low_fraction"),
+    )
+
+GET_CONVERSATION_PAUSES_QUERY = register_query("conversations_service.get_conversation_pauses", """
+    SELECT pause_count, pause_total_seconds, pause_longest_seconds, speech_seconds
+    FROM conversaapp.realtime_session_metrics
+    WHERE conversation_id = $1
+""")
+
+async def get_conversation_pauses(conv_id: UUID) -> Optional[Dict]:
+    """Seller pause metrics of a realtime conversation (None if it has none)"""
+    row = await execute_query_one(GET_CONVERSATION_PAUSES_QUERY, conv_id)
+    if not row or row["pause_count"] is None:
+        return None
+    return {
+        "count": row["pause_count"],
+        "total_seconds": row["pause_total_seconds"],
+        "longest_seconds": row["pause_longest_seconds"],
+        "speech_seconds": row["speech_seconds"],
+    }
+
+
+GET_CONVERSATION_ASR_CLARITY_QUERY = register_query("conversations_service.get_conversation_asr_clarity", """
+    SELECT asr_turns, asr_tokens, asr_mean_logprob, asr_low_fraction
+    FROM conversaapp.realtime_session_metrics
+    WHERE conversation_id = $1
+""")
+
+async def get_conversation_asr_clarity(conv_id: UUID) -> Optional[Dict]:
+    """Seller transcription confidence of a realtime conversation (None without logprobs)"""
+    row = await execute_query_one(GET_CONVERSATION_ASR_CLARITY_QUERY, conv_id)
+    if not row or not row["asr_tokens"]:
+        return None
+    return {
+        "turns": row["asr_turns"],
+        "tokens": row["asr_tokens"],
+        "mean_logprob": row["asr_mean_logprob"],
+        "low_fraction": row["asr_low_fraction"],
+    }
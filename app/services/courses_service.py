@@ -3,10 +3,68 @@
 # Returns courses available to the user's type
 
 from .db import execute_query
+from .query_registry import register_query
 from uuid import UUID
 import json
 from typing import List, Dict, Optional
 
+GET_USER_COURSES_QUERY = register_query("courses_service.get_user_courses", """
+    SELECT 
+        mc.course_id,
+        mc.name,
+        mc.description,
+        mc.image_src,
+        mc.created_on,
+        mc.completion_time_minutes,
+        mc.has_modules,
+        mc.module_template,
+        uca.assigned_at,
+        uca.estimated_completion_date,
+        uca.is_mandatory, 
+        cs.stage_id,
+        cs.stage_name,
+        cs.stage_description,
+        cs.stage_order,
+        cs.stage_objectives,
+        cc.level,
+        mc.course_steps,
+        mc.completion_time_minutes,
+        CASE 
+            WHEN c.status = 'FINISHED' AND c.is_accomplished = true
+            THEN cs.stage_order
+            ELSE 0
+        END AS stage_progress,
+        ucp.completed_modules
+    FROM conversaconfig.user_course_assignments uca 
+    JOIN conversaconfig.master_courses mc ON uca.course_id = mc.course_id
+    LEFT JOIN conversaconfig.course_stages cs ON cs.course_id = mc.course_id
+    LEFT JOIN conversaconfig.course_contents cc ON cc.stage_id = cs.stage_id
+    LEFT JOIN conversaconfig.user_course_progress ucp on ucp.user_id = $1 and mc.course_id = ucp.course_id
+    LEFT JOIN (
+        SELECT 
+            c.course_id,
+            c.stage_id,
+            c.status,
+            c.conversation_id,
+            sbc.is_accomplished,
+            ROW_NUMBER() OVER (
+                PARTITION BY c.course_id, c.stage_id
+                ORDER BY 
+                    CASE WHEN c.status = 'FINISHED' AND sbc.is_accomplished = true THEN 0 ELSE 1 END,
+                    c.created_at DESC
+            ) as rn
+        FROM conversaapp.conversations c
+        LEFT JOIN conversaapp.scoring_by_conversation sbc 
+            ON c.conversation_id = sbc.conversation_id
+        WHERE c.user_id = $1
+    ) c ON c.course_id = mc.course_id 
+        AND c.stage_id = cs.stage_id 
+        AND c.rn = 1
+    WHERE uca.user_id = $1  
+    AND mc.is_active 
+    ORDER BY uca.estimated_completion_date ASC, cs.stage_order ASC;
+""")
+
 async def get_user_courses(user_id: UUID) -> List[Dict]:
     """
     Retrieves a list of courses for a specific user, nested with their respective stages.
@@ -25,64 +83,7 @@ async def get_user_courses(user_id: UUID) -> List[Dict]:
     
     # Optimization: Removed JOIN on 'course_contents' to prevent Cartesian product (row duplication).
     # Ordering by course_id first is crucial for efficient grouping.
-    query = """
-        SELECT 
-            mc.course_id,
-            mc.name,
-            mc.description,
-            mc.image_src,
-            mc.created_on,
-            mc.completion_time_minutes,
-            mc.has_modules,
-            mc.module_template,
-            uca.assigned_at,
-            uca.estimated_completion_date,
-            uca.is_mandatory, 
-            cs.stage_id,
-            cs.stage_name,
-            cs.stage_description,
-            cs.stage_order,
-            cs.stage_objectives,
-            cc.level,
-            mc.course_steps,
-            mc.completion_time_minutes,
-            CASE 
-                WHEN c.status = 'FINISHED' AND c.is_accomplished = true
-                THEN cs.stage_order
-                ELSE 0
-            END AS stage_progress,
-            ucp.completed_modules
-        FROM conversaconfig.user_course_assignments uca 
-        JOIN conversaconfig.master_courses mc ON uca.course_id = mc.course_id
-        LEFT JOIN conversaconfig.course_stages cs ON cs.course_id = mc.course_id
-        LEFT JOIN conversaconfig.course_contents cc ON cc.stage_id = cs.stage_id
-        LEFT JOIN conversaconfig.user_course_progress ucp on ucp.user_id = $1 and mc.course_id = ucp.course_id
-        LEFT JOIN (
-            SELECT 
-                c.course_id,
-                c.stage_id,
-                c.status,
-                c.conversation_id,
-                sbc.is_accomplished,
-                ROW_NUMBER() OVER (
-                    PARTITION BY c.course_id, c.stage_id
-                    ORDER BY 
-                        CASE WHEN c.status = 'FINISHED' AND sbc.is_accomplished = true THEN 0 ELSE 1 END,
-                        c.created_at DESC
-                ) as rn
-            FROM conversaapp.conversations c
-            LEFT JOIN conversaapp.scoring_by_conversation sbc 
-                ON c.conversation_id = sbc.conversation_id
-            WHERE c.user_id = $1
-        ) c ON c.course_id = mc.course_id 
-            AND c.stage_id = cs.stage_id 
-            AND c.rn = 1
-        WHERE uca.user_id = $1  
-        AND mc.is_active 
-        ORDER BY uca.estimated_completion_date ASC, cs.stage_order ASC;
-    """
-    
-    results = await execute_query(query, user_id)
+    results = await execute_query(GET_USER_COURSES_QUERY, user_id)
     
     courses_map: Dict[str, Dict] = {}
 
@@ -122,39 +123,35 @@ async def get_user_courses(user_id: UUID) -> List[Dict]:
     return list(courses_map.values())
 
 
+GET_ALL_COURSES_QUERY = register_query("courses_service.get_all_courses", """
+    SELECT 
+        *
+    FROM conversaconfig.master_courses
+    order by created_on desc;
+""")
+
 async def get_all_courses() -> List[Dict]:
 
-    query = """
-        SELECT 
-            *
-        FROM conversaconfig.master_courses
-        order by created_on desc;
-    """
-    
-    results = await execute_query(query)
+    results = await execute_query(GET_ALL_COURSES_QUERY)
 
     return [dict(row) for row in results]
 
+GET_ALL_STAGES_QUERY = register_query("courses_service.get_all_stages", """
+    SELECT 
+        *
+    FROM conversaconfig.course_stages
+        INNER JOIN conversaconfig.course_contents 
+        ON course_stages.stage_id = course_contents.stage_id
+""")
+
 async def get_all_stages() -> List[Dict]:
 
-    query = """
-        SELECT 
-            *
-        FROM conversaconfig.course_stages
-            INNER JOIN conversaconfig.course_contents 
-            ON course_stages.stage_id = course_contents.stage_id
-    """
-    
-    results = await execute_query(query)
+    results = await execute_query(GET_ALL_STAGES_QUERY)
 
     return [dict(row) for row in results]
 
 
-async def get_user_courses_stages(course_id: UUID) -> List[Dict]:
-    """
-    Get stages available for a course
-    """
-    query = """
+GET_USER_COURSES_STAGES_QUERY = register_query("courses_service.get_user_courses_stages", """
     SELECT
       mc.course_id       AS mc_course_id,
       mc.name            AS mc_name,
@@ -170,16 +167,17 @@ async def get_user_courses_stages(course_id: UUID) -> List[Dict]:
         LEFT JOIN conversaconfig.course_contents cc ON cc.course_id = mc.course_id AND cc.stage_id = cs.stage_id
         WHERE mc.course_id = $1 and mc.is_active
         ORDER BY cs.stage_order NULLS LAST, cc.position NULLS LAST;
+""")
+
+async def get_user_courses_stages(course_id: UUID) -> List[Dict]:
+    """
+    Get stages available for a course
     """
     
-    results = await execute_query(query, course_id)
+    results = await execute_query(GET_USER_COURSES_STAGES_QUERY, course_id)
     return [dict(row) for row in results]
 
-async def get_courses_details(course_id: UUID, stage_id: UUID) -> List[Dict]:
-    """
-    Get courses details based on course_id and stage_id
-    """
-    query = """
+GET_COURSES_DETAILS_QUERY = register_query("courses_service.get_courses_details", """
     SELECT
       mc.course_id       AS course_id,
       mc.name            AS name,
@@ -203,62 +201,84 @@ async def get_courses_details(course_id: UUID, stage_id: UUID) -> List[Dict]:
         LEFT JOIN conversaconfig.course_contents cc ON cc.course_id = mc.course_id AND cc.stage_id = cs.stage_id
         WHERE mc.course_id = $1 and mc.is_active and cs.stage_id = $2
         ORDER BY cs.stage_order NULLS LAST, cc.position NULLS LAST;
+""")
+
+async def get_courses_details(course_id: UUID, stage_id: UUID) -> List[Dict]:
+    """
+    Get courses details based on course_id and stage_id
     """
     
-    results = await execute_query(query, course_id, stage_id)
+    results = await execute_query(GET_COURSES_DETAILS_QUERY, course_id, stage_id)
     return [dict(row) for row in results]
 
+GET_COMPANY_COURSES_QUERY = register_query("courses_service.get_company_courses", """
+    select 
+        distinct uca.course_id, mc.name
+    from 
+        conversaconfig.user_info ui 
+        left join conversaconfig.user_course_assignments uca 
+            on ui.user_id = uca.user_id 
+        left join conversaconfig.master_courses mc
+            on uca.course_id = mc.course_id
+    where 
+        ui.company_id = $1
+""")
+
 async def get_company_courses(company_id: str) -> List[Dict]:
     """
     Get courses by company id
     """
-    query = """
-        select 
-            distinct uca.course_id, mc.name
-        from 
-            conversaconfig.user_info ui 
-            left join conversaconfig.user_course_assignments uca 
-                on ui.user_id = uca.user_id 
-            left join conversaconfig.master_courses mc
-                on uca.course_id = mc.course_id
-        where 
-            ui.company_id = $1
-    """
     
-    results = await execute_query(query, company_id)
+    results = await execute_query(GET_COMPANY_COURSES_QUERY, company_id)
     return [dict(row) for row in results]
 
 
+CREATE_NEW_COURSE_QUERY = register_query("courses_service.create_new_course", """
+    INSERT INTO conversaconfig.master_courses 
+        (name, description, image_src, is_active, is_mandatory, completion_time_minutes, course_steps)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+    RETURNING course_id;
+""")
+
 async def create_new_course(name: str, description: str, image_src: str, is_active: bool, is_mandatory: bool, completion_time_minutes: int, course_steps: int) -> UUID:
     """
     Create a new course in the system.
     """
-    query = """
-        INSERT INTO conversaconfig.master_courses 
-            (name, description, image_src, is_active, is_mandatory, completion_time_minutes, course_steps)
-        VALUES ($1, $2, $3, $4, $5, $6, $7)
-        RETURNING course_id;
-    """
     result = await execute_query(
-        query, 
+        CREATE_NEW_COURSE_QUERY, 
         name, description, image_src, is_active, is_mandatory, completion_time_minutes, course_steps)
     return result[0]['course_id'] if result else None 
 
+UPDATE_COURSE_QUERY = register_query("courses_service.update_course", """
+    UPDATE conversaconfig.master_courses 
+    SET name = $2, description = $3, image_src = $4, is_active = $5, is_mandatory = $6, completion_time_minutes = $7, course_steps = $8
+    WHERE course_id = $1
+    RETURNING course_id;
+""")
+
 async def update_course(course_id: UUID, name: str, description: str, image_src: str, is_active: bool, is_mandatory: bool, completion_time_minutes: int, course_steps: int) -> UUID:
     """
     Update an existing course in the system.
     """
-    query = """
-        UPDATE conversaconfig.master_courses 
-        SET name = $2, description = $3, image_src = $4, is_active = $5, is_mandatory = $6, completion_time_minutes = $7, course_steps = $8
-        WHERE course_id = $1
-        RETURNING course_id;
-    """
     result = await execute_query(
-        query, 
+        UPDATE_COURSE_QUERY, 
         course_id, name, description, image_src, is_active, is_mandatory, completion_time_minutes, course_steps)
     return result[0]['course_id'] if result else None
 
+CREATE_NEW_STAGE_QUERY = register_query("courses_service.create_new_stage", """
+    INSERT INTO conversaconfig.course_stages 
+        (course_id, stage_order, stage_name, stage_description, 
+        key_themes, stage_objectives, voice_id, agent_id, chatbot_image_src)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+    RETURNING stage_id;
+""")
+
+CREATE_NEW_STAGE_CONTENT_QUERY = register_query("courses_service.create_new_stage.content", """
+    INSERT INTO conversaconfig.course_contents 
+        (course_id, stage_id, position, level, body, bot_prompt, user_role, bot_role, context_info)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9);
+""")
+
 async def create_new_stage(
     course_id: UUID, stage_order: int, stage_name: str, stage_description: str, 
     key_themes: str, position: int, level: str, body: str, bot_prompt: str, user_role: str, 
@@ -267,32 +287,34 @@ async def create_new_stage(
     """
     Create a new stage in the system.
     """
-    query = """
-        INSERT INTO conversaconfig.course_stages 
-            (course_id, stage_order, stage_name, stage_description, 
-            key_themes, stage_objectives, voice_id, agent_id, chatbot_image_src)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-        RETURNING stage_id;
-    """
     result = await execute_query(
-        query, 
+        CREATE_NEW_STAGE_QUERY, 
         course_id, stage_order, stage_name, stage_description, key_themes, stage_objectives, voice_id, agent_id, chatbot_image_src
     )
     if result:
         stage_id = result[0]['stage_id']
         # Insert content for the stage
-        content_query = """
-            INSERT INTO conversaconfig.course_contents 
-                (course_id, stage_id, position, level, body, bot_prompt, user_role, bot_role, context_info)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9);
-        """
         await execute_query(
-            content_query,
+            CREATE_NEW_STAGE_CONTENT_QUERY,
             course_id, stage_id, position, level, body, bot_prompt, user_role, bot_role, context_info
         )
 
     return result[0]['stage_id'] if result else None
 
+UPDATE_STAGE_QUERY = register_query("courses_service.update_stage", """
+    UPDATE conversaconfig.course_stages 
+    SET stage_order = $3, stage_name = $4, stage_description = $5, 
+        key_themes = $6, stage_objectives = $7, voice_id = $8, agent_id = $9, chatbot_image_src = $10
+    WHERE stage_id = $1 and course_id = $2
+    RETURNING stage_id;
+""")
+
+UPDATE_STAGE_CONTENT_QUERY = register_query("courses_service.update_stage.content", """
+    UPDATE conversaconfig.course_contents 
+    SET position = $3, level = $4, body = $5, bot_prompt = $6, user_role = $7, bot_role = $8, context_info = $9
+    WHERE stage_id = $1 and course_id = $2;
+""")
+
 async def update_stage(
     stage_id: UUID, course_id: UUID, stage_order: int, stage_name: str, stage_description: str, 
     key_themes: str, position: int, level: str, body: str, bot_prompt: str, user_role: str, 
@@ -301,26 +323,14 @@ async def update_stage(
     """
     Update an existing stage in the system.
     """
-    query = """
-        UPDATE conversaconfig.course_stages 
-        SET stage_order = $3, stage_name = $4, stage_description = $5, 
-            key_themes = $6, stage_objectives = $7, voice_id = $8, agent_id = $9, chatbot_image_src = $10
-        WHERE stage_id = $1 and course_id = $2
-        RETURNING stage_id;
-    """
     result = await execute_query(
-        query,
+        UPDATE_STAGE_QUERY,
         stage_id, course_id, stage_order, stage_name, stage_description, key_themes, stage_objectives, voice_id, agent_id, chatbot_image_src
     )
     if result:
         # Update content for the stage
-        content_query = """
-            UPDATE conversaconfig.course_contents 
-            SET position = $3, level = $4, body = $5, bot_prompt = $6, user_role = $7, bot_role = $8, context_info = $9
-            WHERE stage_id = $1 and course_id = $2;
-        """
         await execute_query(
-            content_query,
+            UPDATE_STAGE_CONTENT_QUERY,
             stage_id, course_id, position, level, body, bot_prompt, user_role, bot_role, context_info
         )
 
@@ -328,19 +338,19 @@ async def update_stage(
 
 
 
+USER_COURSE_PROGRESS_QUERY = register_query("courses_service.user_course_progress", """
+    SELECT *
+    FROM conversaconfig.user_course_progress
+    WHERE user_id = $1 AND course_id = $2
+""")
+
 async def user_course_progress(user_id: str, course_id: str) -> Optional[Dict]:
     """
     Get user course progress. If it doesn't exist, return a default progress dictionary.
     """
 
     # 1. Intentamos buscar si ya existe
-    select_query = """
-        SELECT *
-        FROM conversaconfig.user_course_progress
-        WHERE user_id = $1 AND course_id = $2
-    """
-
-    result = await execute_query(select_query, user_id, course_id)
+    result = await execute_query(USER_COURSE_PROGRESS_QUERY, user_id, course_id)
 
     # Si hay resultados en la base de datos, los devolvemos
     if result:
@@ -359,65 +369,65 @@ async def user_course_progress(user_id: str, course_id: str) -> Optional[Dict]:
     }
     
 
+COMPANY_ALL_USER_SCORING_BY_COURSE_QUERY = register_query("courses_service.companyAllUserScoringByCourse", """
+    select 
+        ui.user_id, ui."name", ui.last_name, ui.avatar, ui.user_type, uca.course_id, ucp.status, 
+        ROUND(AVG(sbc.general_score), 2) AS general_score,
+        ROUND(AVG(sbc.fillerwords_scoring), 2) AS fillerwords_scoring,
+        ROUND(AVG(sbc.clarity_scoring), 2) AS clarity_scoring,
+        ROUND(AVG(sbc.keythemes_scoring), 2) AS keythemes_scoring,
+        ROUND(AVG(sbc.participation_scoring), 2) AS participation_scoring,
+        ROUND(AVG(sbc.rhythm_scoring), 2) AS rhythm_scoring
+    from conversaconfig.user_info ui 
+        left join conversaconfig.user_course_assignments uca 
+            on ui.user_id = uca.user_id 
+        left join conversaconfig.user_course_progress ucp 
+            on ui.user_id = ucp.user_id and uca.course_id = ucp.course_id
+        left join conversaapp.conversations c 
+            on ui.user_id = c.user_id 
+        left join conversaapp.scoring_by_conversation sbc
+            on c.conversation_id = sbc.conversation_id
+    where ui.company_id = $1 and 
+        uca.course_id = $2 and
+        c.status = 'FINISHED' and sbc.general_score is not null
+    group by (ui.user_id, ui."name", ui.last_name, ui.avatar, ui.user_type, uca.course_id, ucp.status)
+""")
+
 async def companyAllUserScoringByCourse(course_id: str, company_id: str) -> Optional[Dict]:
     """
     Get user course progress. If it doesn't exist, return a default progress dictionary.
     """
 
     # 1. Intentamos buscar si ya existe
-    select_query = """
-        select 
-            ui.user_id, ui."name", ui.last_name, ui.avatar, ui.user_type, uca.course_id, ucp.status, 
-            ROUND(AVG(sbc.general_score), 2) AS general_score,
-            ROUND(AVG(sbc.fillerwords_scoring), 2) AS fillerwords_scoring,
-            ROUND(AVG(sbc.clarity_scoring), 2) AS clarity_scoring,
-            ROUND(AVG(sbc.keythemes_scoring), 2) AS keythemes_scoring,
-            ROUND(AVG(sbc.participation_scoring), 2) AS participation_scoring,
-            ROUND(AVG(sbc.rhythm_scoring), 2) AS rhythm_scoring
-        from conversaconfig.user_info ui 
-            left join conversaconfig.user_course_assignments uca 
-                on ui.user_id = uca.user_id 
-            left join conversaconfig.user_course_progress ucp 
-                on ui.user_id = ucp.user_id and uca.course_id = ucp.course_id
-            left join conversaapp.conversations c 
-                on ui.user_id = c.user_id 
-            left join conversaapp.scoring_by_conversation sbc
-                on c.conversation_id = sbc.conversation_id
-        where ui.company_id = $1 and 
-            uca.course_id = $2 and
-            c.status = 'FINISHED' and sbc.general_score is not null
-        group by (ui.user_id, ui."name", ui.last_name, ui.avatar, ui.user_type, uca.course_id, ucp.status)
-    """
-
-    result = await execute_query(select_query, company_id, course_id)
+    result = await execute_query(COMPANY_ALL_USER_SCORING_BY_COURSE_QUERY, company_id, course_id)
 
     return result
 
-async def courseModuleExtraction(course_id) -> Optional[Dict]:
-    """
-    Get user course modules json. If it doesn't exist, return a default progress dictionary.
-    """
-
-    # 1. Get module json and module template
-    module_query = """
+COURSE_MODULE_EXTRACTION_MODULE_QUERY = register_query("courses_service.courseModuleExtraction.module", """
     select 
         module_json
     from conversaconfig.master_courses
     where course_id = $1
 
-    """
+""")
 
-    stages_query = """
+COURSE_MODULE_EXTRACTION_STAGES_QUERY = register_query("courses_service.courseModuleExtraction.stages", """
     select 
         stage_id
     from conversaconfig.course_stages
     where course_id = $1
+""")
+
+async def courseModuleExtraction(course_id) -> Optional[Dict]:
+    """
+    Get user course modules json. If it doesn't exist, return a default progress dictionary.
     """
 
-    module = await execute_query(module_query, course_id)
+    # 1. Get module json and module template
+    module = await execute_query(COURSE_MODULE_EXTRACTION_MODULE_QUERY, course_id)
     json_module = json.loads(module[0]['module_json'])
 
-    stages = await execute_query(stages_query, course_id)
+    stages = await execute_query(COURSE_MODULE_EXTRACTION_STAGES_QUERY, course_id)
 
     last_id = max(m["id"] for m in json_module["modules"])
     last_order = max(m["orderId"] for m in json_module["modules"])
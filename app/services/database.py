@@ -1,121 +1,133 @@
-from sqlmodel import SQLModel, create_engine, Field, Session, select
-from app.config import settings
-import logging
-from typing import List, Optional
-from uuid import UUID
-from datetime import datetime
-from sqlalchemy import Column, String
-from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+# Recordings/profiles models and CRUD helpers on the asyncpg pool (db.py)
+# These used to run on a second, synchronous SQLModel/psycopg2 engine; now
+# there is a single connection pool per process and nothing connects at import.
+# Models are plain pydantic models, used as request/response bodies by
+# app/routers/db_operations.py.
 
-logger = logging.getLogger(__name__)
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Type, TypeVar
+from uuid import UUID
 
-# Database engine
-engine = settings.create_engine(
-    echo=settings.debug,
-    pool_pre_ping=True,
-    pool_recycle=300,
-)
+from pydantic import BaseModel, Field
 
-def get_session():
-    """Get database session"""
-    with Session(engine) as session:
-        yield session
+from .db import execute_query, execute_query_one
 
 # --- Models ------------------------------------------------------------------
 
-class Profile(SQLModel, table=True):
-    __tablename__ = "profiles"
-    id: UUID = Field(primary_key=True)
+class Profile(BaseModel):
+    id: UUID
     email: str
-    name: Optional[str]
+    name: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    company: Optional[str]
-    role: Optional[str]
+    company: Optional[str] = None
+    role: Optional[str] = None
 
-class Recording(SQLModel, table=True):
-    __tablename__ = "recordings"
-    id: UUID = Field(default=None, primary_key=True)
-    user_id: UUID = Field(foreign_key="profiles.id")
+class Recording(BaseModel):
+    id: Optional[UUID] = None
+    user_id: UUID
     upload_url: str
     filename: str
     duration_seconds: int
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
-    transcription_status: str = Field(default="pending")
-    transcription_text: Optional[str]
-    transcription_completed_at: Optional[datetime]
-
-class RecordingAnalysis(SQLModel, table=True):
-    __tablename__ = "recording_analyses"
-    id: UUID = Field(default=None, primary_key=True)
-    recording_id: UUID = Field(foreign_key="recordings.id")
+    transcription_status: str = "pending"
+    transcription_text: Optional[str] = None
+    transcription_completed_at: Optional[datetime] = None
+
+class RecordingAnalysis(BaseModel):
+    id: Optional[UUID] = None
+    recording_id: UUID
     score: int
     summary: str
-    strengths: List[str] = Field(sa_column=Column(ARRAY(String), nullable=False))
-    improvements: List[str] = Field(sa_column=Column(ARRAY(String), nullable=False))
+    strengths: List[str]
+    improvements: List[str]
     model_used: str
     analyzed_at: datetime = Field(default_factory=datetime.utcnow)
 
-class WebhookLog(SQLModel, table=True):
-    __tablename__ = "webhook_logs"
-    id: UUID = Field(default=None, primary_key=True)
-    recording_id: Optional[UUID] = Field(foreign_key="recordings.id")
-    user_id: Optional[UUID] = Field(foreign_key="profiles.id")
+class WebhookLog(BaseModel):
+    id: Optional[UUID] = None
+    recording_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
     event_type: str
     status: str
-    error_message: Optional[str]
-    payload: dict = Field(sa_column=Column(JSONB, nullable=False))
+    error_message: Optional[str] = None
+    payload: Dict[str, Any]
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+Model = TypeVar("Model", bound=BaseModel)
+
+# JSONB columns go to asyncpg as text and come back as text
+JSONB_FIELDS = {"payload"}
+
+# --- Helpers -----------------------------------------------------------------
+
+def _from_row(model: Type[Model], row) -> Optional[Model]:
+    if row is None:
+        return None
+    data = dict(row)
+    for field in JSONB_FIELDS.intersection(data):
+        if isinstance(data[field], str):
+            data[field] = json.loads(data[field])
+    return model(**data)
+
+async def _insert(table: str, item: Model) -> Model:
+    """INSERT every field of the model (id left to the table default when None)."""
+    data = item.model_dump(exclude={"id"} if item.id is None else None)
+    columns, placeholders, values = [], [], []
+    for i, (column, value) in enumerate(data.items(), start=1):
+        columns.append(column)
+        if column in JSONB_FIELDS:
+            placeholders.append(f"${i}::jsonb")
+            value = json.dumps(value)
+        else:
+            placeholders.append(f"${i}")
+        values.append(value)
+    query = f"""
+    INSERT INTO {table} ({", ".join(columns)})
+    VALUES ({", ".join(placeholders)})
+    RETURNING *
+    """
+    row = await execute_query_one(query, *values)
+    return _from_row(type(item), row)
+
 # --- CRUD helpers ------------------------------------------------------------
 
-def create_profile(session: Session, profile: Profile) -> Profile:
-    session.add(profile)
-    session.commit()
-    session.refresh(profile)
-    return profile
+async def create_profile(profile: Profile) -> Profile:
+    return await _insert("profiles", profile)
 
-def get_profile(session: Session, profile_id: UUID) -> Optional[Profile]:
-    return session.get(Profile, profile_id)
+async def get_profile(profile_id: UUID) -> Optional[Profile]:
+    row = await execute_query_one("SELECT * FROM profiles WHERE id = $1", profile_id)
+    return _from_row(Profile, row)
 
-def create_recording(session: Session, rec: Recording) -> Recording:
-    session.add(rec)
-    session.commit()
-    session.refresh(rec)
-    return rec
+async def create_recording(rec: Recording) -> Recording:
+    return await _insert("recordings", rec)
 
-def list_recordings_for_user(session: Session, user_id: UUID) -> List[Recording]:
-    q = select(Recording).where(Recording.user_id == user_id)
-    return session.exec(q).all()
+async def list_recordings_for_user(user_id: UUID) -> List[Recording]:
+    rows = await execute_query("SELECT * FROM recordings WHERE user_id = $1", user_id)
+    return [_from_row(Recording, row) for row in rows]
 
-def update_transcription(
-    session: Session,
+async def update_transcription(
     recording_id: UUID,
     text: str,
     status: str = "completed",
-) -> Recording:
-    rec = session.get(Recording, recording_id)
-    rec.transcription_text = text
-    rec.transcription_status = status
-    rec.transcription_completed_at = datetime.utcnow()
-    session.add(rec)
-    session.commit()
-    session.refresh(rec)
-    return rec
-
-def add_analysis(session: Session, analysis: RecordingAnalysis) -> RecordingAnalysis:
-    session.add(analysis)
-    session.commit()
-    session.refresh(analysis)
-    return analysis
-
-def get_analyses_for_recording(
-    session: Session, recording_id: UUID
-) -> List[RecordingAnalysis]:
-    q = select(RecordingAnalysis).where(RecordingAnalysis.recording_id == recording_id)
-    return session.exec(q).all()
-
-def log_webhook_event(session: Session, log: WebhookLog) -> WebhookLog:
-    session.add(log)
-    session.commit()
-    session.refresh(log)
-    return log
+) -> Optional[Recording]:
+    query = """
+    UPDATE recordings
+    SET transcription_text = $2,
+        transcription_status = $3,
+        transcription_completed_at = $4
+    WHERE id = $1
+    RETURNING *
+    """
+    row = await execute_query_one(query, recording_id, text, status, datetime.utcnow())
+    return _from_row(Recording, row)
+
+async def add_analysis(analysis: RecordingAnalysis) -> RecordingAnalysis:
+    return await _insert("recording_analyses", analysis)
+
+async def get_analyses_for_recording(recording_id: UUID) -> List[RecordingAnalysis]:
+    rows = await execute_query("SELECT * FROM recording_analyses WHERE recording_id = $1", recording_id)
+    return [_from_row(RecordingAnalysis, row) for row in rows]
+
+async def log_webhook_event(log: WebhookLog) -> WebhookLog:
+    return await _insert("webhook_logs", log)
@@ -1,58 +1,371 @@
 # Database connection pool and helpers using asyncpg
 # Assumes DATABASE_URL is set in .env file
 # Provides reusable connection pool for all database operations
+# Every query run through the helpers is timed per name (see query_registry.py)
+# Pool wait (time to get a connection) is measured apart from the query itself,
+# and queries slower than DB_SLOW_QUERY_MS are logged with their SQL and params
+#
+# Optional read replica (DATABASE_URL_REPLICA[_PRO|_DEV]) for company-wide
+# analytics only: execute_read/execute_read_one. Reads scoped to one user or
+# conversation (dashboards, scores, messages) stay on execute_query, because
+# their writes can come from another process (the realtime gateway) and a
+# replica can't promise to have them yet. A replica read still goes to the
+# primary when
+#   - one of its params is an id this worker wrote in the last
+#     DB_REPLICA_STICKY_SECONDS. Ids come from the params (arrays included)
+#     and the RETURNING rows of every INSERT/UPDATE/DELETE run through the
+#     helpers. This is per process: best effort, not a guarantee.
+#   - the replica lags more than that window (checked every few seconds).
+#   - the replica is down: the read is retried on the primary.
 
 import asyncpg
 import os
+import re
+import time
+import asyncio
+from collections import deque
 from contextlib import asynccontextmanager
+from uuid import UUID
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from .query_registry import format_top_queries, query_name, timed_query
+
 load_dotenv(override=True)
 
-# Global connection pool
+# Prepared statement cache per connection. Off by default: transaction-mode
+# poolers (Supabase pooler, pgbouncer, managed proxies) can hand each statement
+# to a different server connection and fail with "prepared statement does not
+# exist". Set it (e.g. 100) only on direct connections or session-mode poolers;
+# it is still forced off on the usual pooler ports (6543, 6432) or with
+# DB_TRANSACTION_POOLER=1.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "0"))
+TRANSACTION_POOLER_PORTS = (6543, 6432)
+
+# Slow query log: threshold on the query time (pool wait excluded), how many
+# are kept for /health/db/pool, and how much of each parameter is shown.
+# Only parameter types are logged by default: auth/registration queries carry
+# emails and password hashes. DB_SLOW_QUERY_PARAMS=1 logs the values (debug).
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+DB_SLOW_QUERY_KEEP = int(os.getenv("DB_SLOW_QUERY_KEEP", "50"))
+DB_SLOW_QUERY_PARAMS = os.getenv("DB_SLOW_QUERY_PARAMS", "0") in ("1", "true", "True")
+DB_SLOW_QUERY_PARAM_CHARS = 80
+
+# Read replica routing
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+DB_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "5"))
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END AS lag_seconds
+"""
+WRITE_QUERY_PATTERN = re.compile(r"\b(INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+UUID_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+
+# Global connection pools
 _pool = None
+_replica_pool = None
+
+
+class PoolStats:
+    """Acquire waits and connections in use of one pool, since startup."""
+
+    def __init__(self):
+        self.pool = None
+        self.acquires = 0
+        self.acquire_errors = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.waiting = 0        # tasks waiting for a connection right now
+        self.max_waiting = 0
+        self.in_use = 0         # connections handed out by get_db_connection
+        self.max_in_use = 0
+
+    def to_dict(self) -> dict:
+        pool = self.pool
+        return {
+            "size": pool.get_size() if pool else 0,
+            "min_size": pool.get_min_size() if pool else None,
+            "max_size": pool.get_max_size() if pool else None,
+            "idle": pool.get_idle_size() if pool else 0,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "acquires": self.acquires,
+            "acquire_errors": self.acquire_errors,
+            "mean_wait_ms": round(self.wait_seconds * 1000 / self.acquires, 2) if self.acquires else None,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 1),
+        }
+
+
+def _flatten(values):
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            yield from _flatten(value)
+        elif isinstance(value, (asyncpg.Record, dict)):
+            yield from _flatten(value.values())
+        else:
+            yield value
+
+
+class ReplicaRouting:
+    """Recently written ids, measured replica lag and where reads went."""
+
+    def __init__(self):
+        self.recent_writes = {}     # id -> monotonic time of the last write
+        self.lag_seconds = None
+        self.lag_checked_at = 0.0
+        self._lag_task = None
+        self.replica_reads = 0
+        self.primary_sticky = 0     # read of a recently written id
+        self.primary_lag = 0        # replica too far behind
+        self.replica_errors = 0     # replica failed, read retried on primary
+
+    def mark_written(self, values):
+        """Remember every UUID among the values (lists/arrays and records are walked)."""
+        now = time.monotonic()
+        for value in _flatten(values):
+            if isinstance(value, UUID) or (isinstance(value, str) and UUID_PATTERN.match(value)):
+                self.recent_writes[str(value).lower()] = now
+        if len(self.recent_writes) > 10000:
+            self.forget_old(now)
+
+    def forget_old(self, now: float):
+        cutoff = now - DB_REPLICA_STICKY_SECONDS
+        self.recent_writes = {key: at for key, at in self.recent_writes.items() if at > cutoff}
+
+    def is_sticky(self, args: tuple) -> bool:
+        cutoff = time.monotonic() - DB_REPLICA_STICKY_SECONDS
+        for arg in args:
+            if isinstance(arg, (UUID, str)):
+                written_at = self.recent_writes.get(str(arg).lower())
+                if written_at is not None and written_at > cutoff:
+                    return True
+        return False
+
+    def to_dict(self) -> dict:
+        self.forget_old(time.monotonic())
+        return {
+            "sticky_seconds": DB_REPLICA_STICKY_SECONDS,
+            "lag_seconds": None if self.lag_seconds is None else round(self.lag_seconds, 2),
+            "recently_written_ids": len(self.recent_writes),
+            "replica_reads": self.replica_reads,
+            "primary_sticky": self.primary_sticky,
+            "primary_lag": self.primary_lag,
+            "replica_errors": self.replica_errors,
+        }
+
+
+pool_stats = PoolStats()
+replica_pool_stats = PoolStats()
+replica_routing = ReplicaRouting()
+slow_queries = deque(maxlen=DB_SLOW_QUERY_KEEP)
+slow_query_count = 0
+
+def uses_transaction_pooler(database_url: str) -> bool:
+    """DB_TRANSACTION_POOLER=1/0 forces it; otherwise guessed from the port."""
+    forced = os.getenv("DB_TRANSACTION_POOLER")
+    if forced is not None:
+        return forced not in ("0", "false", "False")
+    try:
+        return urlparse(database_url).port in TRANSACTION_POOLER_PORTS
+    except ValueError:
+        return True
+
+def _database_url(prefix: str, current_env: str):
+    if current_env == "PRO":
+        return os.getenv(f"{prefix}_PRO")
+    elif current_env == "DEV":
+        return os.getenv(f"{prefix}_DEV")
+    return os.getenv(prefix)
+
+async def _create_pool(database_url: str, label: str):
+    statement_cache_size = 0 if uses_transaction_pooler(database_url) else DB_STATEMENT_CACHE_SIZE
+    print(f"🗄️ Database pool ({label}): prepared statement cache "
+          f"{statement_cache_size or 'off'}")
+    return await asyncpg.create_pool(database_url, statement_cache_size=statement_cache_size)
 
 async def init_db():
-    """Initialize the database connection pool based on environment"""
-    global _pool
+    """Initialize the database connection pool (and the replica, if configured) based on environment"""
+    global _pool, _replica_pool
     
     current_env = os.getenv("ENVIRONMENT", "DEV").upper()
-    if current_env == "PRO":
-        database_url = os.getenv("DATABASE_URL_PRO")
-    elif current_env == "DEV":
-        database_url = os.getenv("DATABASE_URL_DEV")
-    else:
-        database_url = os.getenv("DATABASE_URL")
+    database_url = _database_url("DATABASE_URL", current_env)
 
     if not database_url:
         raise ValueError(f"No connection URL found for environment: {current_env}")
 
-    _pool = await asyncpg.create_pool(database_url, statement_cache_size=0)
+    _pool = pool_stats.pool = await _create_pool(database_url, current_env)
+
+    # The replica is optional: without it (or if it can't be reached) every
+    # read goes to the primary
+    replica_url = _database_url("DATABASE_URL_REPLICA", current_env)
+    if replica_url and _replica_pool is None:
+        try:
+            _replica_pool = replica_pool_stats.pool = await _create_pool(replica_url, f"{current_env} replica")
+        except Exception as e:
+            print(f"⚠️ Read replica unavailable, reads will use the primary: {e}")
     return _pool
 
 async def close_db():
-    """Close the database connection pool"""
-    global _pool
+    """Close the database connection pools"""
+    global _pool, _replica_pool
+    if _replica_pool:
+        await _replica_pool.close()
+        _replica_pool = replica_pool_stats.pool = None
     if _pool:
         await _pool.close()
+    report = format_top_queries()
+    if report:
+        print(f"🗄️ Top queries by total time:\n{report}")
+
+def get_pool_stats() -> dict:
+    """Pool counters plus the most recent slow queries (newest first)."""
+    stats = {
+        **pool_stats.to_dict(),
+        "slow_query_ms": DB_SLOW_QUERY_MS,
+        "slow_queries": slow_query_count,
+        "recent_slow_queries": list(reversed(slow_queries)),
+    }
+    if _replica_pool:
+        stats["replica"] = {**replica_pool_stats.to_dict(), **replica_routing.to_dict()}
+    return stats
+
+def normalize_sql(query: str) -> str:
+    """One-line SQL for logs."""
+    return re.sub(r"\s+", " ", query).strip()
+
+def _format_param(value) -> str:
+    if not DB_SLOW_QUERY_PARAMS:
+        return type(value).__name__
+    text = repr(value)
+    if len(text) > DB_SLOW_QUERY_PARAM_CHARS:
+        text = text[:DB_SLOW_QUERY_PARAM_CHARS] + f"...({len(text)} chars)"
+    return text
+
+def _log_slow_query(name: str, query: str, args: tuple, query_seconds: float, wait_seconds: float, replica: bool):
+    global slow_query_count
+    slow_query_count += 1
+    entry = {
+        "name": name,
+        "replica": replica,
+        "query_ms": round(query_seconds * 1000, 1),
+        "wait_ms": round(wait_seconds * 1000, 1),
+        "sql": normalize_sql(query),
+        "params": [_format_param(arg) for arg in args],
+        "at": time.time(),
+    }
+    slow_queries.append(entry)
+    print(f"🐢 Slow query {name}{' (replica)' if replica else ''}: "
+          f"{entry['query_ms']} ms (pool wait {entry['wait_ms']} ms)\n"
+          f"   {entry['sql']}\n   params: {entry['params']}")
 
 @asynccontextmanager
-async def get_db_connection():
-    """Get a database connection from the pool"""
+async def _acquire(replica: bool = False):
+    """Pool connection plus the seconds spent waiting for it (kept in pool_stats)"""
     global _pool
     if not _pool:
         await init_db()
-    
-    async with _pool.acquire() as connection:
+
+    pool, stats = (_replica_pool, replica_pool_stats) if replica else (_pool, pool_stats)
+    stats.waiting += 1
+    stats.max_waiting = max(stats.max_waiting, stats.waiting)
+    start = time.perf_counter()
+    try:
+        connection = await pool.acquire()
+    except BaseException:
+        stats.acquire_errors += 1
+        raise
+    finally:
+        stats.waiting -= 1
+    wait = time.perf_counter() - start
+    stats.acquires += 1
+    stats.wait_seconds += wait
+    stats.max_wait_seconds = max(stats.max_wait_seconds, wait)
+    stats.in_use += 1
+    stats.max_in_use = max(stats.max_in_use, stats.in_use)
+    try:
+        yield connection, wait
+    finally:
+        stats.in_use -= 1
+        await pool.release(connection)
+
+@asynccontextmanager
+async def get_db_connection():
+    """Get a database connection from the pool"""
+    async with _acquire() as (connection, _):
         yield connection
 
+async def _run(method: str, query: str, args: tuple, name: str, replica: bool = False):
+    """fetch/fetchrow timed under `name`; slow ones go to the slow query log"""
+    async with _acquire(replica) as (conn, wait):
+        with timed_query(name) as timing:
+            result = await getattr(conn, method)(query, *args)
+            timing.rows = len(result) if method == "fetch" else int(result is not None)
+        if timing.seconds * 1000 >= DB_SLOW_QUERY_MS:
+            _log_slow_query(name, query, args, timing.seconds, wait, replica)
+    if not replica and _replica_pool and WRITE_QUERY_PATTERN.search(query):
+        replica_routing.mark_written(args)
+        # ids generated by the write itself (INSERT ... RETURNING conversation_id)
+        if result:
+            replica_routing.mark_written(result if method == "fetch" else (result,))
+    return result
+
+async def _check_replica_lag():
+    try:
+        async with _acquire(replica=True) as (conn, _):
+            replica_routing.lag_seconds = float(await conn.fetchval(REPLICA_LAG_QUERY))
+    except Exception as e:
+        replica_routing.lag_seconds = None
+        print(f"⚠️ Replica lag check failed: {e}")
+    finally:
+        replica_routing.lag_checked_at = time.monotonic()
+        replica_routing._lag_task = None
+
+def _use_replica(args: tuple) -> bool:
+    """Whether a read with these params can go to the replica."""
+    routing = replica_routing
+    if not _replica_pool:
+        return False
+    if routing.is_sticky(args):
+        routing.primary_sticky += 1
+        return False
+    # Lag is refreshed in the background so no read waits for it; until the
+    # first measurement (or after a failed one) reads stay on the primary
+    if routing._lag_task is None and time.monotonic() - routing.lag_checked_at >= DB_REPLICA_LAG_CHECK_SECONDS:
+        routing._lag_task = asyncio.ensure_future(_check_replica_lag())
+    if routing.lag_seconds is None or routing.lag_seconds > DB_REPLICA_STICKY_SECONDS:
+        routing.primary_lag += 1
+        return False
+    return True
+
+async def _read(method: str, query: str, args: tuple, name: str):
+    if _use_replica(args):
+        try:
+            result = await _run(method, query, args, name, replica=True)
+            replica_routing.replica_reads += 1
+            return result
+        except (OSError, asyncpg.InterfaceError, asyncpg.PostgresConnectionError) as e:
+            replica_routing.replica_errors += 1
+            print(f"⚠️ Replica read {name} failed, retrying on primary: {e}")
+    return await _run(method, query, args, name)
+
 # Helper function for easy access
 async def execute_query(query: str, *args):
     """Execute a query and return results"""
-    async with get_db_connection() as conn:
-        return await conn.fetch(query, *args)
+    return await _run("fetch", query, args, query_name(query))
 
 async def execute_query_one(query: str, *args):
     """Execute a query and return single result"""
-    async with get_db_connection() as conn:
-        return await conn.fetchrow(query, *args)
+    return await _run("fetchrow", query, args, query_name(query))
+
+# Read-only helpers that may be served by the replica (see top of file)
+async def execute_read(query: str, *args):
+    """Execute a read-only query on the replica when possible and return results"""
+    return await _read("fetch", query, args, query_name(query))
+
+async def execute_read_one(query: str, *args):
+    """Execute a read-only query on the replica when possible and return single result"""
+    return await _read("fetchrow", query, args, query_name(query))
@@ -0,0 +1,125 @@
+# ElevenLabs Conversational AI connection helpers
+# Opens the upstream websocket for the realtime bridge and keeps a small
+# per-agent pool of already-connected sockets so a call can skip the TLS and
+# websocket handshake when the session was pre-warmed.
+
+import asyncio
+import os
+import time
+from typing import Dict, List, Tuple
+
+import websockets
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# CONFIGURACIÓN ELEVENLABS
+# Asegúrate de tener estas variables en tu .env
+ELEVENLABS_AGENT_ID = os.getenv("ELEVENLABS_AGENT_ID")
+ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+
+# URL de conexión al WebSocket de Conversational AI
+ELEVENLABS_WS_URL = "wss://api.elevenlabs.io/v1/convai/conversation?agent_id={agent_id}"
+
+# Pool de conexiones pre-calentadas
+ELEVENLABS_POOL_SIZE = int(os.getenv("ELEVENLABS_POOL_SIZE", "2"))
+# Seconds an unused pooled socket is kept before closing it (the upstream drops
+# idle connections). While a pre-warm has not been used by a session and is
+# still valid, expired sockets are replaced (one per outstanding pre-warm), so
+# the pool stays warm for as long as the pre-warmed setup does.
+ELEVENLABS_POOL_IDLE_SECONDS = float(os.getenv("ELEVENLABS_POOL_IDLE_SECONDS", "15"))
+
+
+async def connect_elevenlabs_ws(agent_id: str = ELEVENLABS_AGENT_ID):
+    """Open a new websocket to the ElevenLabs agent."""
+    extra_headers = {}
+    if ELEVENLABS_API_KEY:
+        extra_headers["xi-api-key"] = ELEVENLABS_API_KEY
+    return await websockets.connect(ELEVENLABS_WS_URL.format(agent_id=agent_id), extra_headers=extra_headers)
+
+
+class ElevenLabsConnectionPool:
+    """
+    Small per-agent pool of connected (but not yet initiated) upstream sockets.
+
+    fill() opens sockets in the background up to `size` per agent; checkout()
+    hands one out if there is a live one. Sockets not used within
+    `idle_seconds` are closed, since the upstream drops idle connections anyway.
+    fill(keep_warm_seconds=...) records a pre-warm: until a session checks out a
+    socket (or the pre-warm expires) closed sockets are replaced by fresh ones,
+    at most one per outstanding pre-warm.
+    """
+
+    def __init__(self, size: int = ELEVENLABS_POOL_SIZE, idle_seconds: float = ELEVENLABS_POOL_IDLE_SECONDS):
+        self.size = size
+        self.idle_seconds = idle_seconds
+        self._idle: Dict[str, List[Tuple[float, object]]] = {}
+        self._connecting: Dict[str, int] = {}
+        # Expiry (monotonic) of each pre-warm not yet used by a session, oldest first
+        self._prewarms: Dict[str, List[float]] = {}
+
+    def checkout(self, agent_id: str = ELEVENLABS_AGENT_ID):
+        """Return a connected socket for the agent, or None if there is no live one.
+
+        Called when a session starts, so it uses up one outstanding pre-warm."""
+        if self._pending_prewarms(agent_id):
+            self._prewarms[agent_id].pop(0)
+        sockets = self._idle.get(agent_id, [])
+        now = time.monotonic()
+        while sockets:
+            opened_at, ws = sockets.pop()
+            if ws.open and now - opened_at < self.idle_seconds:
+                return ws
+            asyncio.ensure_future(ws.close())
+        return None
+
+    def fill(self, agent_id: str = ELEVENLABS_AGENT_ID, keep_warm_seconds: float = 0.0):
+        """Start background connections until the agent has `size` sockets ready."""
+        if keep_warm_seconds:
+            self._pending_prewarms(agent_id)
+            self._prewarms.setdefault(agent_id, []).append(time.monotonic() + keep_warm_seconds)
+            self._prewarms[agent_id].sort()
+        self._top_up(agent_id, self.size)
+
+    def _pending_prewarms(self, agent_id: str) -> int:
+        """Pre-warms of the agent still waiting for their session (expired ones are dropped)."""
+        now = time.monotonic()
+        pending = [until for until in self._prewarms.get(agent_id, []) if until > now]
+        self._prewarms[agent_id] = pending
+        return len(pending)
+
+    def _top_up(self, agent_id: str, target: int):
+        missing = target - len(self._idle.get(agent_id, [])) - self._connecting.get(agent_id, 0)
+        for _ in range(max(0, missing)):
+            self._connecting[agent_id] = self._connecting.get(agent_id, 0) + 1
+            asyncio.ensure_future(self._connect(agent_id))
+
+    async def _connect(self, agent_id: str):
+        try:
+            ws = await connect_elevenlabs_ws(agent_id)
+        except Exception as e:
+            print(f"⚠️ Could not pre-connect to ElevenLabs agent {agent_id}: {e}")
+            return
+        finally:
+            self._connecting[agent_id] -= 1
+
+        entry = (time.monotonic(), ws)
+        self._idle.setdefault(agent_id, []).append(entry)
+        asyncio.get_running_loop().call_later(self.idle_seconds, self._expire, agent_id, entry)
+
+    def _expire(self, agent_id: str, entry):
+        sockets = self._idle.get(agent_id, [])
+        if entry in sockets:
+            sockets.remove(entry)
+            asyncio.ensure_future(entry[1].close())
+            # Pre-warmed sessions may still start: keep one socket for each
+            pending = self._pending_prewarms(agent_id)
+            if pending:
+                self._top_up(agent_id, min(self.size, pending))
+
+    def stats(self) -> dict:
+        return {agent_id: len(sockets) for agent_id, sockets in self._idle.items()}
+
+
+# One pool per worker process
+elevenlabs_pool = ElevenLabsConnectionPool()
@@ -0,0 +1,144 @@
+# Write-behind buffer for realtime conversation messages
+# The bridge queues user/agent transcripts here instead of awaiting one INSERT per
+# message in the audio forwarding loop. A background task writes them in batches.
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from .messages_service import send_messages_batch, transcript_entry
+
+# Maximum time a queued message waits before being written (seconds)
+MESSAGE_FLUSH_MAX_DELAY = 2.0
+# Flush immediately once this many messages are queued
+MESSAGE_FLUSH_MAX_BATCH = 20
+
+
+class MessageWriteBuffer:
+    """
+    Per-session write-behind buffer for conversaApp.messages.
+
+    Messages are timestamped when queued (not when inserted), so the stored order
+    matches what happened in the call. The buffer is flushed on turn boundaries,
+    every MESSAGE_FLUSH_MAX_DELAY seconds, and on close(). Awaiting close()
+    guarantees the whole transcript is persisted.
+
+    Messages can be queued before the conversation row exists: nothing is
+    written until set_conversation() provides its id.
+
+    A message can be queued with hold=True when some of its data is only known
+    later (e.g. the agent's audio duration); it and everything queued after it
+    stay in the buffer until release() is called.
+
+    Every message is also kept in memory, in order, so the post-call pipeline
+    can use transcript() instead of reading the conversation back from the DB.
+    """
+
+    def __init__(self, user_id: UUID, conversation_id: Optional[UUID] = None,
+                 max_delay: float = MESSAGE_FLUSH_MAX_DELAY,
+                 max_batch: int = MESSAGE_FLUSH_MAX_BATCH):
+        self.user_id = user_id
+        self.conversation_id = conversation_id
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+
+        self._pending: List[Dict] = []
+        self._history: List[Dict] = []
+        self.written = 0
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def add(self, content: str, role: str, duration: Optional[float] = None, hold: bool = False) -> Dict:
+        """Queue a message. Never blocks on the database."""
+        message = {
+            "user_id": self.user_id,
+            "role": role,
+            "content": content,
+            "created_at": datetime.now(timezone.utc),
+            "duration": duration,
+            "ready": not hold,
+        }
+        self._pending.append(message)
+        self._history.append(message)
+
+        if self._closed:
+            # Late message after close(): write it on its own
+            print(f"⚠️ Message queued after close for conversation {self.conversation_id}")
+            asyncio.ensure_future(self._flush())
+        elif self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+        return message
+
+    def set_conversation(self, conversation_id: UUID):
+        """Set the conversation the queued messages belong to and let them be written."""
+        self.conversation_id = conversation_id
+        self._wakeup.set()
+
+    def release(self, message: Dict, duration: Optional[float] = None):
+        """Complete a held message so it can be written."""
+        message["duration"] = duration
+        message["ready"] = True
+        self._wakeup.set()
+
+    def turn_boundary(self):
+        """Signal the end of a turn: queued messages are written as soon as possible."""
+        self._wakeup.set()
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush()
+
+    async def _flush(self):
+        async with self._lock:
+            if self.conversation_id is None:
+                return
+            # Only the leading ready messages: a held one keeps the rest in order
+            ready = 0
+            while ready < len(self._pending) and self._pending[ready]["ready"]:
+                ready += 1
+            if not ready:
+                return
+            batch = self._pending[:ready]
+            self._pending = self._pending[ready:]
+            for message in batch:
+                message["conversation_id"] = self.conversation_id
+            try:
+                await send_messages_batch(batch)
+                self.written += len(batch)
+            except Exception as e:
+                print(f"⚠️ Error writing {len(batch)} messages for conversation {self.conversation_id}: {e}")
+                # Keep them (in order) for the next flush
+                self._pending = batch + self._pending
+
+    async def close(self):
+        """Flush everything still queued and stop the background task."""
+        self._closed = True
+        for message in self._pending:
+            message["ready"] = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+        await self._flush()
+        if self._pending:
+            # Last attempt failed: one more try before giving up
+            await self._flush()
+        if self._pending:
+            print(f"❌ {len(self._pending)} messages could not be saved for conversation {self.conversation_id}")
+
+    def transcript(self) -> Optional[List[Dict]]:
+        """In-memory transcript (same shape as get_conversation_transcript), or None
+        if some message was not written."""
+        if self._pending or self.written != len(self._history):
+            return None
+        return [transcript_entry(m["role"], m["content"], m["duration"]) for m in self._history]
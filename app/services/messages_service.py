@@ -2,13 +2,22 @@
 # Manages user messages and generates simple assistant responses
 # Note: assistant messages have user_id = NULL (system messages)
 import asyncio
-import pandas as pd
-from .db import execute_query, execute_query_one
+from .db import execute_query, execute_query_one, execute_read
+from .query_registry import register_query
 from uuid import UUID
 from typing import List, Dict, Optional, Tuple
 
-async def get_conversation_transcript(conversation_id: UUID) -> List[Dict]:
-    query = """
+# Roles as the scoring/profiling prompts name the speakers
+TRANSCRIPT_SPEAKERS = {"user": "vendedor", "assistant": "cliente"}
+
+def transcript_entry(role: str, content: str, duration) -> Dict:
+    return {
+        "speaker": TRANSCRIPT_SPEAKERS.get(role, role),
+        "text": content,
+        "duracion": float(duration) if duration is not None else None
+    }
+
+GET_CONVERSATION_TRANSCRIPT_QUERY = register_query("messages_service.get_conversation_transcript", """
     SELECT 
         role,
         content,
@@ -17,104 +26,147 @@ async def get_conversation_transcript(conversation_id: UUID) -> List[Dict]:
     FROM conversaapp.messages 
     WHERE conversation_id = $1
     ORDER BY created_at ASC
-    """
+""")
+
+async def get_conversation_transcript(conversation_id: UUID) -> List[Dict]:
+    results = await execute_query(GET_CONVERSATION_TRANSCRIPT_QUERY, conversation_id)
 
-    results = await execute_query(query, conversation_id)
-    
-    role_map = {"user": "vendedor", "assistant": "cliente"}
-    
     conversation = [
-        {
-            "speaker": role_map.get(row["role"], row["role"]),
-            "text": row["content"],
-            "duracion": float(row["duration"]) if row["duration"] is not None else None
-        }
+        transcript_entry(row["role"], row["content"], row["duration"])
         for row in results
     ]
 
     return conversation
 
-async def get_conversation_messages(conversation_id: UUID) -> List[Dict]:
-    """Get all messages for a conversation, ordered by creation time"""
-    query = """
+COUNT_CONVERSATION_MESSAGES_QUERY = register_query("messages_service.count_conversation_messages", """
+    SELECT COUNT(*) AS n
+    FROM conversaapp.messages
+    WHERE conversation_id = $1
+""")
+
+async def count_conversation_messages(conversation_id: UUID) -> int:
+    result = await execute_query_one(COUNT_CONVERSATION_MESSAGES_QUERY, conversation_id)
+    return result["n"] if result else 0
+
+async def get_verified_transcript(conversation_id: UUID, transcript: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Transcript for the post-call pipeline. The in-memory transcript kept by the
+    realtime bridge is used when it matches the number of persisted messages;
+    otherwise (or when there is none, e.g. rescoring) it is read from the DB.
+    """
+    if transcript is not None:
+        persisted = await count_conversation_messages(conversation_id)
+        if persisted == len(transcript):
+            return transcript
+        print(f"⚠️ In-memory transcript has {len(transcript)} messages, DB has {persisted}: reading from DB")
+    return await get_conversation_transcript(conversation_id)
+
+GET_CONVERSATION_MESSAGES_QUERY = register_query("messages_service.get_conversation_messages", """
     SELECT id, user_id, conversation_id, role, content, created_at, duration
     FROM conversaApp.messages
     WHERE conversation_id = $1
     ORDER BY created_at ASC
-    """
+""")
+
+async def get_conversation_messages(conversation_id: UUID) -> List[Dict]:
+    """Get all messages for a conversation, ordered by creation time"""
     
-    results = await execute_query(query, conversation_id)
+    results = await execute_query(GET_CONVERSATION_MESSAGES_QUERY, conversation_id)
     return [dict(row) for row in results]
 
+SEND_MESSAGE_QUERY = register_query("messages_service.send_message", """
+    INSERT INTO conversaApp.messages (id, user_id, conversation_id, role, content, created_at, duration)
+    VALUES (gen_random_uuid(), $1, $2, $4, $3, now(), $5)
+    RETURNING id, user_id, conversation_id, role, content, created_at, duration
+""")
+
 async def send_message(user_id: UUID, conversation_id: UUID, message: str, role: str, duration: float) -> Tuple[Optional[Dict], Optional[Dict]]:
     """
     Send user message and generate assistant response
     Returns tuple of (user_message, assistant_response)
     """
     # Insert user message
-    user_query = """
-    INSERT INTO conversaApp.messages (id, user_id, conversation_id, role, content, created_at, duration)
-    VALUES (gen_random_uuid(), $1, $2, $4, $3, now(), $5)
-    RETURNING id, user_id, conversation_id, role, content, created_at, duration
-    """
-    
-    user_message = await execute_query_one(user_query, user_id, conversation_id, message, role, duration)
+    user_message = await execute_query_one(SEND_MESSAGE_QUERY, user_id, conversation_id, message, role, duration)
     
     if not user_message:
         return None, None
     
     return dict(user_message) if user_message else None
 
+SEND_MESSAGES_BATCH_QUERY = register_query("messages_service.send_messages_batch", """
+    INSERT INTO conversaApp.messages (id, user_id, conversation_id, role, content, created_at, duration)
+    SELECT gen_random_uuid(), m.user_id, m.conversation_id, m.role, m.content, m.created_at, m.duration
+    FROM unnest($1::uuid[], $2::uuid[], $3::text[], $4::text[], $5::timestamptz[], $6::float8[])
+        AS m(user_id, conversation_id, role, content, created_at, duration)
+""")
+
+async def send_messages_batch(messages: List[Dict]) -> None:
+    """
+    Insert several messages in a single round-trip.
+    Each message dict carries user_id, conversation_id, role, content, created_at and duration;
+    created_at is set by the caller so the order of the conversation is preserved.
+    """
+
+    await execute_query(
+        SEND_MESSAGES_BATCH_QUERY,
+        [m["user_id"] for m in messages],
+        [m["conversation_id"] for m in messages],
+        [m["role"] for m in messages],
+        [m["content"] for m in messages],
+        [m["created_at"] for m in messages],
+        [m["duration"] for m in messages],
+    )
+
+GET_ALL_USER_SCORING_BY_COMPANY_QUERY = register_query("messages_service.get_all_user_scoring_by_company", """
+                WITH UserScores AS (
+        SELECT
+            ui.user_id,
+            ui.name,
+            ui.last_name,
+            ui.avatar,
+            -- Fórmula maestra de Puntuación
+            COALESCE(ROUND(AVG(sbc.general_score))::int, 0) AS puntaje
+        FROM conversaconfig.user_info ui
+        JOIN conversaapp.conversations c ON ui.user_id = c.user_id
+        JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
+        WHERE ui.company_id = $1 and sbc.general_score > 0 and c.status = 'FINISHED'
+        GROUP BY ui.user_id, ui.name, ui.avatar
+    ),
+    UserCompletedCourses AS (
+        SELECT 
+            uja.user_id,
+            -- Fórmula maestra de Cursos
+            COUNT(ucp.course_progress_id) AS total_courses
+        FROM conversaconfig.user_info ui
+        JOIN conversaconfig.user_journeys_assigments uja ON ui.user_id = uja.user_id
+        JOIN conversaconfig.user_course_progress ucp ON uja.user_journey_id = ucp.user_journey_id
+        JOIN conversaconfig.master_courses mc ON ucp.course_id = mc.course_id
+        WHERE ui.company_id = $1
+        AND ucp.completed_modules >= mc.course_steps 
+        AND mc.course_steps > 0
+        GROUP BY uja.user_id
+    )
+    SELECT
+        RANK() OVER (ORDER BY us.puntaje desc, ucc.total_courses desc, us."name" asc) as rank,
+        us.user_id,
+        us.name as Usuario,
+        us.last_name,
+        us.avatar,
+        us.puntaje as Puntuacion,
+        COALESCE(ucc.total_courses, 0) AS Cursos
+    FROM UserScores us
+    LEFT JOIN UserCompletedCourses ucc ON us.user_id = ucc.user_id
+    ORDER BY rank asc
+    LIMIT 5;
+""")
+
 async def get_all_user_scoring_by_company(company_id: str) -> List[Dict]:
     """
     Recupera el Top 5 de usuarios de una empresa ordenados por Puntuación, 
     desempatando por Cursos completados y nombre.
     """
     try:
-        query = """
-                    WITH UserScores AS (
-            SELECT
-                ui.user_id,
-                ui.name,
-                ui.last_name,
-                ui.avatar,
-                -- Fórmula maestra de Puntuación
-                COALESCE(ROUND(AVG(sbc.general_score))::int, 0) AS puntaje
-            FROM conversaconfig.user_info ui
-            JOIN conversaapp.conversations c ON ui.user_id = c.user_id
-            JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
-            WHERE ui.company_id = $1 and sbc.general_score > 0 and c.status = 'FINISHED'
-            GROUP BY ui.user_id, ui.name, ui.avatar
-        ),
-        UserCompletedCourses AS (
-            SELECT 
-                uja.user_id,
-                -- Fórmula maestra de Cursos
-                COUNT(ucp.course_progress_id) AS total_courses
-            FROM conversaconfig.user_info ui
-            JOIN conversaconfig.user_journeys_assigments uja ON ui.user_id = uja.user_id
-            JOIN conversaconfig.user_course_progress ucp ON uja.user_journey_id = ucp.user_journey_id
-            JOIN conversaconfig.master_courses mc ON ucp.course_id = mc.course_id
-            WHERE ui.company_id = $1
-            AND ucp.completed_modules >= mc.course_steps 
-            AND mc.course_steps > 0
-            GROUP BY uja.user_id
-        )
-        SELECT
-            RANK() OVER (ORDER BY us.puntaje desc, ucc.total_courses desc, us."name" asc) as rank,
-            us.user_id,
-            us.name as Usuario,
-            us.last_name,
-            us.avatar,
-            us.puntaje as Puntuacion,
-            COALESCE(ucc.total_courses, 0) AS Cursos
-        FROM UserScores us
-        LEFT JOIN UserCompletedCourses ucc ON us.user_id = ucc.user_id
-        ORDER BY rank asc
-        LIMIT 5;
-        """
-
-        results = await execute_query(query, company_id)
+        results = await execute_read(GET_ALL_USER_SCORING_BY_COMPANY_QUERY, company_id)
         
         if not results:
             return []
@@ -137,121 +189,157 @@ async def get_all_user_scoring_by_company(company_id: str) -> List[Dict]:
         print(f"Error getting leaderboard for company {company_id}: {str(e)}")
         return None
     
+GET_ALL_USER_CONVERSATION_SCORING_BY_COMPANY_QUERY = register_query("messages_service.get_all_user_conversation_scoring_by_company", """
+    SELECT DISTINCT ON (ui.user_id)
+        ui.user_id,
+        ui.name,
+        ui.last_name,
+        ui.company_id,
+        ui.user_type,
+        ui.avatar,
+        ROUND(AVG(sbc.general_score),2) AS general_score,
+        ROUND(AVG(sbc.fillerwords_scoring),2) AS fillerwords_scoring,
+        ROUND(AVG(sbc.clarity_scoring),2)      AS clarity_scoring,
+        ROUND(AVG(sbc.participation_scoring),2)      AS participation_scoring,
+        ROUND(AVG(sbc.keythemes_scoring),2)      AS keythemes_scoring,
+        ROUND(AVG(sbc.indexofquestions_scoring),2)      AS indexofquestions_scoring,
+        ROUND(AVG(sbc.rhythm_scoring),2)       AS rhythm_scoring
+    FROM conversaconfig.user_info ui
+    LEFT JOIN conversaapp.conversations c
+        ON c.user_id = ui.user_id
+    LEFT JOIN conversaapp.scoring_by_conversation sbc 
+        ON c.conversation_id = sbc.conversation_id
+        AND c.status = 'FINISHED'
+        AND sbc.general_score > 0
+    WHERE ui.company_id = $1
+        AND ui.is_active = true
+    GROUP BY ui.user_id;
+""")
+
 async def get_all_user_conversation_scoring_by_company(company_id: str) -> List[Dict]:
     """Get all user conversation scores for a company, ordered by puntuation"""
     try:
-        query = """
-            SELECT DISTINCT ON (ui.user_id)
-                ui.user_id,
-                ui.name,
-                ui.last_name,
-                ui.company_id,
-                ui.user_type,
-                ui.avatar,
-                ROUND(AVG(sbc.general_score),2) AS general_score,
-                ROUND(AVG(sbc.fillerwords_scoring),2) AS fillerwords_scoring,
-                ROUND(AVG(sbc.clarity_scoring),2)      AS clarity_scoring,
-                ROUND(AVG(sbc.participation_scoring),2)      AS participation_scoring,
-                ROUND(AVG(sbc.keythemes_scoring),2)      AS keythemes_scoring,
-                ROUND(AVG(sbc.indexofquestions_scoring),2)      AS indexofquestions_scoring,
-                ROUND(AVG(sbc.rhythm_scoring),2)       AS rhythm_scoring
-            FROM conversaconfig.user_info ui
-            LEFT JOIN conversaapp.conversations c
-                ON c.user_id = ui.user_id
-            LEFT JOIN conversaapp.scoring_by_conversation sbc 
-                ON c.conversation_id = sbc.conversation_id
-                AND c.status = 'FINISHED'
-                AND sbc.general_score > 0
-            WHERE ui.company_id = $1
-                AND ui.is_active = true
-            GROUP BY ui.user_id;
-        """
-
-        results = await execute_query(query, company_id)
+        results = await execute_read(GET_ALL_USER_CONVERSATION_SCORING_BY_COMPANY_QUERY, company_id)
         return [dict(row) for row in results]
     except Exception as e:
         print(f"Error fetching user scores for company_id {company_id}: {str(e)}")
         return []
     
+GET_ALL_USER_CONVERSATION_SCORING_BY_STAGE_COMPANY_QUERY = register_query("messages_service.get_all_user_conversation_scoring_by_stage_company", """
+    SELECT DISTINCT ON (ui.user_id)
+        ui.user_id,
+        ui.name,
+        ui.company_id,
+        ui.user_type,
+        ui.avatar,
+        c.stage_id,
+        c.status,
+        sbc.general_score,
+        sbc.fillerwords_scoring,
+        sbc.clarity_scoring,
+        sbc.participation_scoring,
+        sbc.keythemes_scoring,
+        sbc.indexofquestions_scoring,
+        sbc.rhythm_scoring,
+        sbc.fillerwords_feedback,
+        sbc.clarity_feedback,
+        sbc.participation_feedback,
+        sbc.keythemes_feedback,
+        sbc.indexofquestions_feedback,
+        sbc.rhythm_feedback
+    FROM conversaconfig.user_info ui
+    LEFT JOIN conversaapp.conversations c
+        ON c.user_id = ui.user_id
+    LEFT JOIN conversaapp.scoring_by_conversation sbc 
+        ON c.conversation_id = sbc.conversation_id
+    AND c.status = 'FINISHED'
+    AND c.stage_id = $1
+    WHERE ui.company_id = $2
+    AND ui.is_active = true
+    ORDER BY ui.user_id, sbc.general_score DESC NULLS LAST;
+""")
+
 async def get_all_user_conversation_scoring_by_stage_company(stage_id: str, company_id: str) -> List[Dict]:
     """Get all user conversation scores for a stage and company, ordered by puntuation"""
     try:
-        query = """
-            SELECT DISTINCT ON (ui.user_id)
-                ui.user_id,
-                ui.name,
-                ui.company_id,
-                ui.user_type,
-                ui.avatar,
-                c.stage_id,
-                c.status,
-                sbc.general_score,
-                sbc.fillerwords_scoring,
-                sbc.clarity_scoring,
-                sbc.participation_scoring,
-                sbc.keythemes_scoring,
-                sbc.indexofquestions_scoring,
-                sbc.rhythm_scoring,
-                sbc.fillerwords_feedback,
-                sbc.clarity_feedback,
-                sbc.participation_feedback,
-                sbc.keythemes_feedback,
-                sbc.indexofquestions_feedback,
-                sbc.rhythm_feedback
-            FROM conversaconfig.user_info ui
-            LEFT JOIN conversaapp.conversations c
-                ON c.user_id = ui.user_id
-            LEFT JOIN conversaapp.scoring_by_conversation sbc 
-                ON c.conversation_id = sbc.conversation_id
-            AND c.status = 'FINISHED'
-            AND c.stage_id = $1
-            WHERE ui.company_id = $2
-            AND ui.is_active = true
-            ORDER BY ui.user_id, sbc.general_score DESC NULLS LAST;
-        """
-
-        results = await execute_query(query, stage_id, company_id)
+        results = await execute_read(GET_ALL_USER_CONVERSATION_SCORING_BY_STAGE_COMPANY_QUERY, stage_id, company_id)
         return [dict(row) for row in results]
     except Exception as e:
         print(f"Error fetching user scores for stage_id {stage_id} and company_id {company_id}: {str(e)}")
         return []
 
+GET_ALL_USER_CONVERSATION_AVERAGE_SCORING_BY_STAGE_COMPANY_QUERY = register_query("messages_service.get_all_user_conversation_average_scoring_by_stage_company", """
+    SELECT DISTINCT ON (ui.user_id)
+        ui.user_id,
+        ui.name,
+        ui.company_id,
+        ui.user_type,
+        ui.avatar,
+        c.stage_id,
+        c.status,
+        c.general_score,
+        c.fillerwords_scoring,
+        c.clarity_scoring,
+        c.participation_scoring,
+        c.keythemes_scoring,
+        c.indexofquestions_scoring,
+        c.rhythm_scoring
+    FROM conversaconfig.user_info ui
+    LEFT JOIN conversaapp.conversations c
+        ON c.user_id = ui.user_id
+    AND c.status = 'FINISHED'
+    AND c.stage_id = $1
+    WHERE ui.company_id = $2
+    AND ui.is_active = true
+    AND c.status = 'FINISHED'
+    ORDER BY ui.user_id, c.general_score DESC NULLS LAST;
+""")
+
 async def get_all_user_conversation_average_scoring_by_stage_company(stage_id: str, company_id: str) -> List[Dict]:
     """Get all user conversation average scores for a stage and company, ordered by average score"""
     try:
-        query = """
-            SELECT DISTINCT ON (ui.user_id)
-                ui.user_id,
-                ui.name,
-                ui.company_id,
-                ui.user_type,
-                ui.avatar,
-                c.stage_id,
-                c.status,
-                c.general_score,
-                c.fillerwords_scoring,
-                c.clarity_scoring,
-                c.participation_scoring,
-                c.keythemes_scoring,
-                c.indexofquestions_scoring,
-                c.rhythm_scoring
-            FROM conversaconfig.user_info ui
-            LEFT JOIN conversaapp.conversations c
-                ON c.user_id = ui.user_id
-            AND c.status = 'FINISHED'
-            AND c.stage_id = $1
-            WHERE ui.company_id = $2
-            AND ui.is_active = true
-            AND c.status = 'FINISHED'
-            ORDER BY ui.user_id, c.general_score DESC NULLS LAST;
-        """
-
-        results = await execute_query(query, stage_id, company_id)
+        results = await execute_read(GET_ALL_USER_CONVERSATION_AVERAGE_SCORING_BY_STAGE_COMPANY_QUERY, stage_id, company_id)
         return [dict(row) for row in results]
     except Exception as e:
         print(f"Error fetching user scores for stage_id {stage_id} and company_id {company_id}: {str(e)}")
         return []
 
+GET_USER_CUMULATIVE_AVERAGE_SCORE_QUERY = register_query("messages_service.get_user_cumulative_average_score", """
+     WITH all_scores AS (
+         SELECT
+             c.end_timestamp::date AS day,
+             sbc.general_score
+         FROM conversaapp.conversations c
+         JOIN conversaapp.scoring_by_conversation sbc
+             ON c.conversation_id = sbc.conversation_id
+         WHERE c.user_id = $1::uuid
+           AND c.status = 'FINISHED'
+           AND c.end_timestamp IS NOT NULL
+     ),
+     daily AS (
+         SELECT
+             day,
+             SUM(general_score) AS sum_score,
+             COUNT(*) AS cnt
+         FROM all_scores
+         GROUP BY day
+     ),
+     cumulative AS (
+         SELECT
+             day,
+             SUM(sum_score) OVER (ORDER BY day)
+                 / NULLIF(SUM(cnt) OVER (ORDER BY day), 0) AS avg_score
+         FROM daily
+     )
+     SELECT
+         day,
+         COALESCE(ROUND(avg_score, 2), 0) AS average_score
+     FROM cumulative
+    /* WHERE day >= CURRENT_DATE - ($2::int * INTERVAL '1 day')*/
+     ORDER BY day ASC
+     LIMIT $2;
+""")
+
 async def get_user_cumulative_average_score(user_id: str, days_back: int = 7) -> List[Dict]:
     """
     Get cumulative average general_score for a user
@@ -262,41 +350,6 @@ async def get_user_cumulative_average_score(user_id: str, days_back: int = 7) ->
     :return: List of {day, average_score}
     """
     try:
-        query = """
-            WITH all_scores AS (
-                SELECT
-                    c.end_timestamp::date AS day,
-                    sbc.general_score
-                FROM conversaapp.conversations c
-                JOIN conversaapp.scoring_by_conversation sbc
-                    ON c.conversation_id = sbc.conversation_id
-                WHERE c.user_id = $1::uuid
-                  AND c.status = 'FINISHED'
-                  AND c.end_timestamp IS NOT NULL
-            ),
-            daily AS (
-                SELECT
-                    day,
-                    SUM(general_score) AS sum_score,
-                    COUNT(*) AS cnt
-                FROM all_scores
-                GROUP BY day
-            ),
-            cumulative AS (
-                SELECT
-                    day,
-                    SUM(sum_score) OVER (ORDER BY day)
-                        / NULLIF(SUM(cnt) OVER (ORDER BY day), 0) AS avg_score
-                FROM daily
-            )
-            SELECT
-                day,
-                COALESCE(ROUND(avg_score, 2), 0) AS average_score
-            FROM cumulative
-           /* WHERE day >= CURRENT_DATE - ($2::int * INTERVAL '1 day')*/
-            ORDER BY day ASC
-            LIMIT $2;
-        """
         # query = """
         #     WITH all_scores AS (
         #         SELECT
@@ -354,7 +407,7 @@ async def get_user_cumulative_average_score(user_id: str, days_back: int = 7) ->
         #     GROUP BY day
         #     ORDER BY day DESC;
         # """
-        results = await execute_query(query, user_id, days_back)
+        results = await execute_query(GET_USER_CUMULATIVE_AVERAGE_SCORE_QUERY, user_id, days_back)
         return [dict(row) for row in results]
 
     except Exception as e:
@@ -362,84 +415,84 @@ async def get_user_cumulative_average_score(user_id: str, days_back: int = 7) ->
         return []
     
 
+GET_ALL_USER_PROFILING_BY_COMPANY_QUERY = register_query("messages_service.get_all_user_profiling_by_company", """
+    SELECT
+        ui."name",
+        ui.last_name,
+        ui.user_id,
+        ui.avatar,
+        ui.user_type,
+        up.empathy_score          AS empathy_scoring,
+        up.negotiation_score      AS negotiation_scoring,
+        up.prospection_score      AS prospection_scoring,
+        up.resilience_score       AS resilience_scoring,
+        up.technical_domain_score AS technical_domain_scoring
+    FROM conversaConfig.user_info ui
+    LEFT JOIN conversascoring.user_profile up
+        ON ui.user_id = up.user_id
+    WHERE ui.company_id = $1
+""")
+
 async def get_all_user_profiling_by_company(company_id: str) -> List[Dict]:
     """Get all user profiling scores for a company"""
     try:
-        query = """
-            SELECT
-                ui."name",
-                ui.last_name,
-                ui.user_id,
-                ui.avatar,
-                ui.user_type,
-                up.empathy_score          AS empathy_scoring,
-                up.negotiation_score      AS negotiation_scoring,
-                up.prospection_score      AS prospection_scoring,
-                up.resilience_score       AS resilience_scoring,
-                up.technical_domain_score AS technical_domain_scoring
-            FROM conversaConfig.user_info ui
-            LEFT JOIN conversascoring.user_profile up
-                ON ui.user_id = up.user_id
-            WHERE ui.company_id = $1
-        """
-
-        results = await execute_query(query, company_id)
+        results = await execute_read(GET_ALL_USER_PROFILING_BY_COMPANY_QUERY, company_id)
         return [dict(row) for row in results]
     except Exception as e:
         print(f"Error fetching user profiling scores for company_id {company_id}: {str(e)}")
         return []
     
+GET_USER_PROFILING_QUERY = register_query("messages_service.get_user_profiling", """
+    SELECT
+        ui."name",
+        ui.user_id,
+        ui.last_name,
+        ui.avatar,
+        up.general_score,
+        up.profile_type,
+        up.empathy_score          AS empathy_scoring,
+        up.negotiation_score      AS negotiation_scoring,
+        up.prospection_score      AS prospection_scoring,
+        up.resilience_score       AS resilience_scoring,
+        up.technical_domain_score AS technical_domain_scoring,
+        up.empathy_feedback,
+        up.negotiation_feedback,
+        up.prospection_feedback,
+        up.resilience_feedback,
+        up.technical_domain_feedback
+    FROM conversaconfig.user_info ui
+    LEFT JOIN conversascoring.user_profile up
+        ON ui.user_id = up.user_id
+    WHERE ui.user_id = $1
+""")
+
 async def get_user_profiling(user_id: str) -> Dict:
     """Get all user profiling scores for a company"""
     try:
-        query = """
-            SELECT
-                ui."name",
-                ui.user_id,
-                ui.last_name,
-                ui.avatar,
-                up.general_score,
-                up.profile_type,
-                up.empathy_score          AS empathy_scoring,
-                up.negotiation_score      AS negotiation_scoring,
-                up.prospection_score      AS prospection_scoring,
-                up.resilience_score       AS resilience_scoring,
-                up.technical_domain_score AS technical_domain_scoring,
-                up.empathy_feedback,
-                up.negotiation_feedback,
-                up.prospection_feedback,
-                up.resilience_feedback,
-                up.technical_domain_feedback
-            FROM conversaconfig.user_info ui
-            LEFT JOIN conversascoring.user_profile up
-                ON ui.user_id = up.user_id
-            WHERE ui.user_id = $1
-        """
-
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_USER_PROFILING_QUERY, user_id)
         return dict(results[0] if len(results) > 0 else {} )
     except Exception as e:
         print(f"Error fetching user profiling scores for user id {user_id}: {str(e)}")
         return []
 
 
+GET_USER_PROFILING_FEEDBACKS_QUERY = register_query("messages_service.get_user_profiling_feedbacks", """
+    SELECT
+        up.empathy_feedback,
+        up.negotiation_feedback,
+        up.prospection_feedback,
+        up.resilience_feedback,
+        up.technical_domain_feedback
+    FROM conversaconfig.user_info ui
+    LEFT JOIN conversascoring.user_profile up
+        ON ui.user_id = up.user_id
+    WHERE ui.user_id = $1
+""")
+
 async def get_user_profiling_feedbacks(user_id: str) -> Dict | None:
     """Get all profiling feedbacks for a given user"""
     try:
-        query = """
-            SELECT
-                up.empathy_feedback,
-                up.negotiation_feedback,
-                up.prospection_feedback,
-                up.resilience_feedback,
-                up.technical_domain_feedback
-            FROM conversaconfig.user_info ui
-            LEFT JOIN conversascoring.user_profile up
-                ON ui.user_id = up.user_id
-            WHERE ui.user_id = $1
-        """
-
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_USER_PROFILING_FEEDBACKS_QUERY, user_id)
         print(results)
         return dict(results) if len(results) > 0 else None
     except Exception as e:
@@ -450,93 +503,93 @@ async def get_user_profiling_feedbacks(user_id: str) -> Dict | None:
 import json
 from typing import List, Dict, Any
 
+GET_COMPANY_DASHBOARD_STATS_QUERY = register_query("messages_service.get_company_dashboard_stats", """
+                   WITH company_users AS (
+        SELECT user_id, name, user_type, avatar
+        FROM conversaconfig.user_info
+        WHERE company_id = $1
+    ),
+    company_stats AS (
+        -- Mantenemos esto para calcular el % de crecimiento mensual del equipo
+        SELECT 
+            AVG(CASE 
+                WHEN c.created_at >= date_trunc('month', CURRENT_DATE) 
+                THEN sbc.general_score END) as current_month_avg,
+
+            AVG(CASE 
+                WHEN c.created_at >= date_trunc('month', CURRENT_DATE - INTERVAL '1 month') 
+                AND c.created_at < date_trunc('month', CURRENT_DATE)
+                THEN sbc.general_score END) as prev_month_avg
+
+        FROM conversaapp.conversations c
+        JOIN company_users u ON c.user_id = u.user_id
+        JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
+        WHERE c.status = 'FINISHED'
+    ),
+    user_historical_stats AS (
+        -- Paso 1 para el KPI 1 y KPI 3: Sacamos el promedio individual de cada usuario
+        SELECT 
+            c.user_id,
+            AVG(sbc.general_score) as avg_score
+        FROM conversaapp.conversations c
+        JOIN company_users u ON c.user_id = u.user_id
+        JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
+        WHERE c.status = 'FINISHED' and sbc.general_score > 0
+        GROUP BY c.user_id
+    ),
+    current_month_stats AS (
+        -- KPI 2: Promedios de usuarios SOLO en el mes actual para el Top Performer
+        SELECT 
+            c.user_id,
+            AVG(sbc.general_score) as monthly_avg_score
+        FROM conversaapp.conversations c
+        JOIN company_users u ON c.user_id = u.user_id
+        JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
+        WHERE c.created_at >= date_trunc('month', CURRENT_DATE) 
+          AND c.status = 'FINISHED' and sbc.general_score > 0
+        GROUP BY c.user_id
+    )
+    SELECT 
+        -- KPI 1 CORREGIDO: Promedio de los promedios de todos los usuarios
+        COALESCE(ROUND((SELECT AVG(avg_score) FROM user_historical_stats), 1), 0) as team_average,
+
+        -- Porcentaje: Crecimiento respecto al mes anterior
+        CASE 
+            WHEN cs.prev_month_avg IS NULL OR cs.prev_month_avg = 0 THEN 0 
+            ELSE ROUND(((cs.current_month_avg - cs.prev_month_avg) / cs.prev_month_avg) * 100, 1)
+        END as team_average_growth_pct,
+
+        -- KPI 3: Usuarios que requieren atención (score histórico < 50)
+        (
+            SELECT COUNT(*)
+            FROM user_historical_stats
+            WHERE avg_score < 50 and avg_score > 0
+        ) as users_requiring_attention,
+
+        -- KPI 2: Top Performer del mes actual
+        (
+            SELECT json_build_object(
+                'name', u.name,
+                'role', u.user_type,
+                'photo', u.avatar,
+                'score', ROUND(cms.monthly_avg_score, 1)
+            )
+            FROM current_month_stats cms
+            JOIN company_users u ON cms.user_id = u.user_id
+            ORDER BY cms.monthly_avg_score DESC
+            LIMIT 1
+        ) as top_performer_data
+
+    FROM company_stats cs;
+""")
+
 async def get_company_dashboard_stats(company_id: str) -> List[Dict[str, Any]]:
     """
     Retrieves consolidated KPIs for the company dashboard.
     Handles JSON parsing for top_performer_data manually in Python.
     """
     try:
-        query = """
-               WITH company_users AS (
-    SELECT user_id, name, user_type, avatar
-    FROM conversaconfig.user_info
-    WHERE company_id = $1
-),
-company_stats AS (
-    -- Mantenemos esto para calcular el % de crecimiento mensual del equipo
-    SELECT 
-        AVG(CASE 
-            WHEN c.created_at >= date_trunc('month', CURRENT_DATE) 
-            THEN sbc.general_score END) as current_month_avg,
-            
-        AVG(CASE 
-            WHEN c.created_at >= date_trunc('month', CURRENT_DATE - INTERVAL '1 month') 
-            AND c.created_at < date_trunc('month', CURRENT_DATE)
-            THEN sbc.general_score END) as prev_month_avg
-            
-    FROM conversaapp.conversations c
-    JOIN company_users u ON c.user_id = u.user_id
-    JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
-    WHERE c.status = 'FINISHED'
-),
-user_historical_stats AS (
-    -- Paso 1 para el KPI 1 y KPI 3: Sacamos el promedio individual de cada usuario
-    SELECT 
-        c.user_id,
-        AVG(sbc.general_score) as avg_score
-    FROM conversaapp.conversations c
-    JOIN company_users u ON c.user_id = u.user_id
-    JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
-    WHERE c.status = 'FINISHED' and sbc.general_score > 0
-    GROUP BY c.user_id
-),
-current_month_stats AS (
-    -- KPI 2: Promedios de usuarios SOLO en el mes actual para el Top Performer
-    SELECT 
-        c.user_id,
-        AVG(sbc.general_score) as monthly_avg_score
-    FROM conversaapp.conversations c
-    JOIN company_users u ON c.user_id = u.user_id
-    JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
-    WHERE c.created_at >= date_trunc('month', CURRENT_DATE) 
-      AND c.status = 'FINISHED' and sbc.general_score > 0
-    GROUP BY c.user_id
-)
-SELECT 
-    -- KPI 1 CORREGIDO: Promedio de los promedios de todos los usuarios
-    COALESCE(ROUND((SELECT AVG(avg_score) FROM user_historical_stats), 1), 0) as team_average,
-    
-    -- Porcentaje: Crecimiento respecto al mes anterior
-    CASE 
-        WHEN cs.prev_month_avg IS NULL OR cs.prev_month_avg = 0 THEN 0 
-        ELSE ROUND(((cs.current_month_avg - cs.prev_month_avg) / cs.prev_month_avg) * 100, 1)
-    END as team_average_growth_pct,
-    
-    -- KPI 3: Usuarios que requieren atención (score histórico < 50)
-    (
-        SELECT COUNT(*)
-        FROM user_historical_stats
-        WHERE avg_score < 50 and avg_score > 0
-    ) as users_requiring_attention,
-    
-    -- KPI 2: Top Performer del mes actual
-    (
-        SELECT json_build_object(
-            'name', u.name,
-            'role', u.user_type,
-            'photo', u.avatar,
-            'score', ROUND(cms.monthly_avg_score, 1)
-        )
-        FROM current_month_stats cms
-        JOIN company_users u ON cms.user_id = u.user_id
-        ORDER BY cms.monthly_avg_score DESC
-        LIMIT 1
-    ) as top_performer_data
-    
-FROM company_stats cs;
-        """
-
-        results = await execute_query(query, company_id)
+        results = await execute_read(GET_COMPANY_DASHBOARD_STATS_QUERY, company_id)
         if not results:
             return {
                 "team_average": 0.0,
@@ -567,6 +620,34 @@ FROM company_stats cs;
         return []
 
 
+GET_USER_JOURNEY_QUERY = register_query("messages_service.get_user_journey", """
+    SELECT 
+        uaj.journey_id,
+        jc.course_id,
+        jc.is_mandatory,
+        jc.display_order AS course_order,
+        mc.name AS course_name,
+        mc.has_modules,
+        mc.module_template,
+        mc.course_steps AS total_modules,  
+        COALESCE(ucp.completed_modules, 0) AS completed_modules,
+        COALESCE(ucp.status, 'locked') AS course_status,   
+        uaj.status AS journey_status,
+        cs.stage_id,
+        cs.stage_name,
+        cs.stage_order
+    FROM conversaconfig.user_journeys_assigments uaj
+    JOIN conversaconfig.journey_courses jc ON uaj.journey_id = jc.journey_id
+    JOIN conversaconfig.master_journeys mj ON uaj.journey_id = mj.journey_id
+    JOIN conversaconfig.master_courses mc ON jc.course_id = mc.course_id
+    LEFT JOIN conversaconfig.user_course_progress ucp 
+        ON uaj.user_id = ucp.user_id 
+        AND jc.course_id = ucp.course_id
+    LEFT JOIN conversaconfig.course_stages cs ON mc.course_id = cs.course_id
+    WHERE uaj.user_id = $1  AND mj.is_active 
+    ORDER BY jc.display_order, cs.stage_order;
+""")
+
 async def get_user_journey(user_id: str) -> List[Dict[str, Any]]:
     """
     Recupera los journeys asignados al usuario y agrupa los cursos con su 
@@ -574,35 +655,7 @@ async def get_user_journey(user_id: str) -> List[Dict[str, Any]]:
     """
     try:
         # Tu SQL definitiva
-        query = """
-            SELECT 
-                uaj.journey_id,
-                jc.course_id,
-                jc.is_mandatory,
-                jc.display_order AS course_order,
-                mc.name AS course_name,
-                mc.has_modules,
-                mc.module_template,
-                mc.course_steps AS total_modules,  
-                COALESCE(ucp.completed_modules, 0) AS completed_modules,
-                COALESCE(ucp.status, 'locked') AS course_status,   
-                uaj.status AS journey_status,
-                cs.stage_id,
-                cs.stage_name,
-                cs.stage_order
-            FROM conversaconfig.user_journeys_assigments uaj
-            JOIN conversaconfig.journey_courses jc ON uaj.journey_id = jc.journey_id
-            JOIN conversaconfig.master_journeys mj ON uaj.journey_id = mj.journey_id
-            JOIN conversaconfig.master_courses mc ON jc.course_id = mc.course_id
-            LEFT JOIN conversaconfig.user_course_progress ucp 
-                ON uaj.user_id = ucp.user_id 
-                AND jc.course_id = ucp.course_id
-            LEFT JOIN conversaconfig.course_stages cs ON mc.course_id = cs.course_id
-            WHERE uaj.user_id = $1  AND mj.is_active 
-            ORDER BY jc.display_order, cs.stage_order;
-        """
-
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_USER_JOURNEY_QUERY, user_id)
         
         if not results:
             return []
@@ -658,6 +711,53 @@ async def get_user_journey(user_id: str) -> List[Dict[str, Any]]:
         return []
 
 
+UPDATE_MODULE_PROGRESS_CONTEXT_QUERY = register_query("messages_service.update_module_progress.context", """
+    SELECT uaj.user_journey_id, mc.course_steps
+    FROM conversaconfig.user_journeys_assigments uaj
+    JOIN conversaconfig.master_courses mc ON mc.course_id = $3::uuid
+    WHERE uaj.user_id = $1::uuid AND uaj.journey_id = $2::uuid;
+""")
+
+UPDATE_MODULE_PROGRESS_UPSERT_PROGRESS_QUERY = register_query("messages_service.update_module_progress.upsert_progress", """
+    INSERT INTO conversaconfig.user_course_progress 
+        (user_journey_id, course_id, completed_modules, status, started_at, user_id)
+    VALUES 
+        ($1::uuid, $2::uuid, 1, 'in_progress', CURRENT_TIMESTAMP, $4::uuid)
+    ON CONFLICT (user_journey_id, course_id) 
+    DO UPDATE SET 
+        completed_modules = LEAST(conversaconfig.user_course_progress.completed_modules + 1, $3::int),
+        status = CASE 
+            WHEN conversaconfig.user_course_progress.completed_modules + 1 >= $3::int THEN 'completed'::varchar
+            ELSE 'in_progress'::varchar
+        END,
+        completed_at = CASE 
+            WHEN conversaconfig.user_course_progress.completed_modules + 1 >= $3::int THEN CURRENT_TIMESTAMP
+            ELSE conversaconfig.user_course_progress.completed_at
+        END,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING completed_modules, status;
+""")
+
+UPDATE_MODULE_PROGRESS_PENDING_COURSES_QUERY = register_query("messages_service.update_module_progress.pending_courses", """
+    SELECT count(*) AS pending_courses
+    FROM conversaconfig.journey_courses jc
+    LEFT JOIN conversaconfig.user_course_progress ucp 
+        ON ucp.course_id = jc.course_id AND ucp.user_journey_id = $1::uuid
+    WHERE jc.journey_id = $2::uuid 
+      AND jc.is_mandatory = true 
+      AND (ucp.status IS NULL OR ucp.status != 'completed');
+""")
+
+UPDATE_MODULE_PROGRESS_UPDATE_JOURNEY_QUERY = register_query("messages_service.update_module_progress.update_journey", """
+    UPDATE conversaconfig.user_journeys_assigments
+    SET 
+        status = $2::varchar,
+        completed_at = CASE WHEN $2::varchar = 'completed' THEN CURRENT_TIMESTAMP ELSE completed_at END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE user_journey_id = $1::uuid
+    RETURNING status;
+""")
+
 async def update_module_progress(user_id: str, journey_id: str, course_id: str) -> Dict[str, Any]:
     """
     Registra que un usuario ha completado un módulo de un curso específico.
@@ -666,13 +766,7 @@ async def update_module_progress(user_id: str, journey_id: str, course_id: str)
     try:
         # 1. Obtener el user_journey_id y el total de módulos del curso
         # Añadimos ::uuid para asegurar la conversión desde el string de Python
-        context_query = """
-            SELECT uaj.user_journey_id, mc.course_steps
-            FROM conversaconfig.user_journeys_assigments uaj
-            JOIN conversaconfig.master_courses mc ON mc.course_id = $3::uuid
-            WHERE uaj.user_id = $1::uuid AND uaj.journey_id = $2::uuid;
-        """
-        context = await execute_query(context_query, user_id, journey_id, course_id)
+        context = await execute_query(UPDATE_MODULE_PROGRESS_CONTEXT_QUERY, user_id, journey_id, course_id)
         
         if not context:
             return {"success": False, "error": "Asignación o curso no encontrado"}
@@ -681,54 +775,17 @@ async def update_module_progress(user_id: str, journey_id: str, course_id: str)
         total_modules = context[0]['course_steps']
 
         # 2. UPSERT: Insertar progreso si es el módulo 1, o sumar +1 si ya existe.
-        upsert_query = """
-            INSERT INTO conversaconfig.user_course_progress 
-                (user_journey_id, course_id, completed_modules, status, started_at, user_id)
-            VALUES 
-                ($1::uuid, $2::uuid, 1, 'in_progress', CURRENT_TIMESTAMP, $4::uuid)
-            ON CONFLICT (user_journey_id, course_id) 
-            DO UPDATE SET 
-                completed_modules = LEAST(conversaconfig.user_course_progress.completed_modules + 1, $3::int),
-                status = CASE 
-                    WHEN conversaconfig.user_course_progress.completed_modules + 1 >= $3::int THEN 'completed'::varchar
-                    ELSE 'in_progress'::varchar
-                END,
-                completed_at = CASE 
-                    WHEN conversaconfig.user_course_progress.completed_modules + 1 >= $3::int THEN CURRENT_TIMESTAMP
-                    ELSE conversaconfig.user_course_progress.completed_at
-                END,
-                updated_at = CURRENT_TIMESTAMP
-            RETURNING completed_modules, status;
-        """
-        progress_result = await execute_query(upsert_query, user_journey_id, course_id, total_modules, user_id)
+        progress_result = await execute_query(UPDATE_MODULE_PROGRESS_UPSERT_PROGRESS_QUERY, user_journey_id, course_id, total_modules, user_id)
         current_course_status = progress_result[0]['status']
 
         # 3. Verificamos si quedan cursos obligatorios sin terminar
-        journey_check_query = """
-            SELECT count(*) AS pending_courses
-            FROM conversaconfig.journey_courses jc
-            LEFT JOIN conversaconfig.user_course_progress ucp 
-                ON ucp.course_id = jc.course_id AND ucp.user_journey_id = $1::uuid
-            WHERE jc.journey_id = $2::uuid 
-              AND jc.is_mandatory = true 
-              AND (ucp.status IS NULL OR ucp.status != 'completed');
-        """
-        check_result = await execute_query(journey_check_query, user_journey_id, journey_id)
+        check_result = await execute_query(UPDATE_MODULE_PROGRESS_PENDING_COURSES_QUERY, user_journey_id, journey_id)
         pending_courses = check_result[0]['pending_courses']
 
         # 4. Actualizar el estado del Journey
         new_journey_status = 'completed' if pending_courses == 0 else 'in_progress'
         
-        update_journey_query = """
-            UPDATE conversaconfig.user_journeys_assigments
-            SET 
-                status = $2::varchar,
-                completed_at = CASE WHEN $2::varchar = 'completed' THEN CURRENT_TIMESTAMP ELSE completed_at END,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE user_journey_id = $1::uuid
-            RETURNING status;
-        """
-        await execute_query(update_journey_query, user_journey_id, new_journey_status)
+        await execute_query(UPDATE_MODULE_PROGRESS_UPDATE_JOURNEY_QUERY, user_journey_id, new_journey_status)
 
         return {
             "success": True,
@@ -743,35 +800,35 @@ async def update_module_progress(user_id: str, journey_id: str, course_id: str)
 
 
 
+UPDATE_USER_COURSE_PROGRESS_QUERY = register_query("messages_service.update_user_course_progress", """
+    INSERT INTO conversaconfig.user_course_progress 
+        (user_id, course_id, completed_modules, status, updated_at)
+    VALUES (
+        $1::uuid, 
+        $2::uuid, 
+        1, -- Si es nuevo, empieza con 1 módulo completado
+        CASE 
+            WHEN 1 >= (SELECT course_steps FROM conversaconfig.master_courses WHERE course_id = $2::uuid) THEN 'completed'::varchar
+            ELSE 'in_progress'::varchar
+        END,
+        CURRENT_TIMESTAMP
+    )
+    ON CONFLICT (user_id, course_id) 
+    DO UPDATE SET 
+        completed_modules = user_course_progress.completed_modules + 1,
+        status = CASE 
+            WHEN (user_course_progress.completed_modules + 1) >= (SELECT course_steps FROM conversaconfig.master_courses WHERE course_id = $2::uuid) THEN 'completed'::varchar
+            ELSE 'in_progress'::varchar
+        END,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING completed_modules, status;
+""")
+
 async def update_user_course_progress(user_id: str, course_id: str) -> Dict[str, Any]:
     try:
         # Usamos INSERT ... ON CONFLICT (Upsert) para crear el registro si no existe
         # o actualizarlo incrementando los módulos si ya existe.
-        query = """
-            INSERT INTO conversaconfig.user_course_progress 
-                (user_id, course_id, completed_modules, status, updated_at)
-            VALUES (
-                $1::uuid, 
-                $2::uuid, 
-                1, -- Si es nuevo, empieza con 1 módulo completado
-                CASE 
-                    WHEN 1 >= (SELECT course_steps FROM conversaconfig.master_courses WHERE course_id = $2::uuid) THEN 'completed'::varchar
-                    ELSE 'in_progress'::varchar
-                END,
-                CURRENT_TIMESTAMP
-            )
-            ON CONFLICT (user_id, course_id) 
-            DO UPDATE SET 
-                completed_modules = user_course_progress.completed_modules + 1,
-                status = CASE 
-                    WHEN (user_course_progress.completed_modules + 1) >= (SELECT course_steps FROM conversaconfig.master_courses WHERE course_id = $2::uuid) THEN 'completed'::varchar
-                    ELSE 'in_progress'::varchar
-                END,
-                updated_at = CURRENT_TIMESTAMP
-            RETURNING completed_modules, status;
-        """
-        
-        result = await execute_query(query, user_id, course_id)
+        result = await execute_query(UPDATE_USER_COURSE_PROGRESS_QUERY, user_id, course_id)
         
         updated_modules = None
         new_status = None
@@ -797,25 +854,25 @@ async def update_user_course_progress(user_id: str, course_id: str) -> Dict[str,
 
 
 
+UPDATE_USER_COURSE_STATUS_QUERY = register_query("messages_service.update_user_course_status", """
+    UPDATE conversaconfig.user_course_progress p
+    SET 
+        status = CASE 
+            WHEN p.completed_modules >= c.course_steps THEN 'completed'
+            ELSE 'in_progress'
+        END,
+        updated_at = CURRENT_TIMESTAMP
+    FROM conversaconfig.master_courses c
+    WHERE p.user_id = $1::uuid 
+      AND p.course_id = $2::uuid
+      AND c.course_id = p.course_id
+    RETURNING p.completed_modules, p.status;
+""")
+
 async def update_user_course_status(user_id: str, course_id: str) -> Dict[str, Any]:
     try:
         # Updates the status based on current completed_modules vs total course_steps
-        query = """
-            UPDATE conversaconfig.user_course_progress p
-            SET 
-                status = CASE 
-                    WHEN p.completed_modules >= c.course_steps THEN 'completed'
-                    ELSE 'in_progress'
-                END,
-                updated_at = CURRENT_TIMESTAMP
-            FROM conversaconfig.master_courses c
-            WHERE p.user_id = $1::uuid 
-              AND p.course_id = $2::uuid
-              AND c.course_id = p.course_id
-            RETURNING p.completed_modules, p.status;
-        """
-        
-        result = await execute_query(query, user_id, course_id)
+        result = await execute_query(UPDATE_USER_COURSE_STATUS_QUERY, user_id, course_id)
         
         # If the record was found and updated, return the data cleanly
         if result:
@@ -842,45 +899,45 @@ def get_user_level_label(score: int) -> str:
     else:
         return "Sin Nivel"
 
+GET_DASHBOARD_STATS_QUERY = register_query("messages_service.get_dashboard_stats", """
+    WITH stats_conversations AS (
+        SELECT
+            -- Idéntico al leaderboard: COALESCE(ROUND(...)::int, 0)
+            COALESCE(ROUND(AVG(sbc.general_score))::int, 0) AS average_score,
+            -- Aquí sumamos el tiempo correctamente
+            COALESCE(ROUND(SUM(EXTRACT(EPOCH FROM (c.end_timestamp - c.start_timestamp))) / 3600.0, 1), 0.0) AS total_learning_hours
+        FROM conversaapp.conversations c
+        JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
+        WHERE c.user_id = $1::uuid and sbc.general_score > 0 and c.status = 'FINISHED'
+    ),
+    stats_courses AS (
+        SELECT 
+            -- Idéntico al leaderboard: contamos donde los módulos completados cubren los steps
+            COUNT(ucp.course_progress_id) AS total_completed_courses
+        FROM conversaconfig.user_journeys_assigments uja
+        JOIN conversaconfig.user_course_progress ucp ON uja.user_journey_id = ucp.user_journey_id
+        JOIN conversaconfig.master_courses mc ON ucp.course_id = mc.course_id
+        WHERE uja.user_id = $1::uuid
+        AND ucp.completed_modules >= mc.course_steps
+        AND mc.course_steps > 0
+    )
+    SELECT 
+        sc.average_score,
+        sc.total_learning_hours,
+        stc.total_completed_courses,
+        -- Extraemos el perfil de forma segura sin romper los cálculos de cursos usando un sub-SELECT
+        (SELECT profile_type FROM conversascoring.user_profile WHERE user_id = $1::uuid) AS profile_type
+    FROM stats_conversations sc
+    CROSS JOIN stats_courses stc;
+""")
+
 async def get_dashboard_stats(user_id: str) -> Dict[str, Any]:
     """
     Recupera y calcula las estadísticas del usuario desde la base de datos
     (nota general, horas de aprendizaje y cursos completados).
     """
     try:
-        query = """
-            WITH stats_conversations AS (
-                SELECT
-                    -- Idéntico al leaderboard: COALESCE(ROUND(...)::int, 0)
-                    COALESCE(ROUND(AVG(sbc.general_score))::int, 0) AS average_score,
-                    -- Aquí sumamos el tiempo correctamente
-                    COALESCE(ROUND(SUM(EXTRACT(EPOCH FROM (c.end_timestamp - c.start_timestamp))) / 3600.0, 1), 0.0) AS total_learning_hours
-                FROM conversaapp.conversations c
-                JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
-                WHERE c.user_id = $1::uuid and sbc.general_score > 0 and c.status = 'FINISHED'
-            ),
-            stats_courses AS (
-                SELECT 
-                    -- Idéntico al leaderboard: contamos donde los módulos completados cubren los steps
-                    COUNT(ucp.course_progress_id) AS total_completed_courses
-                FROM conversaconfig.user_journeys_assigments uja
-                JOIN conversaconfig.user_course_progress ucp ON uja.user_journey_id = ucp.user_journey_id
-                JOIN conversaconfig.master_courses mc ON ucp.course_id = mc.course_id
-                WHERE uja.user_id = $1::uuid
-                AND ucp.completed_modules >= mc.course_steps
-                AND mc.course_steps > 0
-            )
-            SELECT 
-                sc.average_score,
-                sc.total_learning_hours,
-                stc.total_completed_courses,
-                -- Extraemos el perfil de forma segura sin romper los cálculos de cursos usando un sub-SELECT
-                (SELECT profile_type FROM conversascoring.user_profile WHERE user_id = $1::uuid) AS profile_type
-            FROM stats_conversations sc
-            CROSS JOIN stats_courses stc;
-        """
-
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_DASHBOARD_STATS_QUERY, user_id)
         
         # Si el usuario es nuevo y no tiene historial
         if not results:
@@ -913,30 +970,30 @@ async def get_dashboard_stats(user_id: str) -> Dict[str, Any]:
 
 
 
+GET_COMPANY_ANNOUNCEMENTS_QUERY = register_query("messages_service.get_company_announcements", """
+    SELECT 
+        announcement_id,
+        type,
+        title,
+        message,
+        badge_text,
+        created_at
+    FROM conversaconfig.company_announcements
+    WHERE company_id = $1
+      AND is_active = true
+      -- Filtro de caducidad: Si es NULL es permanente, si tiene fecha debe ser futura
+      AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
+    ORDER BY created_at DESC
+    LIMIT 5; -- Traemos solo las 5 más recientes para no saturar la UI
+""")
+
 async def get_company_announcements(company_id: str) -> List[Dict[str, Any]]:
     """
     Recupera las noticias (announcements) activas y no caducadas para una empresa,
     ordenadas de más recientes a más antiguas.
     """
     try:
-        query = """
-            SELECT 
-                announcement_id,
-                type,
-                title,
-                message,
-                badge_text,
-                created_at
-            FROM conversaconfig.company_announcements
-            WHERE company_id = $1
-              AND is_active = true
-              -- Filtro de caducidad: Si es NULL es permanente, si tiene fecha debe ser futura
-              AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
-            ORDER BY created_at DESC
-            LIMIT 5; -- Traemos solo las 5 más recientes para no saturar la UI
-        """
-
-        results = await execute_query(query, company_id)
+        results = await execute_read(GET_COMPANY_ANNOUNCEMENTS_QUERY, company_id)
         
         if not results:
             return []
@@ -950,48 +1007,48 @@ async def get_company_announcements(company_id: str) -> List[Dict[str, Any]]:
 
 from typing import Dict, Any
 
+GET_USER_AVG_PARTICIPATION_QUERY = register_query("messages_service.get_user_avg_participation", """
+    WITH valid_conversations AS (
+        -- 1. Aislamos las conversaciones completadas y calculamos la duración de cada una en segundos
+        SELECT 
+            c.conversation_id,
+            EXTRACT(EPOCH FROM (c.end_timestamp - c.start_timestamp)) AS conv_duration
+        FROM conversaapp.conversations c
+        JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
+        WHERE c.user_id = $1::uuid 
+          --AND sbc.is_accomplished = true
+          AND c.start_timestamp IS NOT NULL
+          AND c.end_timestamp IS NOT NULL
+    ),
+    total_time AS (
+        -- 2. Sumamos todo el tiempo que el usuario ha estado en conversaciones
+        SELECT COALESCE(SUM(conv_duration), 0) AS total_duration
+        FROM valid_conversations
+    ),
+    user_time AS (
+        -- 3. Sumamos la duración específica de los mensajes donde el rol es 'user'
+        SELECT COALESCE(SUM(m.duration), 0) AS user_duration
+        FROM conversaapp.messages m
+        JOIN valid_conversations vc ON m.conversation_id = vc.conversation_id
+        WHERE m.role = 'user'
+    )
+    -- 4. Juntamos los datos y calculamos por diferencia el tiempo del asistente
+    SELECT 
+        t.total_duration,
+        u.user_duration,
+        -- Usamos GREATEST por seguridad, para evitar tiempos negativos si hay algún desfase de milisegundos
+        GREATEST(t.total_duration - u.user_duration, 0) AS assistant_duration
+    FROM total_time t
+    CROSS JOIN user_time u;
+""")
+
 async def get_user_avg_participation(user_id: str) -> Dict[str, Any]:
     """
     Calcula el balance de participación real sumando la duración de los 
     mensajes del usuario y restándoselo a la duración total de sus conversaciones.
     """
     try:
-        query = """
-            WITH valid_conversations AS (
-                -- 1. Aislamos las conversaciones completadas y calculamos la duración de cada una en segundos
-                SELECT 
-                    c.conversation_id,
-                    EXTRACT(EPOCH FROM (c.end_timestamp - c.start_timestamp)) AS conv_duration
-                FROM conversaapp.conversations c
-                JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
-                WHERE c.user_id = $1::uuid 
-                  --AND sbc.is_accomplished = true
-                  AND c.start_timestamp IS NOT NULL
-                  AND c.end_timestamp IS NOT NULL
-            ),
-            total_time AS (
-                -- 2. Sumamos todo el tiempo que el usuario ha estado en conversaciones
-                SELECT COALESCE(SUM(conv_duration), 0) AS total_duration
-                FROM valid_conversations
-            ),
-            user_time AS (
-                -- 3. Sumamos la duración específica de los mensajes donde el rol es 'user'
-                SELECT COALESCE(SUM(m.duration), 0) AS user_duration
-                FROM conversaapp.messages m
-                JOIN valid_conversations vc ON m.conversation_id = vc.conversation_id
-                WHERE m.role = 'user'
-            )
-            -- 4. Juntamos los datos y calculamos por diferencia el tiempo del asistente
-            SELECT 
-                t.total_duration,
-                u.user_duration,
-                -- Usamos GREATEST por seguridad, para evitar tiempos negativos si hay algún desfase de milisegundos
-                GREATEST(t.total_duration - u.user_duration, 0) AS assistant_duration
-            FROM total_time t
-            CROSS JOIN user_time u;
-        """
-        
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_USER_AVG_PARTICIPATION_QUERY, user_id)
         
         # Si no hay resultados o la duración total es 0 (no ha completado nada aún)
         if not results or float(results[0]['total_duration']) == 0:
@@ -1030,33 +1087,33 @@ async def get_user_avg_participation(user_id: str) -> Dict[str, Any]:
 
 
 
+GET_USER_AVG_RHYTHM_QUERY = register_query("messages_service.get_user_avg_rhythm", """
+    WITH user_messages AS (
+        SELECT 
+            m.content,
+            m.duration
+        FROM conversaapp.messages m
+        JOIN conversaapp.conversations c ON m.conversation_id = c.conversation_id
+        WHERE c.user_id = $1::uuid 
+          AND m.role = 'user'
+          -- AND c.status = 'completed' -- Descomenta esto si solo quieres contar las terminadas
+    )
+    SELECT 
+        -- Truco SQL: limpiamos espacios extra, cortamos por espacios y contamos el tamaño del array
+        COALESCE(SUM(array_length(string_to_array(trim(content), ' '), 1)), 0) as total_words,
+
+        -- Sumamos la duración exacta de sus audios/mensajes
+        COALESCE(SUM(duration), 0) as total_seconds
+    FROM user_messages;
+""")
+
 async def get_user_avg_rhythm(user_id: str) -> Dict[str, Any]:
     """
     Calcula las Palabras por Minuto (WPM) agregadas del usuario contando 
     el total de sus palabras y dividiéndolo entre su tiempo de habla real.
     """
     try:
-        query = """
-            WITH user_messages AS (
-                SELECT 
-                    m.content,
-                    m.duration
-                FROM conversaapp.messages m
-                JOIN conversaapp.conversations c ON m.conversation_id = c.conversation_id
-                WHERE c.user_id = $1::uuid 
-                  AND m.role = 'user'
-                  -- AND c.status = 'completed' -- Descomenta esto si solo quieres contar las terminadas
-            )
-            SELECT 
-                -- Truco SQL: limpiamos espacios extra, cortamos por espacios y contamos el tamaño del array
-                COALESCE(SUM(array_length(string_to_array(trim(content), ' '), 1)), 0) as total_words,
-                
-                -- Sumamos la duración exacta de sus audios/mensajes
-                COALESCE(SUM(duration), 0) as total_seconds
-            FROM user_messages;
-        """
-        
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_USER_AVG_RHYTHM_QUERY, user_id)
         
         
         if not results or float(results[0]['total_seconds']) == 0:
@@ -1084,19 +1141,19 @@ async def get_user_avg_rhythm(user_id: str) -> Dict[str, Any]:
 
 
 
+GET_USER_AVG_FILLER_WORDS_QUERY = register_query("messages_service.get_user_avg_filler_words", """
+    SELECT COALESCE(ROUND(AVG(sbc.fillerwords_scoring)::numeric, 1), 0.0) as frequency_percentage
+    FROM conversaapp.conversations c
+    JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
+    WHERE c.user_id = $1::uuid;
+""")
+
 async def get_user_avg_filler_words(user_id: str) -> Dict[str, Any]:
     """
     Computes the average frequency of filler words for a user.
     """
     try:
-        query = """
-                SELECT COALESCE(ROUND(AVG(sbc.fillerwords_scoring)::numeric, 1), 0.0) as frequency_percentage
-                FROM conversaapp.conversations c
-                JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
-                WHERE c.user_id = $1::uuid;
-        """
-        
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_USER_AVG_FILLER_WORDS_QUERY, user_id)
         
         if not results or results[0]['frequency_percentage'] is None:
             return {"frequency_percentage": 0.0, "feedback_text": "Sin datos suficientes."}
@@ -1110,19 +1167,19 @@ async def get_user_avg_filler_words(user_id: str) -> Dict[str, Any]:
         print(f"Error fetching filler words metrics for user {user_id}: {str(e)}")
         return None
 
+GET_USER_AVG_TECHNICAL_LEVEL_QUERY = register_query("messages_service.get_user_avg_technical_level", """
+    SELECT COALESCE(ROUND(AVG(sbc.keythemes_scoring)), 0) as technical_level
+    FROM conversaapp.conversations c
+    JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
+    WHERE c.user_id = $1::uuid;
+""")
+
 async def get_user_avg_technical_level(user_id: str) -> Dict[str, Any]:
     """
     Computes the average technical level (keythemes) for a user.
     """
     try:
-        query = """
-            SELECT COALESCE(ROUND(AVG(sbc.keythemes_scoring)), 0) as technical_level
-            FROM conversaapp.conversations c
-            JOIN conversaapp.scoring_by_conversation sbc ON c.conversation_id = sbc.conversation_id
-            WHERE c.user_id = $1::uuid;
-        """
-        
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_USER_AVG_TECHNICAL_LEVEL_QUERY, user_id)
         
         if not results:
             return {"score": 0, "level_label": "Básico", "feedback_text": "Sin datos suficientes."}
@@ -1149,19 +1206,19 @@ async def get_user_avg_technical_level(user_id: str) -> Dict[str, Any]:
         print(f"Error fetching technical level metrics for user {user_id}: {str(e)}")
         return None
 
+GET_USER_PERSONA_PROFILE_QUERY = register_query("messages_service.get_user_persona_profile", """
+    SELECT pd.* FROM conversascoring.user_profile up 
+    JOIN conversascoring.profile_description pd ON up.profile_type = pd.profile
+    WHERE up.user_id = $1::uuid;
+""")
+
 async def get_user_persona_profile(user_id: str) -> Dict[str, Any]:
     """
     Retrieves the sales persona assigned to the user along with 
     its description, strengths and areas for improvement.
     """
     try:
-        query = """
-            SELECT pd.* FROM conversascoring.user_profile up 
-            JOIN conversascoring.profile_description pd ON up.profile_type = pd.profile
-            WHERE up.user_id = $1::uuid;
-        """
-        
-        results = await execute_query(query, user_id)
+        results = await execute_query(GET_USER_PERSONA_PROFILE_QUERY, user_id)
         
         if not results:
             return None
@@ -8,6 +8,7 @@ from typing import Optional, Dict, List
 from pydantic import BaseModel
 from fastapi import HTTPException
 from .db import execute_query, execute_query_one 
+from .query_registry import register_query
 
 
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
@@ -23,6 +24,56 @@ class CheckoutRequest(BaseModel):
     num_custom_courses: int  # Slider de cursos
     coupon_code: Optional[str] = None
 
+PROCESS_CHECKOUT_PLAN_QUERY = register_query("payments_stripe_service.process_checkout.plan", """
+    SELECT plan_id, base_price_per_user, product_stripe_id 
+    FROM conversapay.billing_plans 
+    WHERE plan_id = $1 AND is_active = TRUE
+""")
+
+PROCESS_CHECKOUT_COUPON_QUERY = register_query("payments_stripe_service.process_checkout.coupon", """
+    SELECT external_coupon_id, discount_percentage 
+    FROM conversapay.coupons 
+    WHERE coupon_id = $1 AND is_active = TRUE 
+    AND (valid_until > CURRENT_TIMESTAMP OR valid_until IS NULL)
+""")
+
+PROCESS_CHECKOUT_INSERT_SUBSCRIPTION_QUERY = register_query("payments_stripe_service.process_checkout.insert_subscription", """
+    INSERT INTO conversapay.subscriptions (
+        company_id, 
+        plan_id, 
+        status, 
+        current_period_start, 
+        current_period_end, 
+        users_limit, 
+        custom_courses_limit,
+        external_subscription_id 
+    ) VALUES ($1, $2, $3, to_timestamp($4), to_timestamp($5), $6, $7, $8)
+    RETURNING subscription_id
+""")
+
+PROCESS_CHECKOUT_INSERT_INVOICE_QUERY = register_query("payments_stripe_service.process_checkout.insert_invoice", """
+    INSERT INTO conversapay.invoices (
+        company_id,
+        subscription_id,
+        amount_total,
+        amount_subtotal,
+        coupon_id,
+        status,
+        pdf_url
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+    RETURNING invoice_id
+""")
+
+PROCESS_CHECKOUT_INSERT_TRANSACTION_QUERY = register_query("payments_stripe_service.process_checkout.insert_transaction", """
+    INSERT INTO conversapay.payment_transactions (
+        invoice_id,
+        provider_transaction_id,
+        payment_method,
+        provider_response,
+        created_at
+    ) VALUES ($1, $2, $3, $4, CURRENT_TIMESTAMP)
+""")
+
 class StripeCheckoutService:
     
     @staticmethod
@@ -36,13 +87,8 @@ class StripeCheckoutService:
             # ---------------------------------------------------------
             
             # A. Obtener detalles del Plan de la BBDD
-            plan_query = """
-                SELECT plan_id, base_price_per_user, product_stripe_id 
-                FROM conversapay.billing_plans 
-                WHERE plan_id = $1 AND is_active = TRUE
-            """
             # Asumimos que product_stripe_id guarda el 'price_id' recurrente de Stripe (ej: price_H5gg...)
-            db_plan = await execute_query_one(plan_query, data.plan_id)
+            db_plan = await execute_query_one(PROCESS_CHECKOUT_PLAN_QUERY, data.plan_id)
             
             if not db_plan:
                 raise HTTPException(status_code=404, detail="El plan seleccionado no existe o no está activo.")
@@ -55,13 +101,7 @@ class StripeCheckoutService:
             db_coupon_id = None
             
             if data.coupon_code:
-                coupon_query = """
-                    SELECT external_coupon_id, discount_percentage 
-                    FROM conversapay.coupons 
-                    WHERE coupon_id = $1 AND is_active = TRUE 
-                    AND (valid_until > CURRENT_TIMESTAMP OR valid_until IS NULL)
-                """
-                db_coupon = await execute_query_one(coupon_query, data.coupon_code)
+                db_coupon = await execute_query_one(PROCESS_CHECKOUT_COUPON_QUERY, data.coupon_code)
                 if db_coupon:
                     db_coupon_id = data.coupon_code  
                     stripe_coupon_id = db_coupon['external_coupon_id']
@@ -224,21 +264,7 @@ class StripeCheckoutService:
             # ---------------------------------------------------------
 
             # A. Insertar en SUSCRIPCIONES
-            insert_sub_query = """
-                INSERT INTO conversapay.subscriptions (
-                    company_id, 
-                    plan_id, 
-                    status, 
-                    current_period_start, 
-                    current_period_end, 
-                    users_limit, 
-                    custom_courses_limit,
-                    external_subscription_id 
-                ) VALUES ($1, $2, $3, to_timestamp($4), to_timestamp($5), $6, $7, $8)
-                RETURNING subscription_id
-            """
-            
-            sub_row = await execute_query_one(insert_sub_query, 
+            sub_row = await execute_query_one(PROCESS_CHECKOUT_INSERT_SUBSCRIPTION_QUERY, 
                 data.company_id,
                 data.plan_id,
                 status_stripe,
@@ -251,20 +277,7 @@ class StripeCheckoutService:
             internal_sub_id = sub_row['subscription_id']
 
             # B. Insertar en INVOICES
-            insert_inv_query = """
-                INSERT INTO conversapay.invoices (
-                    company_id,
-                    subscription_id,
-                    amount_total,
-                    amount_subtotal,
-                    coupon_id,
-                    status,
-                    pdf_url
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-                RETURNING invoice_id
-            """
-            
-            inv_row = await execute_query_one(insert_inv_query,
+            inv_row = await execute_query_one(PROCESS_CHECKOUT_INSERT_INVOICE_QUERY,
                 data.company_id,
                 internal_sub_id,
                 amount_total,
@@ -276,20 +289,10 @@ class StripeCheckoutService:
             internal_inv_id = inv_row['invoice_id']
 
             # C. Insertar en PAYMENT_TRANSACTIONS
-            insert_trans_query = """
-                INSERT INTO conversapay.payment_transactions (
-                    invoice_id,
-                    provider_transaction_id,
-                    payment_method,
-                    provider_response,
-                    created_at
-                ) VALUES ($1, $2, $3, $4, CURRENT_TIMESTAMP)
-            """
-            
             # Guardamos el dict completo como JSON
             stripe_dump = json.dumps(sub_dict)
             
-            await execute_query(insert_trans_query,
+            await execute_query(PROCESS_CHECKOUT_INSERT_TRANSACTION_QUERY,
                 internal_inv_id,
                 pi_id, 
                 "card", 
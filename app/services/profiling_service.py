@@ -1,5 +1,4 @@
 import pandas as pd
-import psycopg2
 import os
 import numpy as np
 from dotenv import load_dotenv
@@ -18,8 +17,10 @@ from app.utils.openai_client import get_openai_client
 
 load_dotenv(override=True)
 
-async def profiling(conv_id, course_id, stage_id):
-    transcript = await get_conversation_transcript(conv_id)
+async def profiling(conv_id, course_id, stage_id, transcript=None):
+    # The realtime bridge passes the transcript it already has; rescoring reads it
+    if transcript is None:
+        transcript = await get_conversation_transcript(conv_id)
 
     if not transcript:
         print(f"No messages found for conversation_id: {conv_id}")
@@ -0,0 +1,170 @@
+# Query registry and per-query timing for the asyncpg helpers (db.py)
+# Every query run through execute_query/execute_query_one is timed and counted
+# under a name:
+#   - queries registered with register_query() use their registered name;
+#   - any other query is named after the function that ran it plus its
+#     statement and main table ("database._insert:INSERT recordings"), so
+#     helpers shared by several tables, or functions running several
+#     queries, don't collapse into one entry.
+# top_queries() is the report of the most expensive ones by total time.
+
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Literal, Optional, get_args
+
+# SQL text -> registered name
+_registry: Dict[str, str] = {}
+# (code object of an unregistered caller, SQL) -> derived name (computed once).
+# Bounded: SQL built at runtime would otherwise add an entry per distinct text;
+# past the limit names are still derived, just not cached.
+CALLER_NAMES_MAX = 1000
+_caller_names: Dict[tuple, str] = {}
+
+# First statement keyword and the table it works on (WITH ... is named after the main statement)
+STATEMENT_PATTERN = re.compile(
+    r"\b(?:(SELECT)\b.*?\bFROM|(INSERT)\s+INTO|(UPDATE)|(DELETE)\s+FROM)\s+([\w.\"]+)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def register_query(name: str, sql: str) -> str:
+    """Register a query under a name; returns the SQL so it can be used inline."""
+    previous = _registry.get(sql)
+    if previous and previous != name:
+        raise ValueError(f"Query already registered as {previous!r}")
+    _registry[sql] = name
+    return sql
+
+
+def registered_queries() -> Dict[str, str]:
+    """name -> SQL of every registered query."""
+    return {name: sql for sql, name in _registry.items()}
+
+
+def describe_statement(sql: str) -> Optional[str]:
+    """Statement and main table of the SQL ("INSERT recordings"), or None if not recognised."""
+    sql = re.sub(r"--[^\n]*", " ", sql)
+    # the main statement of a CTE comes after its last closing parenthesis at depth 0
+    if sql.lstrip()[:4].upper() == "WITH":
+        depth, main = 0, 0
+        for i, char in enumerate(sql):
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+                if depth == 0:
+                    main = i + 1
+        sql = sql[main:]
+    match = STATEMENT_PATTERN.search(sql)
+    if not match:
+        return None
+    keyword = next(group for group in match.groups()[:4] if group)
+    table = match.group(5).replace('"', "")
+    return f"{keyword.upper()} {table}"
+
+
+def query_name(sql: str, depth: int = 2) -> str:
+    """Registered name of the query, or module.function:STATEMENT table of the caller `depth` frames up."""
+    name = _registry.get(sql)
+    if name:
+        return name
+    frame = sys._getframe(depth)
+    code = frame.f_code
+    key = (code, sql)
+    name = _caller_names.get(key)
+    if name is None:
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        name = f"{module}.{code.co_name}"
+        statement = describe_statement(sql)
+        if statement:
+            name += f":{statement}"
+        if len(_caller_names) < CALLER_NAMES_MAX:
+            _caller_names[key] = name
+    return name
+
+
+class QueryStats:
+    """Calls, rows and latency of one named query."""
+
+    __slots__ = ("name", "calls", "errors", "rows", "total_seconds", "max_seconds")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "mean_ms": round(self.total_seconds * 1000 / self.calls, 2) if self.calls else None,
+            "max_ms": round(self.max_seconds * 1000, 1),
+        }
+
+
+query_stats: Dict[str, QueryStats] = {}
+
+
+def record_query(name: str, seconds: float, rows: int = 0, error: bool = False):
+    stats = query_stats.get(name)
+    if stats is None:
+        stats = query_stats[name] = QueryStats(name)
+    stats.calls += 1
+    stats.rows += rows
+    stats.total_seconds += seconds
+    stats.max_seconds = max(stats.max_seconds, seconds)
+    if error:
+        stats.errors += 1
+
+
+class timed_query:
+    """Context manager timing one execution: `with timed_query(name) as q: ...; q.rows = n`."""
+
+    __slots__ = ("name", "rows", "seconds", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        record_query(self.name, self.seconds, self.rows, error=exc_type is not None)
+        return False
+
+
+# Columns top_queries() can sort by
+QueryOrder = Literal["total_ms", "calls", "errors", "rows", "mean_ms", "max_ms"]
+
+
+def top_queries(limit: int = 20, order_by: QueryOrder = "total_ms") -> List[Dict]:
+    """Most expensive queries since the worker started, sorted by one of QueryOrder."""
+    if order_by not in get_args(QueryOrder):
+        raise ValueError(f"Cannot order queries by {order_by!r}")
+    rows = [stats.to_dict() for stats in query_stats.values()]
+    rows.sort(key=lambda row: row[order_by] or 0, reverse=True)
+    return rows[:limit]
+
+
+def format_top_queries(limit: int = 20) -> Optional[str]:
+    """Plain-text version of top_queries() for logs."""
+    rows = top_queries(limit)
+    if not rows:
+        return None
+    lines = [f"{'query':<60}{'calls':>8}{'rows':>9}{'total ms':>11}{'mean ms':>9}{'max ms':>9}"]
+    for row in rows:
+        lines.append(f"{row['name'][:59]:<60}{row['calls']:>8}{row['rows']:>9}"
+                     f"{row['total_ms']:>11.1f}{row['mean_ms']:>9.2f}{row['max_ms']:>9.1f}")
+    return "\n".join(lines)
@@ -1,216 +1,541 @@
 # app/services/realtime_bridge.py
+# Realtime audio bridge: browser <-> upstream voice provider
+# The browser speaks the OpenAI-compatible format (or the binary PCM16
+# sub-protocol); everything provider-specific lives in the adapters of
+# realtime_providers.py (ElevenLabs, OpenAI, fake), chosen with REALTIME_PROVIDER.
 import asyncio
-import json
-import os
+import time
+import base64
 
-from pandas.core.generic import T
-from app.services.conversations_service import get_conversation_status
-from app.services.realtime_service import openai_msg_process, stop_process, user_msg_processed
-import websockets
 from dotenv import load_dotenv
-from ..services.messages_service import send_message
-from ..services.prompting_service import master_prompt_generator
-from ..services.conversations_service import create_conversation
+
+# Services imports
+from app.services.conversations_service import close_conversation, create_conversation, set_realtime_session_metrics
+from app.services.messages_service import update_user_course_status
+from app.services.message_buffer import MessageWriteBuffer
+from app.services.realtime_prewarm import resolve_session_setup, take_prewarmed_session
+from app.services.realtime_providers import get_provider
+from app.services.realtime_service import stop_process, user_msg_processed
+from app.services.audio_processing import (
+    VoiceActivityTracker, PauseDetector, StreamingResampler, pcm16_from_b64, pcm16_from_bytes, b64_decoded_len,
+    audio_format_sample_rate, audio_format_bytes_per_second,
+)
+from app.services.realtime_queues import OutboundQueue
+from app.services.silence_gate import SilenceGate
+from app.services.audio_coalescer import AudioCoalescer
+from app.services.asr_clarity import AsrClarityTracker
+from app.services.realtime_metrics import SessionLatencyTracker, add_worker_totals
+from app.services.session_recorder import (
+    create_recorder, FRONTEND_IN, FRONTEND_OUT, UPSTREAM_IN, UPSTREAM_OUT,
+)
+from app.services.realtime_frames import (
+    loads, dumps,
+    frontend_audio_payload, frontend_audio_delta_frame,
+    pack_audio_frame, unpack_audio_frame, FRAME_USER_AUDIO, FRAME_AGENT_AUDIO, CODEC_PCM16,
+)
+from app.services.audio_codecs import decode_audio, encode_audio
+
 load_dotenv(override=True)
-API_KEY = os.getenv("OPENAI_API_KEY")
-WS_URL = "wss://api.openai.com/v1/realtime?model=gpt-realtime"
 
 class RealtimeBridge:
-    def __init__(self, frontend_ws):
+    def __init__(self, frontend_ws, binary_audio: bool = False, provider=None, audio_codec: int = CODEC_PCM16):
         self.frontend_ws = frontend_ws  # WebSocket from browser
-        self.openai_ws = None
-        # Event to signal stopping
+        self.provider = provider or get_provider()
+        self.upstream_ws = None
         self.stop_event = asyncio.Event()
+
+        # Last frame received from the frontend (idle sessions are reaped)
+        self.last_activity = time.monotonic()
+
+        # Binary sub-protocol: audio as raw PCM16 (or μ-law) frames, events stay JSON text
+        self.binary_audio = binary_audio
+        self.audio_codec = audio_codec
+
+        # Bounded queue per direction: a slow side only backs up its own queue
+        self.to_frontend = OutboundQueue("frontend", self.send_frontend, on_error=self.stop)
+        self.to_upstream = OutboundQueue(self.provider.name, self.send_upstream, on_error=self.stop)
+
+        # Optional frame log of the session (REALTIME_RECORD_DIR), opened in run()
+        # so sessions rejected at admission don't leave files behind
+        self.recorder = None
+
+        # Context variables
         self.user_id = None
         self.conversation_id = None
+        self.provider_conversation_id = None
         self.course_id = None
         self.stage_id = None
+        self.voice_id = None
+        self.agent_id = None
+
+        # Write-behind buffer for transcripts (created once the conversation exists)
+        self.messages = None
+
+        # Turn tracking variables
+        self.user_turn_start_ts = None
+        self.user_turn_end_ts = None
+        self.bot_turn_start_ts = None
+        self.bot_turn_end_ts = None
+
+        self.last_user_audio_ts = None
+        self.last_bot_audio_ts = None
 
-    async def connect_openai(self):
-        self.openai_ws = await websockets.connect(
-            WS_URL,
-            extra_headers={
-                "Authorization": f"Bearer {API_KEY}",
-                "OpenAI-Beta": "realtime=v1"
-            }
+        # silence thresholds (seconds)
+        self.USER_TURN_END_SILENCE = 0.8
+        self.BOT_TURN_END_SILENCE = 0.8
+
+        # Exact turn durations from the audio itself
+        # user: speech samples counted by the VAD; agent: bytes of audio forwarded
+        input_rate = audio_format_sample_rate(self.provider.input_format)
+        self.user_vad = VoiceActivityTracker(input_rate)
+        self.user_rate = input_rate
+        # Mid-turn pauses of the seller, scored after the call
+        self.user_pauses = PauseDetector()
+        # Transcription confidence of the seller (providers that send logprobs)
+        self.asr_clarity = AsrClarityTracker()
+        self.agent_output_format = self.provider.output_format
+        self.agent_audio_bytes = 0       # agent audio received in the current turn
+        self._agent_dropped_bytes = 0    # dropped agent audio already taken into account
+        self.pending_agent_message = None
+
+        # Agent audio is grouped into larger frames before going to the browser
+        self.agent_audio = AudioCoalescer(
+            self.send_agent_audio, audio_format_bytes_per_second(self.agent_output_format)
         )
-        print("✅ Connected to OpenAI Realtime API")
-
-        # Send initial session configuration (reuse from realtime.py)
-        # master_prompt = await master_prompt_generator(self.course_id, self.stage_id)
-        session_config = {
-            "type": "session.update",
-            "session": {
-                "instructions": '',
-                # "turn_detection": {
-                #     "type": "server_vad", 
-                #     "threshold": 0.5,
-                #     "prefix_padding_ms": 300,
-                #     "silence_duration_ms": 500,
-                #     # "create_response": true, # probar a activar estos dos parámetros 
-                #     # "interrupt_response": true
-                # },
-                "turn_detection": {           # probar estos parámetros para turn_detection en vez de los de arriba
-                    "type": "semantic_vad", 
-                    "eagerness": "medium", # alternativas: low, high, auto (controla como de dispuesto está el modelo a interrumpir al usuario. auto=medium)
-                    "create_response": True, # estos dos últimos igual no son necesarios
-                    "interrupt_response": True 
-                },
-                "voice": "coral",
-                "temperature": 1,
-                "speed":1.0,
-                "max_response_output_tokens": 4096,
-                "modalities": ["text", "audio"],
-                "input_audio_format": "pcm16",
-                "output_audio_format": "pcm16",     
-                "input_audio_transcription": {
-                    "model": "whisper-1",#"gpt-4o-transcribe", #"whisper-1"
-                    "prompt": "Ehhh, mmm hola buenas te voy a hablar de, ehh negocioss y mmm, bueno pues eso",
-                    "language": "es"
-                },
-                "input_audio_noise_reduction": {
-                    "type": "near_field"
-                },
-                "include": [
-                    "item.input_audio_transcription.logprobs"
-                ],
-            }
-        }
-        initial_response = {
-        "type": "response.create",
-        "response": {
-            "modalities": ["text", "audio"],
-            "instructions": "Saluda al usuario cordialmente y pregúntale en qué le puedes ayudar hoy." # Instrucción específica para este primer turno
-            }
-        }   
-        #Send session config to LLM
-        await self.openai_ws.send(json.dumps(session_config))
-        #Query for initial response
-        await self.openai_ws.send(json.dumps(initial_response))
-
-    async def forward_frontend_to_openai(self):
+
+        # Silence suppression: long silences are not forwarded upstream
+        self.silence_gate = SilenceGate(input_rate)
+
+        # Browser capture rate (declared in input_audio_session.start); audio is
+        # resampled to the provider's input rate when they differ
+        self.client_rate = None
+        self.resampler = None
+
+        # Time to first audio: session start -> first agent audio chunk forwarded
+        self.session_start_ts = None
+        self.time_to_first_audio = None
+
+        # Per-turn latency timestamps and histograms
+        self.latency = SessionLatencyTracker()
+
+    async def connect_upstream(self):
+        """Establece conexión con el proveedor de voz."""
+        try:
+            self.upstream_ws = await self.provider.connect()
+        except Exception as e:
+            print(f"❌ Error connecting to {self.provider.name}: {e}")
+            await self.stop()
+
+    async def forward_frontend_to_upstream(self):
+        """Recibe audio/eventos del Front (formato OpenAI), los traduce y envía al proveedor."""
         try:
             while not self.stop_event.is_set():
-                try:
-                    msg = await self.frontend_ws.receive_text()
-
-                    parsed = json.loads(msg)
-                    
-
-                    ## Logica front to openai
-                    ## TO DO
-                    await user_msg_processed(self.user_id, self.conversation_id)
-
-                    if parsed.get("type") == "input_audio_session.start":
-                        print("new audio session started")
-
-                        
-                        
-                        self.user_id = parsed.get("user_id", None)
-                        self.course_id = parsed.get("course_id", None)
-                        self.stage_id = parsed.get("stage_id", None)
-
-                        ## create conversation here and return conversation_id
-                        conversation_details = await create_conversation(self.user_id, self.course_id, self.stage_id)
-                        self.conversation_id = conversation_details.get("conversation_id", None)
-                        
-                        print('user_id:', self.user_id, 'conversation_id:', self.conversation_id, 'course_id:', self.course_id, 'stage_id:', self.stage_id)
-                        
-                        master_prompt = await master_prompt_generator(self.course_id, self.stage_id)
-                        await self.openai_ws.send(json.dumps({
-                            "type": "session.update",
-                            "session": {"instructions": master_prompt}
-                        }))
-                        continue  # Don't forward this control message to OpenAI
-
-                    elif parsed.get("type") == "input_audio_session.end":
-                        print("audio session ended")
-                        await self.stop()
-                        continue  # Don't forward this control message to OpenAI
-
-                    #parsed.pop("user_id", None)
-                    #parsed.pop("conversation_id", None)
-                    #parsed.pop("course_id", None)
-
-                    await self.openai_ws.send(json.dumps(parsed))
-                except Exception as e:
-                    print("⚠️ Frontend WebSocket error:", e)
+                event = await self.frontend_ws.receive()
+                self.last_activity = time.monotonic()
+                if event["type"] == "websocket.disconnect":
+                    print("🔌 Frontend disconnected")
                     await self.stop()
+                    return
+
+                pcm = None
+                msg = event.get("text")
+                if self.recorder:
+                    self.recorder.record(FRONTEND_IN, msg if msg is not None else event["bytes"])
+                if msg is None:
+                    # Binary frame: PCM16 crudo con cabecera, sin base64 ni JSON
+                    try:
+                        frame_type, codec, payload = unpack_audio_frame(event["bytes"])
+                        pcm = decode_audio(payload, codec)
+                    except ValueError as e:
+                        print(f"⚠️ Dropping malformed binary frame: {e}")
+                        continue
+                    if frame_type != FRAME_USER_AUDIO:
+                        print(f"⚠️ Ignoring binary frame of type {frame_type}")
+                        continue
+                    audio_b64 = None
+                    parsed = None
+                    msg_type = "input_audio_buffer.append"
+                # Fast path: los frames de audio no se parsean enteros
+                elif (audio_b64 := frontend_audio_payload(msg)) is not None:
+                    parsed = None
+                    msg_type = "input_audio_buffer.append"
+                else:
+                    parsed = loads(msg)
+                    msg_type = parsed.get("type")
+                    if msg_type == "input_audio_buffer.append":
+                        audio_b64 = parsed.get("audio")
+
+                # Lógica de procesamiento de estadísticas/DB
+                if self.user_id and self.conversation_id:
+                     await user_msg_processed(self.user_id, self.conversation_id)
+
+                # --- 1. INICIO DE SESIÓN ---
+                if msg_type == "input_audio_session.start":
+                    print("🔵 New session started")
+                    self.user_id = parsed.get("user_id")
+                    self.course_id = parsed.get("course_id")
+                    self.stage_id = parsed.get("stage_id")
+
+                    print(f"Stage: {self.stage_id} ")
+                    self.session_start_ts = time.monotonic()
+
+                    # Frecuencia de captura del navegador (44.1/48 kHz) -> la del proveedor
+                    try:
+                        self.client_rate = int(parsed.get("sample_rate") or 0) or None
+                    except (TypeError, ValueError):
+                        print(f"⚠️ Ignoring invalid sample_rate {parsed.get('sample_rate')!r}")
+                    self.configure_resampler()
+
+                    # Las escrituras en DB no bloquean el arranque: se lanzan ya y se
+                    # esperan después de mandar el prompt al proveedor
+                    self.messages = MessageWriteBuffer(self.user_id)
+                    setup_writes = asyncio.gather(
+                        create_conversation(self.user_id, self.course_id, self.stage_id),
+                        update_user_course_status(self.user_id, self.course_id),
+                    )
+
+                    try:
+                        # Voz/agente y prompt dinámico del curso (ya resueltos si hubo pre-warm)
+                        setup = take_prewarmed_session(self.user_id, self.course_id, self.stage_id)
+                        if setup:
+                            print("♨️ Using pre-warmed session setup")
+                        else:
+                            setup = await resolve_session_setup(self.course_id, self.stage_id)
+                        self.voice_id = setup["voice_id"]
+                        self.agent_id = setup["agent_id"]
+
+                        print(f"Voice: {self.voice_id} | Agent: {self.agent_id}")
+
+                        for frame in self.provider.initiation_frames(setup):
+                            await self.to_upstream.put(frame)
+                    except asyncio.CancelledError:
+                        setup_writes.cancel()
+                        raise
+                    except Exception:
+                        await self.abandon_setup_writes(setup_writes)
+                        raise
+                    print(f"⏱️ Initiation sent {time.monotonic() - self.session_start_ts:.3f}s after session start")
+
+                    conversation_details, _ = await setup_writes
+                    self.conversation_id = conversation_details.get("conversation_id")
+                    self.messages.set_conversation(self.conversation_id)
+                    if self.recorder:
+                        self.recorder.meta({"conversation_id": self.conversation_id})
+                    print(f"User: {self.user_id} | Conv: {self.conversation_id} | Course: {self.course_id}")
+
+                # --- 2. FIN DE SESIÓN ---
+                elif msg_type == "input_audio_session.end":
+                    print("🔴 Session ended by user")
+                    await self.stop()
+                    return
+
+                # --- 3. AUDIO DEL USUARIO ---
+                # OpenAI envía: { "type": "input_audio_buffer.append", "audio": "BASE64..." }
+                # El adaptador lo envuelve en el formato del proveedor
+                # Binary: el PCM llega crudo y se codifica una sola vez para el proveedor
+                elif msg_type == "input_audio_buffer.append":
+                    if pcm:
+                        samples = pcm16_from_bytes(pcm)
+                        audio_b64 = None
+                    elif audio_b64:
+                        samples = pcm16_from_b64(audio_b64)
+                    else:
+                        samples = None
+                    if samples is not None and self.resampler:
+                        samples = self.resampler.process(samples)
+                        audio_b64 = None
+                    if samples is not None and len(samples):
+                        if audio_b64 is None:
+                            audio_b64 = base64.b64encode(samples.tobytes()).decode("ascii")
+                        now = time.time()
+
+                        speech = self.user_vad.feed(samples)
+                        self.user_pauses.feed(speech)
+                        self.latency.user_audio(speech.any())
+                        if self.user_turn_start_ts is None and speech.any():
+                            self.user_turn_start_ts = now
+                            print("🎤 User turn START")
+
+                        self.last_user_audio_ts = now
+
+                        for frame in self.silence_gate.process(samples, self.provider.user_audio_frame(audio_b64)):
+                            await self.to_upstream.put(frame, is_audio=True)
+
+                # Ignoramos otros eventos de configuración de OpenAI que el frontend pueda enviar
+                else:
+                    pass
+
         except Exception as e:
-            print("Frontend stream ended:", e)
+            print(f"⚠️ WebSocket information Front to {self.provider.name}: {e}")
             await self.stop()
 
-    async def forward_openai_to_frontend(self):
+    async def forward_upstream_to_frontend(self):
+        """Recibe eventos del proveedor, los traduce a formato OpenAI y envía al Front."""
         try:
-            async for msg in self.openai_ws:
-                try:
-                    data = json.loads(msg)
-                except json.JSONDecodeError:
-                    print("⚠️ [OpenAI] Received non-JSON message.")
-                    continue
-
-                msg_type = data.get("type")
-                # print(msg_type)
-                # print('\t', data)
-                await openai_msg_process(self.user_id, self.conversation_id)
-
-                ## USER AUDIO TRANSCRIPTION
-                if msg_type == "conversation.item.input_audio_transcription.completed":
-                    transcript = (
-                        data.get("transcript") or
-                        data.get("item", {}).get("transcript") or
-                        data.get("item", {}).get("input_audio_transcription", {}).get("transcript")
-                    )
-                    if transcript:
-                        print(f"[User audio]: {transcript}")
-                        ## insert to db as user message
-                        # print(self.user_id, self.conversation_id, transcript, "user")
-                        await send_message(self.user_id, self.conversation_id, transcript, "user")
-
-                ## AI AUDIO CHUNK
-                elif msg_type == "response.audio_transcript.delta":
-                    partial = data.get("delta", "")
-                    if partial:
-                        print(f"[Assistant audio partial]: {partial}")
-
-                ## AI AUDIO FULL
-                elif msg_type == "response.audio_transcript.done":
-                    transcript = data.get("transcript", "")
-                    if transcript:
-                        print(f"[Assistant audio full]: {transcript}")
-                        # if keyword in transcript:
-                        # stop()
-                        #await openai_msg_process(self.user_id, self.conversation_id)
-                        ## insert to db as assistant message
-                        await send_message(self.user_id, self.conversation_id, transcript, "assistant")
-                # forward raw message to frontend
-                await self.frontend_ws.send_text(msg)
+            async for msg in self.upstream_ws:
+                if self.recorder:
+                    self.recorder.record(UPSTREAM_IN, msg)
+                # Fast path: el audio se re-envuelve sin parsear el JSON
+                chunk = self.provider.audio_payload(msg)
+                if chunk is not None:
+                    event = None
+                    ev_type = "audio"
+                else:
+                    event = self.provider.parse(msg)
+                    if event is None:
+                        continue
+                    ev_type = event["type"]
+                    if ev_type == "audio":
+                        chunk = event["audio"]
+
+                # --- A. SALIDA DE AUDIO (TTS) ---
+                if ev_type == "audio":
+                    if chunk:
+                        if self.time_to_first_audio is None and self.session_start_ts is not None:
+                            self.time_to_first_audio = time.monotonic() - self.session_start_ts
+                            print(f"⏱️ Time to first audio: {self.time_to_first_audio:.3f}s")
+                        self.latency.agent_audio()
+                        if self.agent_audio.enabled or self.binary_audio:
+                            pcm = base64.b64decode(chunk)
+                            self.agent_audio_bytes += len(pcm)
+                            if self.agent_audio.enabled:
+                                await self.agent_audio.add(pcm)
+                            else:
+                                await self.send_agent_audio(pcm)
+                        else:
+                            audio_bytes = b64_decoded_len(chunk)
+                            self.agent_audio_bytes += audio_bytes
+                            # Simulamos el paquete de OpenAI "response.audio.delta"
+                            await self.to_frontend.put(frontend_audio_delta_frame(chunk), is_audio=True,
+                                                       audio_bytes=audio_bytes)
+
+                elif ev_type == "metadata":
+                    self.provider_conversation_id = event.get("conversation_id")
+                    self.agent_output_format = event.get("output_format") or self.agent_output_format
+                    self.agent_audio.set_bytes_per_second(audio_format_bytes_per_second(self.agent_output_format))
+                    if event.get("input_format"):
+                        self.user_rate = audio_format_sample_rate(event["input_format"])
+                        self.user_vad.set_sample_rate(self.user_rate)
+                        self.silence_gate.set_sample_rate(self.user_rate)
+                        self.configure_resampler()
+                # --- B. TRANSCRIPCIÓN USUARIO ---
+                elif ev_type == "user_transcript":
+                    text = event["text"]
+                    print(f"🎤 [User]: {text}")
+
+                    # El turno del agente termina cuando llega el del usuario
+                    self.close_agent_turn()
+                    self.latency.user_transcript()
+                    self.asr_clarity.add_turn(event.get("logprobs"))
+
+                    now = time.time()
+                    self.user_turn_end_ts = now
+
+                    # Duración = tiempo de voz real (sin silencios ni latencia del ASR)
+                    duration = self.user_vad.end_turn()
+                    self.user_pauses.end_turn()
+                    if duration is not None:
+                        print(f"🎤 User turn END | speech={duration:.2f}s")
+
+                    # reset
+                    self.user_turn_start_ts = None
+                    self.last_user_audio_ts = None
+
+                    # Guardar en DB (write-behind, fuera del bucle de audio)
+                    if self.messages:
+                        self.messages.add(text, "user", duration)
+                        self.messages.turn_boundary()
+
+                    # Avisar al front (para que pinte el texto del usuario)
+                    openai_fmt = {
+                        "type": "conversation.item.input_audio_transcription.completed",
+                        "transcript": text
+                    }
+                    await self.to_frontend.put(dumps(openai_fmt))
+
+                # --- C. TRANSCRIPCIÓN AGENTE ---
+                elif ev_type == "agent_transcript":
+                    text = event["text"]
+                    print(f"🤖 [AI]: {text}")
+                    # Si el agente encadena dos respuestas, cerramos la anterior
+                    self.close_agent_turn()
+                    self.latency.agent_transcript()
+                    # Guardar en DB (write-behind): la duración se completa al cerrar el turno
+                    if self.messages:
+                        self.pending_agent_message = self.messages.add(text, "assistant", hold=True)
+                        self.messages.turn_boundary()
+
+                    # Avisar al front (para que pinte el texto del bot)
+                    openai_fmt = {
+                        "type": "response.audio_transcript.done",
+                        "transcript": text
+                    }
+                    await self.to_frontend.put(dumps(openai_fmt))
+                # --- D. INTERRUPCIÓN ---
+                elif ev_type == "interruption":
+                    # Enviamos señal equivalente al frontend para limpiar buffer
+                    print("🛑 [Interruption]: Usuario interrumpió, limpiando buffer...")
+                    self.latency.interruption()
+                    # El audio del agente aún en cola ya no se debe reproducir
+                    # (y no cuenta en la duración del turno, que se cierra después)
+                    self.agent_audio.discard()
+                    self.to_frontend.discard_audio()
+                    self.close_agent_turn()
+                    await self.to_frontend.put(dumps({"type": "response.audio.clear"}))
+
+
+            print(f"📞 [End Call]: La conexión fue cerrada por {self.provider.name} (Agent Hangup).")
+            # Avisar al frontend que la llamada terminó (tras el audio pendiente)
+            await self.agent_audio.flush()
+            await self.to_frontend.put(dumps({"type": "call.end"}))
+
+            await self.stop()
 
         except Exception as e:
-            print("OpenAI stream ended:", e)
+            print(f"⚠️ WebSocket information {self.provider.name} to Front: {e}")
             await self.stop()
 
+    def configure_resampler(self):
+        """(Re)build the resampler from the browser rate to the provider's input rate."""
+        if not self.client_rate or self.client_rate == self.user_rate:
+            self.resampler = None
+            return
+        current = self.resampler
+        if current and (current.input_rate, current.output_rate) == (self.client_rate, self.user_rate):
+            return
+        self.resampler = StreamingResampler(self.client_rate, self.user_rate)
+        print(f"🔁 Resampling user audio {self.client_rate} Hz -> {self.user_rate} Hz")
+
+    def close_agent_turn(self):
+        """Assign the audio forwarded since the last agent turn to the pending agent message."""
+        # Audio discarded on interruption or dropped by the queue never reached the browser
+        dropped = self.agent_audio.discarded_bytes + self.to_frontend.dropped_audio_bytes
+        forwarded = max(0, self.agent_audio_bytes - (dropped - self._agent_dropped_bytes))
+        self._agent_dropped_bytes = dropped
+        self.agent_audio_bytes = 0
+        duration = forwarded / audio_format_bytes_per_second(self.agent_output_format)
+        if self.pending_agent_message is not None:
+            self.messages.release(self.pending_agent_message, duration or None)
+            self.pending_agent_message = None
+
+    async def save_session_metrics(self):
+        """Latency summary of the session, saved with the conversation."""
+        self.latency.close()
+        summary = self.latency.summary()
+        summary["provider"] = self.provider.name
+        summary["queues"] = {"frontend": self.to_frontend.stats(), "upstream": self.to_upstream.stats()}
+        summary["silence_gate"] = self.silence_gate.stats()
+        summary["agent_audio"] = self.agent_audio.stats()
+        summary["pauses"] = self.user_pauses.stats()
+        summary["asr_clarity"] = self.asr_clarity.stats()
+        add_worker_totals(summary["queues"], summary["silence_gate"])
+
+        response = summary["latency"].get("speech_end_to_first_audio", {})
+        ttfa_ms = round(self.time_to_first_audio * 1000, 1) if self.time_to_first_audio is not None else None
+        print(f"⏱️ Latency | turns={summary['turns']} | ttfa={ttfa_ms}ms | "
+              f"response p50={response.get('p50_ms')}ms p90={response.get('p90_ms')}ms")
+
+        if not self.conversation_id:
+            return
+        try:
+            await set_realtime_session_metrics(
+                self.conversation_id, ttfa_ms, summary["turns"], summary["interruptions"],
+                response.get("p50_ms"), response.get("p90_ms"), summary, summary["pauses"],
+                summary["asr_clarity"],
+            )
+        except Exception as e:
+            print(f"⚠️ Could not save session metrics: {e}")
+
+    async def abandon_setup_writes(self, setup_writes):
+        """The session failed to start after its DB writes were launched: wait for
+        them and close the conversation they created, so no row is left open."""
+        try:
+            conversation_details, _ = await setup_writes
+        except Exception as e:
+            print(f"⚠️ Session setup writes failed: {e}")
+            return
+        conversation_id = conversation_details.get("conversation_id") if conversation_details else None
+        if conversation_id:
+            await close_conversation(self.user_id, conversation_id, None, None)
+            print(f"🧹 Closed conversation {conversation_id} of a session that failed to start")
+
+    async def send_agent_audio(self, pcm: bytes):
+        """Queue a frame of agent audio for the browser, in the negotiated format."""
+        if self.binary_audio:
+            frame = pack_audio_frame(encode_audio(pcm, self.audio_codec), FRAME_AGENT_AUDIO, self.audio_codec)
+        else:
+            # Simulamos el paquete de OpenAI "response.audio.delta"
+            frame = frontend_audio_delta_frame(base64.b64encode(pcm).decode("ascii"))
+        await self.to_frontend.put(frame, is_audio=True, audio_bytes=len(pcm))
+
+    async def send_upstream(self, frame):
+        if self.recorder:
+            self.recorder.record(UPSTREAM_OUT, frame)
+        await self.upstream_ws.send(frame)
+
+    async def send_frontend(self, frame):
+        """Binary frames (PCM audio) go as websocket bytes, everything else as text."""
+        if self.recorder:
+            self.recorder.record(FRONTEND_OUT, frame)
+        if isinstance(frame, bytes):
+            await self.frontend_ws.send_bytes(frame)
+        else:
+            await self.frontend_ws.send_text(frame)
+
     async def run(self):
-        # establish connection to OpenAI
-        await self.connect_openai()
-        # Start the forwarding tasks in parallel
-        await asyncio.gather( 
-            self.forward_frontend_to_openai(),
-            self.forward_openai_to_frontend()
-        )
+        self.recorder = create_recorder(self.provider.name, self.binary_audio)
+        if self.recorder and self.binary_audio:
+            self.recorder.meta({"audio_codec": self.audio_codec})
+
+        # 1. Conectar al proveedor
+        await self.connect_upstream()
+
+        # 2. Si la conexión es exitosa, iniciar el puente bidireccional
+        if self.upstream_ws:
+            self.to_frontend.start()
+            self.to_upstream.start()
+            await asyncio.gather(
+                self.forward_frontend_to_upstream(),
+                self.forward_upstream_to_frontend()
+            )
 
     async def stop(self):
-        ## update conversation status to closed in db
-        print('stopping realtime bridge...')
-        print(self.conversation_id)
-        await stop_process(self.user_id, self.conversation_id, self.frontend_ws, self.course_id, self.stage_id)
-        
-        if not self.stop_event.is_set():
-            self.stop_event.set()
+        """Cierra conexiones y guarda estado."""
+        if self.stop_event.is_set():
+            return
+
+        self.stop_event.set()
+        print(f"🛑 Stopping {self.provider.name} bridge for conversation {self.conversation_id}")
+
+        # Enviar lo que quede en las colas antes de cerrar
+        await self.agent_audio.flush()
+        await self.to_frontend.close()
+        await self.to_upstream.close()
+        print(f"📊 Queues | frontend={self.to_frontend.stats()} | {self.provider.name}={self.to_upstream.stats()}")
+        print(f"🔇 Silence gate | {self.silence_gate.stats()}")
+        print(f"🔊 Agent audio | {self.agent_audio.stats()}")
+        await self.save_session_metrics()
+        if self.recorder:
+            self.recorder.close(self.conversation_id)
 
+        # El transcript tiene que estar completo en DB antes del scoring
+        self.close_agent_turn()
+        if self.messages:
+            await self.messages.close()
+
+        # Guardar estado final en DB
+        if self.conversation_id:
+            await stop_process(self.user_id, self.conversation_id, self.frontend_ws,
+                self.course_id, self.stage_id, self.provider_conversation_id, self.agent_id,
+                transcript=self.messages.transcript() if self.messages else None,
+                pauses=self.user_pauses.stats(), asr_clarity=self.asr_clarity.stats())
+
+        # Cerrar sockets
         try:
-            if self.openai_ws:
-                await self.openai_ws.close()
-            await self.frontend_ws.close()
-        except:
-            pass 
\ No newline at end of file
+            if self.upstream_ws:
+                await self.upstream_ws.close()
+            if self.frontend_ws:
+                await self.frontend_ws.close()
+
+        except Exception as e:
+            print(f"Error closing sockets: {e}")
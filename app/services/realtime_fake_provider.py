@@ -0,0 +1,232 @@
+# Local fake provider speaking the ElevenLabs convai protocol
+# Lets the realtime bridge be profiled and load-tested offline: it answers the
+# conversation initiation with metadata, greets with the first message, detects
+# the end of each user turn from the audio energy (FAKE_TURN_SILENCE_MS of
+# silence after speech), replies with a scripted user transcript and agent
+# response, and streams synthetic agent audio paced in real time
+# (FAKE_AUDIO_PACING = 1.0; 0 sends it as fast as possible). User speech while
+# the agent is talking produces an "interruption" event.
+#
+# Load tests (scripts/load_test_ws_audio.py) stamp a sequence marker on the first
+# samples of each chunk; with FAKE_ECHO_MARKERS=1 the fake sends every marker it
+# receives straight back as a tiny agent audio event, so the client can measure
+# the round trip through the bridge.
+#
+# In-process: REALTIME_PROVIDER=fake (FakeElevenLabsSocket, no network).
+# As a server:  python -m app.services.realtime_fake_provider --port 8765
+#               and REALTIME_PROVIDER=fake FAKE_PROVIDER_URL=ws://localhost:8765
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+import websockets
+from dotenv import load_dotenv
+
+from app.services.audio_processing import DEFAULT_SAMPLE_RATE, pcm16_from_b64, pcm16_rms
+from app.services.realtime_frames import loads, dumps
+
+load_dotenv(override=True)
+
+FAKE_PROVIDER_URL = os.getenv("FAKE_PROVIDER_URL")
+FAKE_PROVIDER_SCRIPT = os.getenv("FAKE_PROVIDER_SCRIPT")  # JSON file: {"user": [...], "agent": [...]}
+FAKE_AUDIO_PACING = float(os.getenv("FAKE_AUDIO_PACING", "1.0"))
+FAKE_AUDIO_CHUNK_MS = int(os.getenv("FAKE_AUDIO_CHUNK_MS", "100"))
+FAKE_AUDIO_MS_PER_CHAR = int(os.getenv("FAKE_AUDIO_MS_PER_CHAR", "60"))
+FAKE_RESPONSE_DELAY_MS = int(os.getenv("FAKE_RESPONSE_DELAY_MS", "300"))
+FAKE_TURN_SILENCE_MS = int(os.getenv("FAKE_TURN_SILENCE_MS", "600"))
+FAKE_SPEECH_RMS = float(os.getenv("FAKE_SPEECH_RMS", "0.02"))
+FAKE_ECHO_MARKERS = os.getenv("FAKE_ECHO_MARKERS", "0") in ("1", "true", "True")
+
+# Load-test marker: a fixed 4-sample magic followed by the 32-bit sequence number
+# as 8 nibbles, all as tiny sample values so the marker adds no measurable energy
+# (the silence gate and the VAD see the chunk as it was)
+MARKER_MAGIC = (3, -3, 5, -5)
+MARKER_SAMPLES = 12
+
+DEFAULT_SCRIPT = {
+    "user": [
+        "Hola, te llamo para presentarte nuestro producto.",
+        "Nos ayuda a reducir costes en la gestión de clientes.",
+        "Podríamos empezar con una prueba de un mes sin compromiso.",
+    ],
+    "agent": [
+        "Vale, cuéntame un poco más.",
+        "¿Y cuánto cuesta exactamente? Ahora mismo tenemos otro proveedor.",
+        "Me parece interesante, mándame la propuesta por correo.",
+    ],
+}
+
+
+def load_script(path: Optional[str] = FAKE_PROVIDER_SCRIPT) -> Dict[str, List[str]]:
+    if not path:
+        return DEFAULT_SCRIPT
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def embed_marker(pcm: np.ndarray, seq: int) -> np.ndarray:
+    """Copy of the PCM16 chunk with a sequence marker on its first samples."""
+    marked = pcm.copy()
+    nibbles = [((seq >> shift) & 0xF) - 8 for shift in range(28, -4, -4)]
+    marked[:MARKER_SAMPLES] = MARKER_MAGIC + tuple(nibbles)
+    return marked
+
+
+def read_marker(pcm: np.ndarray) -> Optional[int]:
+    """Sequence number of a marked chunk, or None."""
+    if len(pcm) < MARKER_SAMPLES or tuple(int(x) for x in pcm[:4]) != MARKER_MAGIC:
+        return None
+    seq = 0
+    for value in pcm[4:MARKER_SAMPLES]:
+        seq = (seq << 4) | (int(value) + 8)
+    return seq
+
+
+def synthetic_audio_chunk(chunk_ms: int = FAKE_AUDIO_CHUNK_MS, sample_rate: int = DEFAULT_SAMPLE_RATE) -> str:
+    """Base64 PCM16 tone, loud enough to count as speech; encoded once and reused."""
+    t = np.arange(sample_rate * chunk_ms // 1000) / sample_rate
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t)
+    return base64.b64encode((tone * 32767).astype("<i2").tobytes()).decode("ascii")
+
+
+class FakeConversation:
+    """One scripted conversation; `send` delivers frames back to the bridge."""
+
+    def __init__(self, send: Callable[[str], Awaitable], script: Dict[str, List[str]] = None,
+                 pacing: float = FAKE_AUDIO_PACING, sample_rate: int = DEFAULT_SAMPLE_RATE):
+        self._send = send
+        self.script = script or load_script()
+        self.pacing = pacing
+        self.sample_rate = sample_rate
+        self.conversation_id = f"fake_{uuid.uuid4().hex[:12]}"
+
+        self._audio_chunk = synthetic_audio_chunk(FAKE_AUDIO_CHUNK_MS, sample_rate)
+        self._turn_silence = sample_rate * FAKE_TURN_SILENCE_MS // 1000
+        self._turn = 0
+        self._user_speaking = False
+        self._silence = 0
+        self._agent_task: Optional[asyncio.Task] = None
+        self._event_id = 0
+
+    async def handle(self, msg):
+        data = loads(msg)
+        if "user_audio_chunk" in data:
+            await self._user_audio(data["user_audio_chunk"])
+        elif data.get("type") == "conversation_initiation_client_data":
+            await self._send(dumps({
+                "type": "conversation_initiation_metadata",
+                "conversation_initiation_metadata_event": {
+                    "conversation_id": self.conversation_id,
+                    "agent_output_audio_format": f"pcm_{self.sample_rate}",
+                    "user_input_audio_format": f"pcm_{self.sample_rate}",
+                },
+            }))
+            agent = data.get("conversation_config_override", {}).get("agent", {})
+            self._start_agent_turn(agent.get("first_message") or "¡Hola!")
+
+    async def _user_audio(self, audio_b64: str):
+        pcm = pcm16_from_b64(audio_b64)
+        if FAKE_ECHO_MARKERS and read_marker(pcm) is not None:
+            marker = base64.b64encode(pcm[:MARKER_SAMPLES].tobytes()).decode("ascii")
+            await self._send('{"type":"audio","audio_event":{"audio_base_64":"' + marker + '","event_id":0}}')
+        if pcm16_rms(pcm) > FAKE_SPEECH_RMS:
+            self._silence = 0
+            if not self._user_speaking:
+                self._user_speaking = True
+                if self._agent_task and not self._agent_task.done():
+                    self._agent_task.cancel()
+                    self._event_id += 1
+                    await self._send(dumps({"type": "interruption", "interruption_event": {"event_id": self._event_id}}))
+        elif self._user_speaking:
+            self._silence += len(pcm)
+            if self._silence >= self._turn_silence:
+                self._user_speaking = False
+                await self._end_user_turn()
+
+    async def _end_user_turn(self):
+        users, agents = self.script.get("user", []), self.script.get("agent", [])
+        user_text = users[self._turn % len(users)] if users else f"Turno {self._turn + 1} del usuario."
+        agent_text = agents[self._turn % len(agents)] if agents else "Entiendo."
+        self._turn += 1
+        await self._send(dumps({"type": "user_transcript", "user_transcription_event": {"user_transcript": user_text}}))
+        self._start_agent_turn(agent_text)
+
+    def _start_agent_turn(self, text: str):
+        if self._agent_task and not self._agent_task.done():
+            self._agent_task.cancel()
+        self._agent_task = asyncio.ensure_future(self._agent_turn(text))
+
+    async def _agent_turn(self, text: str):
+        await asyncio.sleep(FAKE_RESPONSE_DELAY_MS / 1000)
+        await self._send(dumps({"type": "agent_response", "agent_response_event": {"agent_response": text}}))
+        n_chunks = max(1, len(text) * FAKE_AUDIO_MS_PER_CHAR // FAKE_AUDIO_CHUNK_MS)
+        for _ in range(n_chunks):
+            self._event_id += 1
+            await self._send('{"type":"audio","audio_event":{"audio_base_64":"' + self._audio_chunk
+                             + '","event_id":' + str(self._event_id) + '}}')
+            if self.pacing > 0:
+                await asyncio.sleep(FAKE_AUDIO_CHUNK_MS / 1000 * self.pacing)
+
+    def close(self):
+        if self._agent_task and not self._agent_task.done():
+            self._agent_task.cancel()
+
+
+class FakeElevenLabsSocket:
+    """In-process stand-in for the upstream websocket (send / async iteration / close)."""
+
+    def __init__(self, script: Dict[str, List[str]] = None, pacing: float = FAKE_AUDIO_PACING):
+        self._incoming = asyncio.Queue()
+        self.open = True
+        self.conversation = FakeConversation(self._incoming.put, script=script, pacing=pacing)
+
+    async def send(self, msg):
+        if not self.open:
+            raise ConnectionError("Fake provider socket is closed")
+        await self.conversation.handle(msg)
+
+    async def __aiter__(self):
+        while True:
+            msg = await self._incoming.get()
+            if msg is None:
+                return
+            yield msg
+
+    async def close(self):
+        if self.open:
+            self.open = False
+            self.conversation.close()
+            self._incoming.put_nowait(None)
+
+
+async def _handle_connection(ws, path=None):
+    conversation = FakeConversation(ws.send)
+    print(f"🤖 Fake provider conversation {conversation.conversation_id} started")
+    try:
+        async for msg in ws:
+            await conversation.handle(msg)
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        conversation.close()
+        print(f"🤖 Fake provider conversation {conversation.conversation_id} ended")
+
+
+async def serve(host: str = "0.0.0.0", port: int = 8765):
+    async with websockets.serve(_handle_connection, host, port):
+        print(f"🤖 Fake ElevenLabs provider listening on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake ElevenLabs convai provider for offline tests")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
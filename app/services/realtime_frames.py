@@ -0,0 +1,134 @@
+# Frame translation helpers for the realtime audio bridge
+# Audio frames are most of the traffic, so they are recognised and re-wrapped
+# without parsing the JSON: the base64 payload is sliced out once and wrapped in
+# the target envelope. Control/transcript messages go through loads()/dumps(),
+# which use orjson when it is installed and the stdlib json module otherwise.
+#
+# Clients that negotiate a binary sub-protocol (BINARY_SUBPROTOCOLS) send and
+# receive audio in binary websocket frames instead, each prefixed with a 4-byte
+# header, as raw PCM16 or μ-law (audio_codecs.py); control and transcript events
+# stay JSON text frames.
+
+import json
+import re
+import struct
+
+try:
+    import orjson
+except ImportError:  # optional: faster codec for control messages
+    orjson = None
+
+# Base64 never contains quotes or backslashes, so the payload always ends at the
+# next '"' and these keys can't appear inside it.
+_FRONTEND_AUDIO_TYPE = re.compile(r'"type"\s*:\s*"input_audio_buffer\.append"')
+_FRONTEND_AUDIO_KEY = re.compile(r'"audio"\s*:\s*"')
+_ELEVENLABS_AUDIO_KEY = re.compile(r'"audio_base_64"\s*:\s*"')
+
+# Binary audio frames: | version | frame type | codec | reserved | payload... |
+BINARY_SUBPROTOCOL = "conversa.pcm16.v1"
+MULAW_SUBPROTOCOL = "conversa.mulaw.v1"
+BINARY_FRAME_VERSION = 1
+BINARY_HEADER = struct.Struct("!BBBx")
+
+# Frame types
+FRAME_USER_AUDIO = 0x01   # browser -> bridge: microphone audio (input_audio_buffer.append)
+FRAME_AGENT_AUDIO = 0x02  # bridge -> browser: agent audio (response.audio.delta)
+
+# Codecs
+CODEC_PCM16 = 0x01        # signed 16-bit little-endian PCM
+CODEC_MULAW = 0x02        # G.711 μ-law, 8 bits per sample
+
+# Sub-protocol -> codec of the audio the bridge sends back
+BINARY_SUBPROTOCOLS = {
+    BINARY_SUBPROTOCOL: CODEC_PCM16,
+    MULAW_SUBPROTOCOL: CODEC_MULAW,
+}
+
+
+def loads(msg):
+    """Parse a JSON text/bytes frame."""
+    if orjson is not None:
+        return orjson.loads(msg)
+    return json.loads(msg)
+
+
+def dumps(obj) -> str:
+    """Serialize a message to a JSON text frame."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _string_value(msg: str, key_pattern):
+    """Slice the string value that follows `key_pattern`, or None if absent/escaped."""
+    key = key_pattern.search(msg)
+    if key is None:
+        return None, None
+    start = key.end()
+    end = msg.find('"', start)
+    if end < 0:
+        return None, None
+    value = msg[start:end]
+    if "\\" in value:
+        # Escaped characters (e.g. "\/"): leave it to the full JSON parser
+        return None, None
+    return value, key
+
+
+def frontend_audio_payload(msg):
+    """
+    Base64 audio of an `input_audio_buffer.append` frame from the browser.
+    Returns None for any other frame (or one that needs a full parse).
+    """
+    if not isinstance(msg, str):
+        return None
+    payload, key = _string_value(msg, _FRONTEND_AUDIO_KEY)
+    if payload is None:
+        return None
+    # The type can sit before or after the audio field
+    payload_end = key.end() + len(payload)
+    if not (_FRONTEND_AUDIO_TYPE.search(msg, 0, key.start()) or _FRONTEND_AUDIO_TYPE.search(msg, payload_end)):
+        return None
+    return payload
+
+
+def elevenlabs_audio_payload(msg):
+    """
+    Base64 audio of an ElevenLabs `audio` event.
+    Returns None for any other event (or one that needs a full parse).
+    """
+    if not isinstance(msg, str):
+        return None
+    payload, _ = _string_value(msg, _ELEVENLABS_AUDIO_KEY)
+    return payload
+
+
+def elevenlabs_user_audio_frame(audio_b64: str) -> str:
+    """ElevenLabs expects: { "user_audio_chunk": "BASE64..." }"""
+    return '{"user_audio_chunk":"' + audio_b64 + '"}'
+
+
+def frontend_audio_delta_frame(audio_b64: str) -> str:
+    """OpenAI-compatible `response.audio.delta` frame for the browser."""
+    return '{"type":"response.audio.delta","delta":"' + audio_b64 + '","item_id":"elevenlabs_audio"}'
+
+
+def pack_audio_frame(pcm: bytes, frame_type: int, codec: int = CODEC_PCM16) -> bytes:
+    """Binary websocket frame carrying raw audio."""
+    return BINARY_HEADER.pack(BINARY_FRAME_VERSION, frame_type, codec) + pcm
+
+
+def unpack_audio_frame(frame: bytes):
+    """
+    Split a binary frame into (frame_type, codec, payload).
+    Raises ValueError for an unknown version or a malformed PCM16 payload.
+    """
+    if len(frame) < BINARY_HEADER.size:
+        raise ValueError(f"Binary frame too short ({len(frame)} bytes)")
+    version, frame_type, codec = BINARY_HEADER.unpack_from(frame)
+    if version != BINARY_FRAME_VERSION:
+        raise ValueError(f"Unsupported binary frame version {version}")
+    payload = frame[BINARY_HEADER.size:]
+    if codec == CODEC_PCM16 and len(payload) % 2:
+        raise ValueError("PCM16 payload with an odd number of bytes")
+    return frame_type, codec, payload
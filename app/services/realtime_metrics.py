@@ -0,0 +1,174 @@
+# Latency instrumentation for the realtime bridge
+# Each session records, per turn, when the user stopped speaking, when the
+# user transcript arrived, when the first agent audio chunk was forwarded and
+# when the agent transcript arrived, plus interruptions. The intervals between
+# them go into per-session histograms and into the per-worker histograms below,
+# and a compact summary is saved with the conversation when it closes.
+# All timestamps are time.monotonic() seconds.
+
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# Bucket upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+
+# Intervals measured per turn
+LATENCY_METRICS = {
+    "speech_end_to_first_audio": "user speech end -> first agent audio chunk",
+    "speech_end_to_transcript": "user speech end -> user transcript",
+    "transcript_to_first_audio": "user transcript -> first agent audio chunk",
+    "transcript_to_agent_transcript": "user transcript -> agent transcript",
+    "first_audio_to_interruption": "first agent audio chunk -> interruption",
+}
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (ms) with count/sum/max; counts[i] is the bucket ending at buckets[i]."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the p-th percentile, capped at the max seen."""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                bound = self.buckets[i] if i < len(self.buckets) else self.max_ms
+                return round(min(bound, self.max_ms), 1)
+        return round(self.max_ms, 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 1),
+            "counts": list(self.counts),
+        }
+
+
+def _new_histograms() -> Dict[str, LatencyHistogram]:
+    return {name: LatencyHistogram() for name in LATENCY_METRICS}
+
+
+# Per worker process, across all sessions since start
+worker_histograms = _new_histograms()
+worker_sessions = 0
+worker_totals = {
+    "dropped_audio_frontend": 0,
+    "dropped_audio_upstream": 0,
+    "audio_seconds": 0.0,
+    "suppressed_seconds": 0.0,
+}
+
+
+def add_worker_totals(queues: Dict, silence_gate: Dict):
+    """Accumulate a finished session's queue drops and silence gate stats."""
+    worker_totals["dropped_audio_frontend"] += queues["frontend"]["dropped_audio"]
+    worker_totals["dropped_audio_upstream"] += queues["upstream"]["dropped_audio"]
+    worker_totals["audio_seconds"] += silence_gate["audio_seconds"]
+    worker_totals["suppressed_seconds"] += silence_gate["suppressed_seconds"]
+
+
+class SessionLatencyTracker:
+    """Per-session turn timestamps and latency histograms."""
+
+    def __init__(self):
+        self.histograms = _new_histograms()
+        self.turns: List[Dict] = []
+        self.interruptions = 0
+        self.last_speech_ts = None   # last time a chunk with speech arrived from the user
+        self._turn = None            # turn waiting for the agent's answer
+
+    def _observe(self, name: str, start: Optional[float], end: Optional[float]):
+        if start is None or end is None or end < start:
+            return
+        self.histograms[name].observe(end - start)
+        worker_histograms[name].observe(end - start)
+
+    # --- events ---
+
+    def user_audio(self, has_speech: bool):
+        if has_speech:
+            self.last_speech_ts = time.monotonic()
+
+    def user_transcript(self):
+        now = time.monotonic()
+        self._turn = {
+            "speech_end": self.last_speech_ts,
+            "user_transcript": now,
+            "first_agent_audio": None,
+            "agent_transcript": None,
+            "interrupted_at": None,
+        }
+        self.turns.append(self._turn)
+        self.last_speech_ts = None
+        self._observe("speech_end_to_transcript", self._turn["speech_end"], now)
+
+    def agent_audio(self):
+        turn = self._turn
+        if turn is None or turn["first_agent_audio"] is not None:
+            return
+        now = time.monotonic()
+        turn["first_agent_audio"] = now
+        self._observe("speech_end_to_first_audio", turn["speech_end"], now)
+        self._observe("transcript_to_first_audio", turn["user_transcript"], now)
+
+    def agent_transcript(self):
+        turn = self._turn
+        if turn is None or turn["agent_transcript"] is not None:
+            return
+        turn["agent_transcript"] = time.monotonic()
+        self._observe("transcript_to_agent_transcript", turn["user_transcript"], turn["agent_transcript"])
+
+    def interruption(self):
+        self.interruptions += 1
+        turn = self._turn
+        if turn is not None and turn["interrupted_at"] is None:
+            turn["interrupted_at"] = time.monotonic()
+            self._observe("first_audio_to_interruption", turn["first_agent_audio"], turn["interrupted_at"])
+
+    # --- summary ---
+
+    def summary(self) -> Dict:
+        return {
+            "turns": len(self.turns),
+            "interruptions": self.interruptions,
+            "buckets_ms": list(LATENCY_BUCKETS_MS),
+            "latency": {name: h.to_dict() for name, h in self.histograms.items() if h.count},
+        }
+
+    def close(self):
+        global worker_sessions
+        worker_sessions += 1
+
+
+def worker_latency_stats() -> Dict:
+    """Latency histograms, totals and CPU time of this worker process."""
+    return {
+        "pid": os.getpid(),
+        "cpu_seconds": round(time.process_time(), 3),
+        "sessions": worker_sessions,
+        "totals": {k: round(v, 2) for k, v in worker_totals.items()},
+        "buckets_ms": list(LATENCY_BUCKETS_MS),
+        "latency": {name: h.to_dict() for name, h in worker_histograms.items()},
+    }
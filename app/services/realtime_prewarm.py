@@ -0,0 +1,67 @@
+# Session pre-warm for the realtime bridge
+# While the user is on the stage screen the frontend calls the pre-warm endpoint:
+# the voice/agent and master prompt are resolved and cached here, and the
+# provider opens an upstream socket (ElevenLabs pool), so that /ws/audio can start the call
+# without waiting for the handshake, the DB lookups or prompt generation.
+# The cache is per worker process: a session served by another worker simply
+# takes the normal (cold) path.
+
+import asyncio
+import time
+from typing import Dict, Optional
+from uuid import UUID
+
+from .conversations_service import get_voice_agent
+from .elevenlabs_client import ELEVENLABS_AGENT_ID
+from .prompting_service import master_prompt_generator
+from .realtime_providers import get_provider
+
+# Seconds a pre-warmed session stays valid
+PREWARM_TTL_SECONDS = 120
+
+DEFAULT_VOICE_ID = "851ejYcv2BoNPjrkw93G"
+
+_prewarmed: Dict[tuple, Dict] = {}
+
+
+def _key(user_id, course_id, stage_id) -> tuple:
+    return (str(user_id), str(course_id), str(stage_id))
+
+
+async def resolve_session_setup(course_id: UUID, stage_id: UUID) -> Dict:
+    """Voice, agent and master prompt for a course stage."""
+    record, master_prompt = await asyncio.gather(
+        get_voice_agent(stage_id),
+        master_prompt_generator(course_id, stage_id),
+    )
+    voice_id = DEFAULT_VOICE_ID
+    agent_id = ELEVENLABS_AGENT_ID
+    if record:
+        voice_id = record['voice_id'] or voice_id
+        agent_id = record['agent_id'] or agent_id
+    return {"voice_id": voice_id, "agent_id": agent_id, "master_prompt": master_prompt}
+
+
+async def prewarm_session(user_id: UUID, course_id: UUID, stage_id: UUID) -> Dict:
+    """Resolve and cache the session setup, and warm an upstream connection."""
+    # Warm sockets are kept (replaced as they go idle) for as long as the setup below
+    get_provider().prewarm(PREWARM_TTL_SECONDS)
+
+    setup = await resolve_session_setup(course_id, stage_id)
+    _prewarmed[_key(user_id, course_id, stage_id)] = {**setup, "created_at": time.monotonic()}
+    _purge_expired()
+    return {"voice_id": setup["voice_id"], "agent_id": setup["agent_id"], "expires_in": PREWARM_TTL_SECONDS}
+
+
+def take_prewarmed_session(user_id, course_id, stage_id) -> Optional[Dict]:
+    """Pop the cached setup for this session if it was pre-warmed and hasn't expired."""
+    setup = _prewarmed.pop(_key(user_id, course_id, stage_id), None)
+    if setup and time.monotonic() - setup["created_at"] < PREWARM_TTL_SECONDS:
+        return setup
+    return None
+
+
+def _purge_expired():
+    now = time.monotonic()
+    for key in [k for k, v in _prewarmed.items() if now - v["created_at"] >= PREWARM_TTL_SECONDS]:
+        del _prewarmed[key]
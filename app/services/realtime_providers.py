@@ -0,0 +1,280 @@
+# Upstream provider adapters for the realtime bridge
+# The bridge core (realtime_bridge.RealtimeBridge) only talks to the browser and
+# to a provider adapter; everything that depends on the upstream protocol lives
+# here: how to connect, how to start the conversation, how to wrap user audio
+# and how to read the provider's events.
+#
+# parse() turns a provider message into one of these events (or None to ignore):
+#   {"type": "audio", "audio": <base64 PCM>}
+#   {"type": "metadata", "conversation_id": ..., "input_format": ..., "output_format": ...}
+#   {"type": "user_transcript", "text": ..., "logprobs": [...] (optional, per token)}
+#   {"type": "agent_transcript", "text": ...}
+#   {"type": "interruption"}
+#
+# The provider is chosen with REALTIME_PROVIDER: "elevenlabs" (default), "openai"
+# or "fake" (local scripted provider speaking the ElevenLabs protocol, see
+# realtime_fake_provider.py).
+
+import os
+from typing import Dict, List, Optional
+
+import websockets
+from dotenv import load_dotenv
+
+from app.services.elevenlabs_client import ELEVENLABS_AGENT_ID, connect_elevenlabs_ws, elevenlabs_pool
+from app.services.realtime_fake_provider import FAKE_PROVIDER_URL, FakeElevenLabsSocket
+from app.services.realtime_frames import (
+    loads, dumps, elevenlabs_audio_payload, elevenlabs_user_audio_frame,
+)
+
+load_dotenv(override=True)
+
+REALTIME_PROVIDER = os.getenv("REALTIME_PROVIDER", "elevenlabs")
+
+FIRST_MESSAGE = "¡Hola!, ¿qué tal?"
+
+
+class RealtimeProvider:
+    """Base adapter: one instance per bridge session."""
+
+    name = "base"
+    # Audio formats until the provider reports its own (ElevenLabs naming)
+    input_format = "pcm_16000"
+    output_format = "pcm_16000"
+
+    def prewarm(self, keep_warm_seconds: float = 0.0):
+        """Warm upstream connections ahead of a session, for up to keep_warm_seconds (optional)."""
+
+    async def connect(self):
+        """Open the upstream websocket."""
+        raise NotImplementedError
+
+    def initiation_frames(self, setup: Dict) -> List[str]:
+        """Frames that start the conversation, from the session setup (voice, agent, master prompt)."""
+        raise NotImplementedError
+
+    def user_audio_frame(self, audio_b64: str) -> str:
+        raise NotImplementedError
+
+    def audio_payload(self, msg) -> Optional[str]:
+        """Fast path: base64 audio of an audio message without a full parse (None if not audio)."""
+        return None
+
+    def parse(self, msg) -> Optional[Dict]:
+        raise NotImplementedError
+
+
+class ElevenLabsProvider(RealtimeProvider):
+    """ElevenLabs Conversational AI (convai websocket)."""
+
+    name = "elevenlabs"
+
+    def prewarm(self, keep_warm_seconds: float = 0.0):
+        elevenlabs_pool.fill(ELEVENLABS_AGENT_ID, keep_warm_seconds)
+
+    async def connect(self):
+        # Se conecta siempre al agente por defecto (el de la stage aún no se conoce)
+        # Si la sesión se pre-calentó, hay un socket ya conectado en el pool
+        ws = elevenlabs_pool.checkout(ELEVENLABS_AGENT_ID)
+        if ws:
+            print(f"✅ Using pre-warmed ElevenLabs connection: {ELEVENLABS_AGENT_ID}")
+            return ws
+        ws = await connect_elevenlabs_ws(ELEVENLABS_AGENT_ID)
+        print(f"✅ Connected to ElevenLabs Agent: {ELEVENLABS_AGENT_ID}")
+        return ws
+
+    def initiation_frames(self, setup: Dict) -> List[str]:
+        payload = {
+            "type": "conversation_initiation_client_data",
+            "conversation_config_override": {
+                "agent": {
+                    "prompt": {
+                        "prompt": setup["master_prompt"]
+                    },
+                    "first_message": FIRST_MESSAGE,
+                    "language": "es"
+                },
+                "tts": {
+                    "voice_id": setup["voice_id"]
+                }
+            },
+            "custom_llm_extra_body": {
+                "temperature": 0.7,
+                "max_tokens": 150
+            }
+        }
+        return [dumps(payload)]
+
+    def user_audio_frame(self, audio_b64: str) -> str:
+        # ElevenLabs espera: { "user_audio_chunk": "BASE64..." }
+        return elevenlabs_user_audio_frame(audio_b64)
+
+    def audio_payload(self, msg) -> Optional[str]:
+        return elevenlabs_audio_payload(msg)
+
+    def parse(self, msg) -> Optional[Dict]:
+        data = loads(msg)
+        el_type = data.get("type")
+
+        if el_type == "audio":
+            return {"type": "audio", "audio": data["audio_event"]["audio_base_64"]}
+        if el_type == "conversation_initiation_metadata":
+            metadata = data["conversation_initiation_metadata_event"]
+            return {
+                "type": "metadata",
+                "conversation_id": metadata["conversation_id"],
+                "input_format": metadata.get("user_input_audio_format"),
+                "output_format": metadata.get("agent_output_audio_format"),
+            }
+        if el_type == "user_transcript":
+            return {"type": "user_transcript", "text": data["user_transcription_event"]["user_transcript"]}
+        if el_type == "agent_response":
+            return {"type": "agent_transcript", "text": data["agent_response_event"]["agent_response"]}
+        # ElevenLabs manda "interruption" cuando el usuario interrumpe
+        if el_type == "interruption":
+            return {"type": "interruption"}
+        return None
+
+
+class FakeProvider(ElevenLabsProvider):
+    """
+    Local scripted provider speaking the ElevenLabs protocol, for profiling and
+    load tests without a paid upstream. Runs in-process, or against a fake
+    server (python -m app.services.realtime_fake_provider) when FAKE_PROVIDER_URL is set.
+    """
+
+    name = "fake"
+
+    def prewarm(self, keep_warm_seconds: float = 0.0):
+        pass
+
+    async def connect(self):
+        if FAKE_PROVIDER_URL:
+            ws = await websockets.connect(FAKE_PROVIDER_URL)
+            print(f"✅ Connected to fake provider at {FAKE_PROVIDER_URL}")
+            return ws
+        print("✅ Using in-process fake provider")
+        return FakeElevenLabsSocket()
+
+
+# OpenAI Realtime API
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_REALTIME_WS_URL = "wss://api.openai.com/v1/realtime?model=gpt-realtime"
+# Only gpt-4o-transcribe / gpt-4o-mini-transcribe return token logprobs (asr_clarity.py)
+OPENAI_TRANSCRIPTION_MODEL = os.getenv("OPENAI_TRANSCRIPTION_MODEL", "whisper-1")
+
+
+class OpenAIProvider(RealtimeProvider):
+    """OpenAI Realtime API (pcm16 at 24 kHz in both directions)."""
+
+    name = "openai"
+    input_format = "pcm_24000"
+    output_format = "pcm_24000"
+
+    def __init__(self):
+        # True while a response is streaming audio (speech_started only interrupts then)
+        self._responding = False
+
+    async def connect(self):
+        ws = await websockets.connect(
+            OPENAI_REALTIME_WS_URL,
+            extra_headers={
+                "Authorization": f"Bearer {OPENAI_API_KEY}",
+                "OpenAI-Beta": "realtime=v1"
+            }
+        )
+        print("✅ Connected to OpenAI Realtime API")
+        return ws
+
+    def initiation_frames(self, setup: Dict) -> List[str]:
+        session_config = {
+            "type": "session.update",
+            "session": {
+                "instructions": setup["master_prompt"],
+                "turn_detection": {
+                    "type": "semantic_vad",
+                    "eagerness": "medium", # alternativas: low, high, auto (controla como de dispuesto está el modelo a interrumpir al usuario. auto=medium)
+                    "create_response": True,
+                    "interrupt_response": True
+                },
+                "voice": "coral",
+                "temperature": 1,
+                "speed": 1.0,
+                "max_response_output_tokens": 4096,
+                "modalities": ["text", "audio"],
+                "input_audio_format": "pcm16",
+                "output_audio_format": "pcm16",
+                "input_audio_transcription": {
+                    "model": OPENAI_TRANSCRIPTION_MODEL,
+                    "prompt": "Ehhh, mmm hola buenas te voy a hablar de, ehh negocioss y mmm, bueno pues eso",
+                    "language": "es"
+                },
+                "input_audio_noise_reduction": {
+                    "type": "near_field"
+                },
+                "include": [
+                    "item.input_audio_transcription.logprobs"
+                ],
+            }
+        }
+        initial_response = {
+            "type": "response.create",
+            "response": {
+                "modalities": ["text", "audio"],
+                "instructions": "Saluda al usuario cordialmente y pregúntale en qué le puedes ayudar hoy." # Instrucción específica para este primer turno
+            }
+        }
+        return [dumps(session_config), dumps(initial_response)]
+
+    def user_audio_frame(self, audio_b64: str) -> str:
+        return '{"type":"input_audio_buffer.append","audio":"' + audio_b64 + '"}'
+
+    def parse(self, msg) -> Optional[Dict]:
+        data = loads(msg)
+        msg_type = data.get("type")
+
+        if msg_type == "response.audio.delta":
+            self._responding = True
+            return {"type": "audio", "audio": data.get("delta")}
+        if msg_type in ("response.audio.done", "response.done"):
+            self._responding = False
+            return None
+        if msg_type == "session.created":
+            return {"type": "metadata", "conversation_id": data.get("session", {}).get("id")}
+        if msg_type == "conversation.item.input_audio_transcription.completed":
+            transcript = (
+                data.get("transcript") or
+                data.get("item", {}).get("transcript") or
+                data.get("item", {}).get("input_audio_transcription", {}).get("transcript")
+            )
+            if not transcript:
+                return None
+            logprobs = [token["logprob"] for token in data.get("logprobs") or [] if "logprob" in token]
+            return {"type": "user_transcript", "text": transcript, "logprobs": logprobs}
+        if msg_type == "response.audio_transcript.done":
+            transcript = data.get("transcript", "")
+            return {"type": "agent_transcript", "text": transcript} if transcript else None
+        # semantic_vad with interrupt_response: the user started talking over the agent
+        if msg_type == "input_audio_buffer.speech_started":
+            if self._responding:
+                self._responding = False
+                return {"type": "interruption"}
+            return None
+        if msg_type == "error":
+            print(f"⚠️ [OpenAI] {data.get('error')}")
+        return None
+
+
+PROVIDERS = {
+    "elevenlabs": ElevenLabsProvider,
+    "openai": OpenAIProvider,
+    "fake": FakeProvider,
+}
+
+
+def get_provider(name: str = None) -> RealtimeProvider:
+    """New adapter for the configured (or given) provider."""
+    name = name or REALTIME_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown realtime provider '{name}' (expected one of {', '.join(PROVIDERS)})")
+    return PROVIDERS[name]()
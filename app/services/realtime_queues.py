@@ -0,0 +1,142 @@
+# Bounded outbound queues for the realtime bridge
+# Each direction of the bridge writes into one of these instead of calling the
+# socket directly, so a slow browser or a slow upstream only backs up its own
+# queue and never stalls the coroutine reading from the other side.
+
+import asyncio
+import os
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Maximum frames waiting per direction
+REALTIME_QUEUE_MAX_FRAMES = int(os.getenv("REALTIME_QUEUE_MAX_FRAMES", "50"))
+# Maximum time to drain a queue when the session stops (seconds)
+REALTIME_QUEUE_DRAIN_TIMEOUT = 2.0
+
+
+class OutboundQueue:
+    """
+    Bounded queue in front of a websocket send function, with its own sender task.
+
+    Overflow policy: when the queue is full, the oldest queued audio frame is
+    dropped to make room. Control and transcript frames are never dropped; if
+    the queue is full of them, put() waits for space (backpressure).
+
+    Audio frames can carry the number of audio bytes they hold, so the caller can
+    tell how much audio was dropped (dropped_audio_bytes) instead of played.
+    """
+
+    def __init__(self, name: str, send: Callable[..., Awaitable], maxsize: int = REALTIME_QUEUE_MAX_FRAMES,
+                 on_error: Optional[Callable[[], Awaitable]] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self._send = send
+        self._on_error = on_error
+
+        self._frames = deque()  # (frame, is_audio, audio_bytes)
+        self._audio_frames = 0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.sent = 0
+        self.dropped_audio = 0
+        self.dropped_audio_bytes = 0   # by overflow or discard_audio()
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def put(self, frame, is_audio: bool = False, audio_bytes: int = 0):
+        while len(self._frames) >= self.maxsize and not self._closed:
+            if self._audio_frames:
+                self._drop_oldest_audio()
+                break
+            self._not_full.clear()
+            await self._not_full.wait()
+
+        if self._closed:
+            return
+
+        self._frames.append((frame, is_audio, audio_bytes))
+        if is_audio:
+            self._audio_frames += 1
+        self.max_depth = max(self.max_depth, len(self._frames))
+        self._not_empty.set()
+
+    def discard_audio(self) -> int:
+        """Drop every queued audio frame (e.g. on interruption). Returns how many."""
+        if not self._audio_frames:
+            return 0
+        dropped = self._audio_frames
+        self.dropped_audio_bytes += sum(item[2] for item in self._frames if item[1])
+        self._frames = deque(item for item in self._frames if not item[1])
+        self._audio_frames = 0
+        self._not_full.set()
+        return dropped
+
+    def _drop_oldest_audio(self):
+        for i, (_, is_audio, audio_bytes) in enumerate(self._frames):
+            if is_audio:
+                del self._frames[i]
+                self._audio_frames -= 1
+                self.dropped_audio += 1
+                self.dropped_audio_bytes += audio_bytes
+                return
+
+    async def _run(self):
+        try:
+            while True:
+                if not self._frames:
+                    if self._closed:
+                        return
+                    self._not_empty.clear()
+                    await self._not_empty.wait()
+                    continue
+
+                frame, is_audio, _ = self._frames.popleft()
+                if is_audio:
+                    self._audio_frames -= 1
+                self._not_full.set()
+                await self._send(frame)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Outbound queue '{self.name}' send failed: {e}")
+            self._closed = True
+            self._not_full.set()
+            if self._on_error:
+                asyncio.ensure_future(self._on_error())
+
+    async def close(self, timeout: float = REALTIME_QUEUE_DRAIN_TIMEOUT):
+        """Stop accepting frames, send what is queued (up to `timeout`) and stop the sender."""
+        self._closed = True
+        self._not_empty.set()
+        self._not_full.set()
+        if self._task is None or self._task.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Outbound queue '{self.name}' not drained after {timeout}s, dropping {self.depth} frames")
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped_audio": self.dropped_audio,
+        }
@@ -1,26 +1,98 @@
-# this program will be imported in realtime_bridge and added to the stop() method (????)
+# Session-level hooks of the realtime bridge (realtime_bridge.py)
+# stop_process() runs the post-call pipeline when a call ends: it closes the
+# conversation, scores and profiles it, and tells the browser it was scored.
+#
+# The pipeline makes synchronous LLM calls (call_gpt) for seconds at a time, so
+# it never runs on the event loop of the process serving the audio: it goes to
+# a pool of POST_CALL_WORKERS worker processes, each with its own event loop
+# and DB pool. The bridge just awaits the result.
 
 import asyncio
-import base64
-import numpy as np
 import json
-from app.services.conversations_service import close_conversation, get_conversation_status
-from app.services.messages_service import update_user_course_progress
-from app.services.scoring_service import scoring
-from app.services.profiling_service import profiling, general_profiling
-from scoring_scripts.get_user_profile import user_clasiffier
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
 
-async def stop_process(user_id, conversation_id, frontend_ws, course_id, stage_id, conversation_id_elevenlabs, agent_id):
+from dotenv import load_dotenv
+
+from app.services.conversations_service import close_conversation
+from app.services.messages_service import get_verified_transcript, update_user_course_progress
+from app.services.audio_processing import pcm16_from_b64, pcm16_rms
+
+load_dotenv(override=True)
+
+# Worker processes running the post-call pipeline (per web worker)
+POST_CALL_WORKERS = int(os.getenv("POST_CALL_WORKERS", "2"))
+
+_post_call_executor: Optional[Executor] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def load_post_call_pipeline():
+    # Scoring/profiling pull in openai, pandas...: se importan al usarse
+    # para que el gateway realtime (app/realtime_main.py) arranque ligero
+    from app.services.scoring_service import scoring
+    from app.services.profiling_service import profiling, general_profiling
+    from scoring_scripts.get_user_profile import user_clasiffier
+    return scoring, profiling, general_profiling, user_clasiffier
+
+def _init_post_call_worker():
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    load_post_call_pipeline()
+
+def post_call_executor() -> Executor:
+    """Pool of post-call worker processes (started on first use)."""
+    global _post_call_executor
+    if _post_call_executor is None:
+        # spawn: the workers must not inherit the parent's event loop and DB pool
+        _post_call_executor = ProcessPoolExecutor(
+            max_workers=POST_CALL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_post_call_worker,
+        )
+    return _post_call_executor
+
+def start_post_call_workers():
+    """Start the worker processes now, so the first call to end doesn't wait for them."""
+    post_call_executor().submit(int)
+
+def shutdown_post_call_workers():
+    global _post_call_executor
+    if _post_call_executor is not None:
+        _post_call_executor.shutdown(wait=True, cancel_futures=True)
+        _post_call_executor = None
+
+async def post_call_pipeline(user_id, conversation_id, course_id, stage_id, conversation_id_elevenlabs, agent_id,
+                             transcript=None, pauses=None, asr_clarity=None):
+    scoring, profiling, general_profiling, user_clasiffier = load_post_call_pipeline()
 
     await close_conversation(user_id, conversation_id, conversation_id_elevenlabs, agent_id) 
+    # Transcript kept by the bridge (checked against the DB), read once for both
+    transcript = await get_verified_transcript(conversation_id, transcript)
     ## scoring conversation if conver finished
-    objetivo = await scoring(conversation_id, course_id, stage_id)
-    await profiling(conversation_id, course_id, stage_id)
+    objetivo = await scoring(conversation_id, course_id, stage_id, transcript, pauses, asr_clarity)
+    await profiling(conversation_id, course_id, stage_id, transcript)
     await general_profiling(user_id)
     await user_clasiffier(user_id)
 
     if objetivo:
         await update_user_course_progress(user_id, course_id)
+
+def run_post_call_pipeline(*args, **kwargs):
+    """Entry point in a worker process: runs the pipeline on the worker's own loop."""
+    return _worker_loop.run_until_complete(post_call_pipeline(*args, **kwargs))
+
+async def stop_process(user_id, conversation_id, frontend_ws, course_id, stage_id, conversation_id_elevenlabs, agent_id,
+                       transcript=None, pauses=None, asr_clarity=None):
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        post_call_executor(),
+        run_post_call_pipeline,
+        user_id, conversation_id, course_id, stage_id, conversation_id_elevenlabs, agent_id,
+        transcript, pauses, asr_clarity,
+    )
     # notify frontend that conversation is closed and scored
     await frontend_ws.send_text(json.dumps({"type": "conversation.scoring.completed", "conversation_id": str(conversation_id)}))
 
@@ -33,6 +105,4 @@ async def user_msg_processed(user_id, conversation_id):
     pass
 
 def is_non_silent(audio_b64, threshold=0.05):
-    pcm = np.frombuffer(base64.b64decode(audio_b64), dtype=np.int16)
-    rms = np.sqrt(np.mean((pcm / 32768.0) ** 2))
-    return rms > threshold
+    return pcm16_rms(pcm16_from_b64(audio_b64)) > threshold
@@ -0,0 +1,88 @@
+# Admission control for /ws/audio
+# Every live session holds two websockets, two coroutines and DB work, so each
+# worker only admits REALTIME_MAX_SESSIONS at a time; beyond that new sessions
+# are rejected straight away (close code 1013, "try again later") instead of
+# degrading every live call. A reaper stops sessions whose frontend has sent
+# nothing for REALTIME_IDLE_TIMEOUT_SECONDS (abandoned tab, upstream still open).
+
+import asyncio
+import os
+import time
+from typing import Dict
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+REALTIME_MAX_SESSIONS = int(os.getenv("REALTIME_MAX_SESSIONS", "20"))
+REALTIME_IDLE_TIMEOUT_SECONDS = float(os.getenv("REALTIME_IDLE_TIMEOUT_SECONDS", "60"))
+REALTIME_REAPER_INTERVAL_SECONDS = 10
+
+# WebSocket close code 1013: Try Again Later
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class SessionRegistry:
+    """
+    Live realtime sessions of this worker process.
+
+    Sessions are bridges exposing `last_activity` (monotonic seconds of the last
+    frame received from the frontend) and an async `stop()`.
+    """
+
+    def __init__(self, max_sessions: int = REALTIME_MAX_SESSIONS,
+                 idle_timeout: float = REALTIME_IDLE_TIMEOUT_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[int, object] = {}
+        self._reaper = None
+
+        # Stats
+        self.admitted = 0
+        self.rejected = 0
+        self.reaped = 0
+        self.peak = 0
+
+    @property
+    def active(self) -> int:
+        return len(self._sessions)
+
+    def admit(self, session) -> bool:
+        """Register a session. Returns False (and counts a reject) if the worker is full."""
+        if len(self._sessions) >= self.max_sessions:
+            self.rejected += 1
+            return False
+        self._sessions[id(session)] = session
+        self.admitted += 1
+        self.peak = max(self.peak, len(self._sessions))
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.ensure_future(self._reap())
+        return True
+
+    def release(self, session):
+        self._sessions.pop(id(session), None)
+
+    async def _reap(self):
+        while self._sessions:
+            await asyncio.sleep(REALTIME_REAPER_INTERVAL_SECONDS)
+            now = time.monotonic()
+            for session in list(self._sessions.values()):
+                if now - session.last_activity > self.idle_timeout:
+                    print(f"🧹 Reaping idle realtime session (no frontend frames for {self.idle_timeout:.0f}s)")
+                    self.reaped += 1
+                    self.release(session)
+                    asyncio.ensure_future(session.stop())
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "max_sessions": self.max_sessions,
+            "peak": self.peak,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "reaped": self.reaped,
+        }
+
+
+# One registry per worker process
+session_registry = SessionRegistry()
@@ -1,21 +1,56 @@
 # this program will be imported in realtime_bridge and added to the stop() method (????)
 import pandas as pd
-import psycopg2
 import os
 from dotenv import load_dotenv
-from app.services.conversations_service import set_conversation_scoring
+from app.services.conversations_service import (
+    get_conversation_asr_clarity, get_conversation_details, get_conversation_pauses, set_conversation_scoring,
+)
 from scoring_scripts.get_conver_scores import get_conver_scores
+from scoring_scripts.get_conver_scores_packed import PACKED_TOKEN_BUDGET, get_conver_scores_packed
 from app.services.messages_service import get_conversation_transcript
 
 load_dotenv(override=True)
 
-async def scoring(conv_id, course_id, stage_id):
-    transcript = await get_conversation_transcript(conv_id)
+async def scoring(conv_id, course_id, stage_id, transcript=None, pauses=None, asr_clarity=None):
+    # The realtime bridge passes the transcript and audio metrics it already has; rescoring reads them
+    if transcript is None:
+        transcript = await get_conversation_transcript(conv_id)
+    if pauses is None:
+        pauses = await get_conversation_pauses(conv_id)
+    if asr_clarity is None:
+        asr_clarity = await get_conversation_asr_clarity(conv_id)
 
     if not transcript:
         print(f"No messages found for conversation_id: {conv_id}")
         return
-    scoring = await get_conver_scores(transcript, course_id, stage_id)
+    scoring = await get_conver_scores(transcript, course_id, stage_id, pausas=pauses, claridad_asr=asr_clarity)
+    return await save_scoring(conv_id, scoring)
+
+async def bulk_scoring(conv_ids, *, token_budget=PACKED_TOKEN_BUDGET):
+    """
+    Offline scoring for backfills: packs several short conversations per LLM
+    request (see get_conver_scores_packed). Returns {conv_id: objetivo}.
+    """
+    conversations = []
+    for conv_id in conv_ids:
+        details = await get_conversation_details(conv_id)
+        transcript = await get_conversation_transcript(conv_id)
+        if not details or not transcript:
+            print(f"No messages found for conversation_id: {conv_id}")
+            continue
+        conversations.append({
+            "conversation_id": conv_id,
+            "transcript": transcript,
+            "course_id": details[0]["course_id"],
+            "stage_id": details[0]["stage_id"],
+            "pausas": await get_conversation_pauses(conv_id),
+            "claridad_asr": await get_conversation_asr_clarity(conv_id),
+        })
+
+    results = await get_conver_scores_packed(conversations, token_budget=token_budget)
+    return {conv_id: await save_scoring(conv_id, scoring) for conv_id, scoring in results.items()}
+
+async def save_scoring(conv_id, scoring):
     scores_detail = scoring["detalle"]
     feedback = scoring["feedback"]
     puntuacion_global = scoring["puntuacion_global"]
@@ -27,6 +62,7 @@ async def scoring(conv_id, course_id, stage_id):
     keythemes_scoring = scores_detail.get("cobertura")
     indexofquestions_scoring = scores_detail.get("preguntas")
     rhythm_scoring = scores_detail.get("ppm")
+    pauses_scoring = scores_detail.get("pausas")
 
     # Get feedback
     fillerwords_feedback = feedback.get("muletillas_pausas")
@@ -35,6 +71,7 @@ async def scoring(conv_id, course_id, stage_id):
     keythemes_feedback = feedback.get("cobertura")
     indexofquestions_feedback = feedback.get("preguntas")
     rhythm_feedback = feedback.get("ppm")
+    pauses_feedback = feedback.get("pausas")
 
     print("\n📊 Computed Scores:")
     print(f"   Fillerwords: {fillerwords_scoring}")
@@ -43,6 +80,10 @@ async def scoring(conv_id, course_id, stage_id):
     print(f"   Key Themes: {keythemes_scoring}")
     print(f"   Index of Questions: {indexofquestions_scoring}")
     print(f"   Rhythm: {rhythm_scoring}")
+    print(f"   Pauses: {pauses_scoring}")
+    if scoring.get("claridad_asr"):
+        asr = scoring["claridad_asr"]
+        print(f"   Clarity (ASR): {asr['puntuacion']} ({'used' if asr['fiable'] else 'low confidence, LLM used'})")
     print(f"   Objective Accomplished: {objetivo}\n")
 
     # Update database
@@ -61,7 +102,9 @@ async def scoring(conv_id, course_id, stage_id):
         rhythm_feedback,
         puntuacion_global,
         objetivo,
-        conv_id
+        conv_id,
+        pauses_scoring,
+        pauses_feedback,
     )
 
     return objetivo
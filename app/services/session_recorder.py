@@ -0,0 +1,116 @@
+# Frame recorder for realtime sessions
+# When REALTIME_RECORD_DIR is set, every frame that passes through the bridge is
+# appended to a per-session binary log, in both directions and on both links,
+# with its monotonic time since the session started. scripts/replay_session.py
+# plays a log back through the bridge offline.
+#
+# File layout: RECORDING_MAGIC, then records of
+#   | t: float64 seconds | direction: uint8 | kind: uint8 | length: uint32 | payload |
+# (network byte order). Meta records carry JSON (provider, conversation id...).
+
+import json
+import os
+import struct
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+REALTIME_RECORD_DIR = os.getenv("REALTIME_RECORD_DIR")
+
+RECORDING_MAGIC = b"RTREC1\n"
+RECORD_HEADER = struct.Struct("!dBBI")
+
+# Directions
+FRONTEND_IN = 0    # browser -> bridge
+FRONTEND_OUT = 1   # bridge -> browser
+UPSTREAM_IN = 2    # provider -> bridge
+UPSTREAM_OUT = 3   # bridge -> provider
+META = 4
+
+# Kinds
+KIND_TEXT = 0
+KIND_BINARY = 1
+KIND_META = 2
+
+
+class SessionRecorder:
+    """Append-only frame log of one bridge session."""
+
+    def __init__(self, record_dir: str, provider: str, binary_audio: bool):
+        os.makedirs(record_dir, exist_ok=True)
+        self.record_dir = record_dir
+        self.stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(record_dir, f"{self.stamp}_{uuid.uuid4().hex[:8]}.rtrec")
+        self._file = open(self.path, "ab", buffering=64 * 1024)
+        self._file.write(RECORDING_MAGIC)
+        self._t0 = time.monotonic()
+        self.frames = 0
+        self.meta({"provider": provider, "binary_audio": binary_audio, "started_at": datetime.now().isoformat()})
+
+    def record(self, direction: int, frame):
+        if self._file is None:
+            return
+        if isinstance(frame, str):
+            kind, payload = KIND_TEXT, frame.encode()
+        else:
+            kind, payload = KIND_BINARY, bytes(frame)
+        self._file.write(RECORD_HEADER.pack(time.monotonic() - self._t0, direction, kind, len(payload)))
+        self._file.write(payload)
+        self.frames += 1
+
+    def meta(self, data: Dict):
+        if self._file is None:
+            return
+        payload = json.dumps(data, default=str).encode()
+        self._file.write(RECORD_HEADER.pack(time.monotonic() - self._t0, META, KIND_META, len(payload)))
+        self._file.write(payload)
+
+    def close(self, conversation_id=None) -> Optional[str]:
+        """Flush and close the log; it is renamed after the conversation when known."""
+        if self._file is None:
+            return self.path
+        self._file.close()
+        self._file = None
+        if conversation_id:
+            path = os.path.join(self.record_dir, f"{self.stamp}_{conversation_id}.rtrec")
+            os.replace(self.path, path)
+            self.path = path
+        print(f"📼 Session recorded: {self.path} ({self.frames} frames)")
+        return self.path
+
+
+def create_recorder(provider: str, binary_audio: bool) -> Optional[SessionRecorder]:
+    """Recorder for a new session, or None when recording is off."""
+    if not REALTIME_RECORD_DIR:
+        return None
+    try:
+        return SessionRecorder(REALTIME_RECORD_DIR, provider, binary_audio)
+    except OSError as e:
+        print(f"⚠️ Session recording disabled: {e}")
+        return None
+
+
+def read_recording(path: str) -> Iterator[Tuple[float, int, int, object]]:
+    """Yield (t, direction, kind, frame) records; text frames as str, meta as dict."""
+    with open(path, "rb") as f:
+        if f.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return  # end of file (or a record cut short by a crash)
+            t, direction, kind, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            if kind == KIND_TEXT:
+                yield t, direction, kind, payload.decode()
+            elif kind == KIND_META:
+                yield t, direction, kind, json.loads(payload)
+            else:
+                yield t, direction, kind, payload
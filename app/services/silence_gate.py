@@ -0,0 +1,134 @@
+# Silence suppression on the frontend -> upstream audio path
+# While the user listens to the agent the browser keeps streaming silence; the
+# gate holds those chunks back instead of forwarding them to ElevenLabs.
+#
+# - Hysteresis: the gate opens above SILENCE_GATE_OPEN_RMS (same RMS measure as
+#   realtime_service.is_non_silent) and only starts closing below the lower
+#   SILENCE_GATE_CLOSE_RMS, so it doesn't flap on quiet syllables. The defaults are
+#   below is_non_silent's 0.05: quiet microphones stay under it even while
+#   talking (grabacion.wav peaks at ~0.045), and clipping speech is worse than
+#   forwarding some noise. The VAD (audio_processing) uses the same levels.
+# - Pre-roll: the last SILENCE_GATE_PREROLL_MS of suppressed audio is kept and sent
+#   ahead of the chunk that opens the gate, so speech onsets are never clipped.
+# - Hangover: after the level drops the gate stays open SILENCE_GATE_HANGOVER_MS,
+#   long enough for the upstream turn detection to see the end-of-turn silence.
+# - Keepalive: while closed, one chunk every SILENCE_GATE_KEEPALIVE_MS is still
+#   forwarded so the upstream session doesn't go idle.
+# All times are measured in stream samples, not wall time.
+
+import os
+from collections import deque
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.services.audio_processing import DEFAULT_SAMPLE_RATE, SPEECH_CLOSE_RMS, SPEECH_OPEN_RMS, pcm16_rms
+
+load_dotenv(override=True)
+
+SILENCE_GATE_ENABLED = os.getenv("SILENCE_GATE_ENABLED", "1") not in ("0", "false", "False")
+SILENCE_GATE_OPEN_RMS = SPEECH_OPEN_RMS
+SILENCE_GATE_CLOSE_RMS = SPEECH_CLOSE_RMS
+SILENCE_GATE_PREROLL_MS = int(os.getenv("SILENCE_GATE_PREROLL_MS", "300"))
+SILENCE_GATE_HANGOVER_MS = int(os.getenv("SILENCE_GATE_HANGOVER_MS", "1500"))
+SILENCE_GATE_KEEPALIVE_MS = int(os.getenv("SILENCE_GATE_KEEPALIVE_MS", "1000"))
+
+
+class SilenceGate:
+    """
+    Decides, chunk by chunk, which upstream audio frames are forwarded.
+
+    process() takes the decoded samples of a chunk and its already-encoded
+    upstream frame, and returns the frames to send now (possibly none, possibly
+    the pre-roll plus the current one).
+    """
+
+    def __init__(self, sample_rate: int = DEFAULT_SAMPLE_RATE, enabled: bool = SILENCE_GATE_ENABLED,
+                 open_rms: float = SILENCE_GATE_OPEN_RMS, close_rms: float = SILENCE_GATE_CLOSE_RMS,
+                 preroll_ms: int = SILENCE_GATE_PREROLL_MS, hangover_ms: int = SILENCE_GATE_HANGOVER_MS,
+                 keepalive_ms: int = SILENCE_GATE_KEEPALIVE_MS):
+        self.enabled = enabled
+        self.open_rms = open_rms
+        self.close_rms = min(close_rms, open_rms)
+        self.preroll_ms = preroll_ms
+        self.hangover_ms = hangover_ms
+        self.keepalive_ms = keepalive_ms
+        self.set_sample_rate(sample_rate)
+
+        self.is_open = False
+        self._quiet_samples = 0           # samples below close_rms since the gate was last loud
+        self._since_forward = 0           # samples since the last forwarded frame
+        self._preroll = deque()           # (frame, n_samples) held back while closed
+        self._preroll_samples = 0
+
+        # Stats
+        self.total_samples = 0
+        self.suppressed_samples = 0
+        self.keepalives = 0
+
+    def set_sample_rate(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self._preroll_max = sample_rate * self.preroll_ms // 1000
+        self._hangover = sample_rate * self.hangover_ms // 1000
+        self._keepalive = sample_rate * self.keepalive_ms // 1000
+
+    def process(self, pcm: np.ndarray, frame) -> list:
+        n = len(pcm)
+        self.total_samples += n
+        if not self.enabled:
+            return [frame]
+
+        rms = pcm16_rms(pcm)
+
+        if self.is_open:
+            if rms > self.close_rms:
+                self._quiet_samples = 0
+            else:
+                self._quiet_samples += n
+                if self._quiet_samples >= self._hangover:
+                    self.is_open = False
+            if self.is_open:
+                return self._forward([frame])
+            # Closing chunk: treat it like any other silent chunk below
+
+        elif rms > self.open_rms:
+            self.is_open = True
+            self._quiet_samples = 0
+            frames = [f for f, _ in self._preroll] + [frame]
+            self.suppressed_samples -= self._preroll_samples
+            self._preroll.clear()
+            self._preroll_samples = 0
+            return self._forward(frames)
+
+        # Gate closed: hold the chunk back (pre-roll) unless a keepalive is due
+        self._since_forward += n
+        if self._since_forward >= self._keepalive:
+            # The held-back chunks are older than this one: drop them to keep order
+            self.keepalives += 1
+            self._preroll.clear()
+            self._preroll_samples = 0
+            return self._forward([frame])
+
+        self.suppressed_samples += n
+        self._preroll.append((frame, n))
+        self._preroll_samples += n
+        while self._preroll and self._preroll_samples - self._preroll[0][1] >= self._preroll_max:
+            _, dropped = self._preroll.popleft()
+            self._preroll_samples -= dropped
+        return []
+
+    def _forward(self, frames: list) -> list:
+        self._since_forward = 0
+        return frames
+
+    @property
+    def suppressed_fraction(self) -> float:
+        return self.suppressed_samples / self.total_samples if self.total_samples else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "audio_seconds": round(self.total_samples / self.sample_rate, 2),
+            "suppressed_seconds": round(self.suppressed_samples / self.sample_rate, 2),
+            "suppressed_fraction": round(self.suppressed_fraction, 3),
+            "keepalives": self.keepalives,
+        }
@@ -0,0 +1,15 @@
+-- Realtime session metrics (user-035)
+-- Required by set_realtime_session_metrics(): apply before deploying the
+-- per-turn latency instrumentation. Idempotent: safe to run again.
+
+-- Per-conversation latency summary of the realtime bridge
+CREATE TABLE IF NOT EXISTS conversaapp.realtime_session_metrics (
+    conversation_id uuid PRIMARY KEY REFERENCES conversaapp.conversations,
+    time_to_first_audio_ms double precision,
+    turns integer,
+    interruptions integer,
+    response_p50_ms double precision,
+    response_p90_ms double precision,
+    summary jsonb,
+    created_at timestamptz DEFAULT now()
+);
@@ -0,0 +1,24 @@
+-- Audio-based scoring columns (user-045, user-046)
+-- Apply BEFORE deploying the pause scoring: set_conversation_scoring writes
+-- pauses_scoring/pauses_feedback ($16/$17) on every scoring, and
+-- set_realtime_session_metrics writes the pause_*/asr_* columns.
+-- Needs 001_realtime_session_metrics.sql. Idempotent: safe to run again on a
+-- database that already has part of it.
+
+-- Seller pauses measured on the live audio (user-045)
+ALTER TABLE conversaapp.realtime_session_metrics
+    ADD COLUMN IF NOT EXISTS pause_count integer,
+    ADD COLUMN IF NOT EXISTS pause_total_seconds double precision,
+    ADD COLUMN IF NOT EXISTS pause_longest_seconds double precision,
+    ADD COLUMN IF NOT EXISTS speech_seconds double precision;
+
+ALTER TABLE conversaapp.scoring_by_conversation
+    ADD COLUMN IF NOT EXISTS pauses_scoring double precision,
+    ADD COLUMN IF NOT EXISTS pauses_feedback text;
+
+-- Transcription confidence of the seller (user-046)
+ALTER TABLE conversaapp.realtime_session_metrics
+    ADD COLUMN IF NOT EXISTS asr_turns integer,
+    ADD COLUMN IF NOT EXISTS asr_tokens integer,
+    ADD COLUMN IF NOT EXISTS asr_mean_logprob double precision,
+    ADD COLUMN IF NOT EXISTS asr_low_fraction double precision;
@@ -1,5 +1,6 @@
 import asyncio
 import json
+import math
 import os
 import re
 import string
@@ -19,9 +20,13 @@ from app.services.courses_service import get_courses_details
 from app.services.db import execute_query_one
 from app.utils.call_gpt import call_gpt
 from app.utils.openai_client import get_openai_client
+from scoring_scripts.scoring_weights import PESOS, pesos_efectivos
 
 DEFAULT_MODEL = "gpt-4.1-nano-2025-04-14"
 
+# Número de llamadas a GPT para votar si se cumplió el objetivo
+NUM_LLAMADAS_OBJETIVO = 5
+
 
 async def get_key_themes(course_id, stage_id):
     query = """ 
@@ -36,7 +41,7 @@ async def get_key_themes(course_id, stage_id):
 def calcular_muletillas(transcript, duracion=None, muletillas=None):
     if muletillas is None:
         muletillas = ["eh", "ehh", "ehhh", "ehhhh", "ehhhhh", "he", "hee", "ehm", "ehmm", "em", "emm", "emmm", "emmmm", "eeem", "eeemm", "e-eh", "hem", "hemm", "uh", "uhh", "uhhh", "uhhhh", "uhhhhh", "uhm", "uhmm", "umm", "ummm", "ummmm", "umh", "hum", "humm", "hummm", "humn", "mmm", "mmmm", "mmmmm", "mmmh", "mmmhh", "mmh", "mm-hm", "mhm", "m-hm", "mjm", "mjum", "m-jm", "ajá", "aja", "ahá", "aha", "aham", "ajam", "ah", "ahh", "ahhh", "ahhhh", "ahhhhh", "oh", "ohh", "ohhh", "ohhhh", "ooh", "oooh", "oho", "o-oh", "wow", "wooo", "wooow", "wou", "wow", "guau", "guaau", "ala", "alaaa", "hala", "halaaa", "uala", "wala", "huala", "anda", "andaa", "andaaa", "ostras", "ostra", "ostia", "ostias", "joder", "jo", "joo", "jooo", "jopé", "jope", "jolines", "jobar", "ay", "ayy", "ayyy", "ayyyy", "ayyyyy", "ayayay", "aiaiai", "uf", "uff", "ufff", "uffff", "buf", "buff", "bufff", "pff", "pfff", "pffff", "pffft", "psch", "pscht", "tch", "tsch", "tsk", "tsk-tsk", "ts", "bah", "bahh", "bahhh", "bua", "buaa", "buaaa", "buaaaa", "puaj", "puaaj", "iugh", "eww", "ewww", "yuck", "yak", "bueno", "bueeeno", "bueeenooo", "buenooo", "buenop", "bue", "bwe", "pues", "pueees", "puuues", "pos", "ps", "pssss", "pus", "este", "esteee", "esteeee", "estem", "estemm", "estep", "osea", "o sea", "osease", "osa", "en plan", "enplan", "enplaaan", "tipo", "tipooo", "es que", "esque", "esqueee", "a ver", "aver", "a veeer", "averrr", "haber", "total", "en fin", "enfiin", "sabes", "saes", "viste", "visteee", "cierto", "claro", "claroo", "clarooo", "ya", "yaa", "yaaa", "yaaaa", "vale", "valee", "valep", "dale", "daale", "dalee", "ok", "okey", "okay", "oki", "okis", "okii", "oki-doki", "sip", "sipi", "sep", "se", "see", "seee", "sizi", "si", "sii", "siii", "siiii", "chi", "shi", "nop", "nopi", "nones", "nanai", "noo", "nooo", "noooo", "ne", "nee", "nel", "ey", "eyy", "eyyy", "hey", "heey", "ei", "eii", "oye", "oyeee", "oyeeee", "escucha", "mira", "mire", "che", "chee", "cheee", "bo", "boludo", "wey", "we", "güey", "guey", "chale", "no mames", "órale", "orale", "híjole", "hijole", "macho", "tío", "tio", "tronco", "cari", "gordi", "bebé", "ups", "uppps", "ops", "oops", "glup", "glups", "argh", "arg", "arghh", "grr", "grrr", "grrrr", "zzz", "zzzz", "muac", "muack", "mwah", "plas", "plof", "pum", "zas", "ja", "jaja", "jajaja", "jajajaja", "je", "jeje", "jejeje", "ji", "jiji", "jijiji", "jo", "jojo", "jojojo", "ju", "juju", "jujuju", "jsjs", "jsjsjs", "kkk", "lol", "lool", "omg", "wtf", "idk", "dunno", "meh", "bleh", "chist", "chis", "shh", "shhh", "shhhh", "silencio", "calla", "ea", "huy", "huyy", "uy", "uyy", "uyyy", "ejem", "ejemejem", "cof", "cofcof", "achís", "ñam", "ñamñam", "gluglu", "hic", "hip", "ding", "dong", "toc", "toc-toc", "ring", "bip", "clic", "click", "pim", "pam", "pum", "bla", "blabla", "blablabla", "etc", "pla", "pli", "plo", "pum", "zasca", "zas", "pimba", "va", "vaaa", "amos", "basicamente", ]
-        #pausas = ["ppausaa"] # La pausa deberá ser detectada por el whisper/gpt de turno   
+        # Las pausas se miden en el audio (ver calcular_pausas)
 
     repeticion_constante = False
     top_2_muletillas = ''
@@ -87,6 +92,40 @@ def calcular_muletillas(transcript, duracion=None, muletillas=None):
         "feedback": f"El porcentaje de muletillas empleadas es {porcentaje_muletillas:.2f}%, siendo las muletillas mas repetidas: {', '.join(m[0] for m in top_2_muletillas)} "
     }
     
+# ### Pausas
+# Medidas por el bridge realtime sobre el audio del vendedor (PauseDetector): silencios
+# de más de medio segundo dentro de un mismo turno. Sin LLM.
+PAUSAS_POR_MINUTO_OK = 6
+PAUSA_LARGA_SEGUNDOS = 2.0
+
+def calcular_pausas(pausas):
+    """None si la conversación no tiene medida de pausas (p.ej. anterior al bridge)."""
+    if not pausas or not pausas.get("speech_seconds"):
+        return None
+
+    por_minuto = pausas["count"] / (pausas["speech_seconds"] / 60)
+    penalizacion = max(0.0, por_minuto - PAUSAS_POR_MINUTO_OK) * 10
+    if pausas["longest_seconds"] > PAUSA_LARGA_SEGUNDOS:
+        penalizacion += 15
+    puntuacion = round(max(0, 100 - penalizacion), 1)
+
+    if pausas["count"] == 0:
+        feedback = "No se han detectado pausas largas en mitad de tus intervenciones."
+    else:
+        feedback = (f"Has hecho {pausas['count']} pausas en mitad de tus intervenciones "
+                    f"({por_minuto:.1f} por minuto hablado), la más larga de {pausas['longest_seconds']:.1f}s.")
+        if penalizacion:
+            feedback += " Intenta preparar las ideas antes de hablar para mantener un discurso fluido."
+
+    return {
+        "puntuacion": puntuacion,
+        "penalizacion": penalizacion,
+        "total_pausas": pausas["count"],
+        "pausas_por_minuto": round(por_minuto, 1),
+        "pausa_mas_larga": pausas["longest_seconds"],
+        "feedback": feedback
+    }
+
 # ### Claridad y complejidad
 def calcular_claridad(client: OpenAI, transcript, *, model: str = DEFAULT_MODEL):
 
@@ -107,6 +146,45 @@ def calcular_claridad(client: OpenAI, transcript, *, model: str = DEFAULT_MODEL)
 
     gpt_clarity = llamar_gpt_hasta_que_este_bien()
 
+    return puntuar_claridad(gpt_clarity)
+
+# Claridad a partir de la confianza del ASR (logprobs de la transcripción, ver
+# app/services/asr_clarity.py). Sustituye a la llamada a GPT cuando es fiable: hay
+# suficientes tokens y cubre casi todos los turnos del vendedor.
+CLARIDAD_ASR_MIN_TOKENS = 150
+CLARIDAD_ASR_MIN_COBERTURA = 0.9
+CLARIDAD_ASR_BAJA_OK = 0.02  # fracción de tokens dudosos que no penaliza
+
+def calcular_claridad_asr(claridad_asr, transcript):
+    """None si la conversación no tiene logprobs de la transcripción."""
+    if not claridad_asr or not claridad_asr.get("tokens"):
+        return None
+
+    turnos_vendedor = sum(1 for t in transcript if t["speaker"] == "vendedor")
+    cobertura = claridad_asr["turns"] / turnos_vendedor if turnos_vendedor else 0
+    fiable = claridad_asr["tokens"] >= CLARIDAD_ASR_MIN_TOKENS and cobertura >= CLARIDAD_ASR_MIN_COBERTURA
+
+    porcentaje_dudoso = 100 * claridad_asr["low_fraction"]
+    penalizacion = round(max(0.0, porcentaje_dudoso - 100 * CLARIDAD_ASR_BAJA_OK) * 10, 1)
+    puntuacion = max(0, 100 - penalizacion)
+
+    if penalizacion:
+        feedback = (f"El {porcentaje_dudoso:.1f}% de tus palabras se reconocieron con dificultad. "
+                    "Vocaliza y mantén un volumen constante para que tu mensaje llegue con claridad.")
+    else:
+        feedback = "Tu pronunciación se ha entendido con claridad durante toda la conversación."
+
+    return {
+        "puntuacion": puntuacion,
+        "penalizacion": penalizacion,
+        "porcentaje_dudoso": round(porcentaje_dudoso, 1),
+        "confianza_media": round(math.exp(claridad_asr["mean_logprob"]), 3),
+        "cobertura": round(cobertura, 2),
+        "fiable": fiable,
+        "feedback": feedback
+    }
+
+def puntuar_claridad(gpt_clarity):
     feedback = gpt_clarity['feedback']
 
     #number_of_turns_seller = len([t for t in transcript if t["speaker"] == "vendedor"])
@@ -140,6 +218,9 @@ def calcular_participacion_dinamica(client: OpenAI, transcript, *, model: str =
 
     gpt_escucha_activa = llamar_gpt_hasta_que_este_bien()
 
+    return puntuar_participacion(gpt_escucha_activa, transcript)
+
+def puntuar_participacion(gpt_escucha_activa, transcript):
     # Try to extract number from GPT response, default to 0 if pattern doesn't match
     match = re.search(r"escucha activa:\s*(\d+)", gpt_escucha_activa, re.IGNORECASE)
     if match:
@@ -251,7 +332,9 @@ async def calcular_cobertura_temas_json(client: OpenAI, transcript, course_id, s
 
     gpt_key_themes = llamar_gpt_hasta_que_este_bien()
 
+    return puntuar_cobertura(gpt_key_themes)
 
+def puntuar_cobertura(gpt_key_themes):
     num_temas_abordados = gpt_key_themes['n_temas_abordados']
     num_temas_olvidados = gpt_key_themes['n_temas_olvidados']
     num_temas_clave = num_temas_abordados + num_temas_olvidados
@@ -365,7 +448,11 @@ def calcular_ppm_variabilidad(transcript):
             ppms.append(ppm)
             total_palabras += palabras
             total_duracion += duracion
-    
+
+    # Sin duraciones (turnos sin voz detectada) no hay ritmo que medir
+    if not total_duracion:
+        return None
+
     media_ppm = total_palabras / (total_duracion / 60)
     variabilidad = np.std(ppms) if len(ppms) > 1 else 0
     
@@ -435,14 +522,16 @@ async def calcular_objetivo_principal(client: OpenAI, transcript, course_id, sta
                     print(f"Error después de {max_retries} intentos: {e}")
                     raise
 
-    NUM_CALLS = 5
     results = []
-    for _ in range(NUM_CALLS):
+    for _ in range(NUM_LLAMADAS_OBJETIVO):
         gpt_objetivo = llamar_gpt_hasta_que_este_bien()
         indicador = bool(gpt_objetivo["indicador"])
         señales = gpt_objetivo["señales"]
         results.append((indicador, señales))
 
+    return votar_objetivo(results)
+
+def votar_objetivo(results):
     indicadores = [r[0] for r in results]
     most_voted_indicador = max(set(indicadores), key=indicadores.count)
     # Use feedback from one of the calls that voted for the majority value
@@ -454,6 +543,75 @@ async def calcular_objetivo_principal(client: OpenAI, transcript, course_id, sta
     }
 
 ## Scoring function
+# Por debajo de este número de palabras no se llama a GPT
+MIN_PALABRAS = 100
+
+def contar_palabras(transcript):
+    return sum(len(turn["text"].split()) for turn in transcript)
+
+def combinar_scores(res_muletillas, res_claridad, res_participacion, res_cobertura, res_preguntas, res_ppm, objetivo,
+                    res_pausas=None):
+    # Extraer puntuaciones
+    scores = {
+        "muletillas_pausas": res_muletillas["puntuacion"],
+        "claridad": res_claridad["puntuacion"],
+        "participacion": res_participacion["puntuacion"],
+        "cobertura": res_cobertura["puntuacion"],
+        "preguntas": res_preguntas["puntuacion"],
+        "objetivo": 100 * bool(objetivo["accomplished"])
+    }
+    feedback = { 
+        "muletillas_pausas": res_muletillas["feedback"][:499],
+        "claridad": res_claridad["feedback"][:499],
+        "participacion": res_participacion["feedback"][:499],
+        "cobertura": res_cobertura["feedback"][:499],
+        "preguntas": res_preguntas["feedback"][:499],
+        "objetivo": objetivo["señales"]
+    }
+    if res_ppm is not None:
+        scores["ppm"] = res_ppm["puntuacion"]
+        feedback["ppm"] = res_ppm["feedback"][:499]
+    if res_pausas is not None:
+        scores["pausas"] = res_pausas["puntuacion"]
+        feedback["pausas"] = res_pausas["feedback"][:499]
+    return resultado_final(scores, feedback, objetivo)
+
+def scores_insuficientes():
+    scores = {
+        "muletillas_pausas": 0,
+        "claridad": 0,
+        "participacion": 0,
+        "cobertura": 0,
+        "preguntas": 0,
+        "ppm": 0,
+        "objetivo": 0
+    } 
+
+    feedback = {
+        "muletillas_pausas": "No hay suficientes palabras para evaluar",
+        "claridad": "No hay suficientes palabras para evaluar",
+        "participacion": "No hay suficientes palabras para evaluar",
+        "cobertura": "No hay suficientes palabras para evaluar",
+        "preguntas": "No hay suficientes palabras para evaluar",
+        "ppm": "No hay suficientes palabras para evaluar"
+    }
+    objetivo = {
+    "accomplished": False,
+    "señales": "Objetivo no Cumplido"
+    }
+    return resultado_final(scores, feedback, objetivo)
+
+def resultado_final(scores, feedback, objetivo):
+    # Calcular puntuación ponderada global
+    pesos = pesos_efectivos(scores)
+    puntuacion_final = sum(scores[k] * pesos[k] for k in scores)
+    return {
+        "puntuacion_global": round(puntuacion_final, 1),
+        "detalle": scores,
+        "feedback": feedback,
+        "objetivo": bool(objetivo["accomplished"])
+    }
+
 async def get_conver_scores(
     transcript,
     course_id,
@@ -461,85 +619,37 @@ async def get_conver_scores(
     *,
     client: OpenAI | None = None,
     model: str = DEFAULT_MODEL,
+    pausas=None,
+    claridad_asr=None,
 ):
-    # Factores de ponderación (preguntas desactivada: su 0.075 pasó a objetivo)
-    pesos = {
-        "muletillas_pausas": 0.05,
-        "claridad": 0.10,
-        "participacion": 0.10,
-        "cobertura": 0.20,
-        "preguntas": 0.0,  # Métrica desactivada temporalmente
-        "ppm": 0.05,
-        "objetivo": 0.5,
-    }
+    if contar_palabras(transcript) <= MIN_PALABRAS:
+        return scores_insuficientes()
 
-    palabras_totales = sum(len(turn["text"].split()) for turn in transcript)
-        
-    if palabras_totales > 100:
-        resolved_client = client or get_openai_client()
+    resolved_client = client or get_openai_client()
 
-        # Evaluaciones individuales
-        res_muletillas = calcular_muletillas(transcript)
+    # Evaluaciones individuales
+    res_muletillas = calcular_muletillas(transcript)
+    res_claridad_asr = calcular_claridad_asr(claridad_asr, transcript)
+    if res_claridad_asr and res_claridad_asr["fiable"]:
+        # La confianza del ASR basta: nos ahorramos la llamada a GPT
+        res_claridad = res_claridad_asr
+    else:
         res_claridad = calcular_claridad(resolved_client, transcript, model=model)
-        res_participacion = calcular_participacion_dinamica(resolved_client, transcript, model=model)
-        res_cobertura = await calcular_cobertura_temas_json(resolved_client, transcript, course_id, stage_id, model=model)
-        # Índice de preguntas desactivado temporalmente; placeholder para no romper pipeline/DB
-        # res_preguntas = calcular_indice_preguntas(resolved_client, transcript, model=model)
-        res_preguntas = {"puntuacion": 0, "feedback": "Métrica desactivada temporalmente"}
-        res_ppm = calcular_ppm_variabilidad(transcript) 
-
-        objetivo = await calcular_objetivo_principal(resolved_client, transcript, course_id, stage_id, model=model)
-
-        # Extraer puntuaciones
-        scores = {
-            "muletillas_pausas": res_muletillas["puntuacion"],
-            "claridad": res_claridad["puntuacion"],
-            "participacion": res_participacion["puntuacion"],
-            "cobertura": res_cobertura["puntuacion"],
-            "preguntas": res_preguntas["puntuacion"],
-            "ppm": res_ppm["puntuacion"], 
-            "objetivo": 100 * bool(objetivo["accomplished"])
-        }
-        feedback = { 
-            "muletillas_pausas": res_muletillas["feedback"][:499],
-            "claridad": res_claridad["feedback"][:499],
-            "participacion": res_participacion["feedback"][:499],
-            "cobertura": res_cobertura["feedback"][:499],
-            "preguntas": res_preguntas["feedback"][:499],
-            "ppm": res_ppm["feedback"][:499], 
-            "objetivo": objetivo["señales"]
-        }
-    else: 
-        scores = {
-            "muletillas_pausas": 0,
-            "claridad": 0,
-            "participacion": 0,
-            "cobertura": 0,
-            "preguntas": 0,
-            "ppm": 0,
-            "objetivo": 0
-        } 
-
-        feedback = {
-            "muletillas_pausas": "No hay suficientes palabras para evaluar",
-            "claridad": "No hay suficientes palabras para evaluar",
-            "participacion": "No hay suficientes palabras para evaluar",
-            "cobertura": "No hay suficientes palabras para evaluar",
-            "preguntas": "No hay suficientes palabras para evaluar",
-            "ppm": "No hay suficientes palabras para evaluar"
-        }
-        objetivo = {
-        "accomplished": False,
-        "señales": "Objetivo no Cumplido"
-        }
-    # Calcular puntuación ponderada global
-    puntuacion_final = sum(scores[k] * pesos[k] for k in scores)
-    return {
-        "puntuacion_global": round(puntuacion_final, 1),
-        "detalle": scores,
-        "feedback": feedback,
-        "objetivo": bool(objetivo["accomplished"])
-    }
+    res_participacion = calcular_participacion_dinamica(resolved_client, transcript, model=model)
+    res_cobertura = await calcular_cobertura_temas_json(resolved_client, transcript, course_id, stage_id, model=model)
+    # Índice de preguntas desactivado temporalmente; placeholder para no romper pipeline/DB
+    # res_preguntas = calcular_indice_preguntas(resolved_client, transcript, model=model)
+    res_preguntas = {"puntuacion": 0, "feedback": "Métrica desactivada temporalmente"}
+    res_ppm = calcular_ppm_variabilidad(transcript) 
+    res_pausas = calcular_pausas(pausas)
+
+    objetivo = await calcular_objetivo_principal(resolved_client, transcript, course_id, stage_id, model=model)
+
+    resultado = combinar_scores(res_muletillas, res_claridad, res_participacion, res_cobertura, res_preguntas, res_ppm,
+                                objetivo, res_pausas)
+    # Indicador complementario (no pondera en la nota global)
+    resultado["claridad_asr"] = res_claridad_asr
+    return resultado
 
 if __name__ == "__main__":
     async def main():
@@ -0,0 +1,297 @@
+# Offline packed scoring for backfills and bulk rescoring
+# Most of the cost of a scoring call is fixed (rubric, instructions, round-trip)
+# and many practice conversations are short, so several transcripts are packed
+# into a single request per metric, filling the prompt up to a token budget,
+# and the per-conversation answers are split back out. Every packed answer is
+# validated; a conversation whose answer is missing or malformed is re-run
+# through the regular single-conversation path of get_conver_scores.
+# The result per conversation is the same as get_conver_scores.
+
+import json
+from typing import Any, Callable, Dict, List
+
+from openai import OpenAI
+
+from app.prompting_templates.scoring.active_listening import active_listening
+from app.prompting_templates.scoring.clarity import clarity
+from app.prompting_templates.scoring.goal import goal
+from app.prompting_templates.scoring.key_themes import key_themes
+from app.prompting_templates.scoring.packed import PACKED_TRANSCRIPT_PLACEHOLDER, packed
+from app.services.courses_service import get_courses_details
+from app.utils.call_gpt import call_gpt
+from app.utils.openai_client import get_openai_client
+from scoring_scripts.get_conver_scores import (
+    DEFAULT_MODEL,
+    MIN_PALABRAS,
+    NUM_LLAMADAS_OBJETIVO,
+    calcular_claridad,
+    calcular_claridad_asr,
+    calcular_cobertura_temas_json,
+    calcular_muletillas,
+    calcular_pausas,
+    calcular_objetivo_principal,
+    calcular_participacion_dinamica,
+    calcular_ppm_variabilidad,
+    combinar_scores,
+    contar_palabras,
+    get_key_themes,
+    puntuar_claridad,
+    puntuar_cobertura,
+    puntuar_participacion,
+    scores_insuficientes,
+    votar_objetivo,
+)
+
+# Presupuesto de tokens de entrada por petición empaquetada
+PACKED_TOKEN_BUDGET = 12000
+# Máximo de conversaciones por petición (limita también el tamaño de la respuesta)
+PACKED_MAX_CONVERSATIONS = 8
+# Tokens reservados por conversación para su parte de la respuesta
+OUTPUT_TOKENS_PER_CONVERSATION = 250
+
+
+def estimate_tokens(text: str) -> int:
+    # Aproximación de ~4 caracteres por token, suficiente para empaquetar
+    return len(text) // 4 + 1
+
+
+def pack_conversations(
+    conversations: List[Dict[str, Any]],
+    prompt_tokens: int,
+    *,
+    token_budget: int = PACKED_TOKEN_BUDGET,
+    max_conversations: int = PACKED_MAX_CONVERSATIONS,
+) -> List[List[Dict[str, Any]]]:
+    """Greedily groups conversations, in order, into packs that fit the budget.
+
+    A conversation that alone exceeds the budget still gets its own pack.
+    """
+    packs = []
+    current = []
+    used = prompt_tokens
+    for conv in conversations:
+        cost = estimate_tokens(str(conv["transcript"])) + OUTPUT_TOKENS_PER_CONVERSATION
+        if current and (used + cost > token_budget or len(current) >= max_conversations):
+            packs.append(current)
+            current = []
+            used = prompt_tokens
+        current.append(conv)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _entero(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+
+# --- Validación de las respuestas empaquetadas -------------------------------
+# Cada función devuelve la respuesta normalizada o None si no es válida.
+
+def _normalizar_claridad(respuesta):
+    if not isinstance(respuesta, dict) or not isinstance(respuesta.get("feedback"), str):
+        return None
+    veces = _entero(respuesta.get("veces_falta_claridad"))
+    if veces is None:
+        return None
+    return {**respuesta, "veces_falta_claridad": veces}
+
+
+def _normalizar_escucha_activa(respuesta):
+    if not isinstance(respuesta, dict):
+        return None
+    n = _entero(respuesta.get("n"))
+    if n is None:
+        return None
+    # `puntuar_participacion` parsea texto: el número va primero para que el
+    # fallback de "primer número del texto" lo encuentre
+    return json.dumps({"n": n, "señales": respuesta.get("señales", "")}, ensure_ascii=False)
+
+
+def _normalizar_cobertura(respuesta):
+    if not isinstance(respuesta, dict):
+        return None
+    abordados = _entero(respuesta.get("n_temas_abordados"))
+    olvidados = _entero(respuesta.get("n_temas_olvidados"))
+    if abordados is None or olvidados is None or abordados + olvidados == 0:
+        return None
+    return {**respuesta, "n_temas_abordados": abordados, "n_temas_olvidados": olvidados}
+
+
+def _normalizar_objetivo(respuesta):
+    if not isinstance(respuesta, dict) or not isinstance(respuesta.get("señales"), str):
+        return None
+    indicador = respuesta.get("indicador")
+    if isinstance(indicador, str) and indicador.strip().lower() in ("true", "false"):
+        indicador = indicador.strip().lower() == "true"
+    if not isinstance(indicador, bool):
+        return None
+    return (indicador, respuesta["señales"])
+
+
+# --- Llamadas empaquetadas ---------------------------------------------------
+
+def _llamar_empaquetado(client: OpenAI, single_prompt: str, pack, *, model: str) -> Dict[Any, Any]:
+    claves = {f"c{i + 1}": conv for i, conv in enumerate(pack)}
+    prompt = packed(single_prompt, {clave: conv["transcript"] for clave, conv in claves.items()})
+    try:
+        salida = json.loads(call_gpt(client, prompt, model=model)).get("conversaciones", {})
+        if not isinstance(salida, dict):
+            salida = {}
+    except Exception as e:
+        print(f"⚠️ Respuesta empaquetada inválida ({len(pack)} conversaciones): {e}")
+        salida = {}
+    return {conv["conversation_id"]: salida.get(clave) for clave, conv in claves.items()}
+
+
+def _evaluar_empaquetado(
+    client: OpenAI,
+    conversations,
+    single_prompt: str,
+    normalizar: Callable,
+    *,
+    model: str,
+    token_budget: int,
+    max_conversations: int,
+) -> Dict[Any, Any]:
+    """Returns {conversation_id: normalized answer, or None if it failed validation}."""
+    resultados = {}
+    prompt_tokens = estimate_tokens(single_prompt)
+    for pack in pack_conversations(
+        conversations, prompt_tokens, token_budget=token_budget, max_conversations=max_conversations
+    ):
+        for conv_id, respuesta in _llamar_empaquetado(client, single_prompt, pack, model=model).items():
+            resultados[conv_id] = normalizar(respuesta)
+    return resultados
+
+
+def _agrupar_por_stage(conversations):
+    grupos = {}
+    for conv in conversations:
+        grupos.setdefault((conv["course_id"], conv["stage_id"]), []).append(conv)
+    return grupos
+
+
+async def get_conver_scores_packed(
+    conversations: List[Dict[str, Any]],
+    *,
+    client: OpenAI | None = None,
+    model: str = DEFAULT_MODEL,
+    token_budget: int = PACKED_TOKEN_BUDGET,
+    max_conversations: int = PACKED_MAX_CONVERSATIONS,
+) -> Dict[Any, Dict[str, Any]]:
+    """
+    Scores several conversations packing the LLM metrics into shared requests.
+
+    `conversations` is a list of dicts with keys conversation_id, transcript,
+    course_id, stage_id and optionally pausas (realtime pause metrics) and
+    claridad_asr (transcription confidence, as in get_conver_scores).
+    Returns {conversation_id: get_conver_scores result}.
+    """
+    resultados = {}
+    elegibles = []
+    for conv in conversations:
+        if contar_palabras(conv["transcript"]) <= MIN_PALABRAS:
+            resultados[conv["conversation_id"]] = scores_insuficientes()
+        else:
+            elegibles.append(conv)
+
+    if not elegibles:
+        return resultados
+
+    resolved_client = client or get_openai_client()
+    opciones = {"model": model, "token_budget": token_budget, "max_conversations": max_conversations}
+
+    # Claridad a partir de la confianza del ASR: las conversaciones donde es
+    # fiable no necesitan la llamada a GPT
+    claridad_asr = {
+        conv["conversation_id"]: calcular_claridad_asr(conv.get("claridad_asr"), conv["transcript"])
+        for conv in elegibles
+    }
+    sin_asr = [conv for conv in elegibles if not (claridad_asr[conv["conversation_id"]] or {}).get("fiable")]
+
+    # Métricas cuya rúbrica no depende del curso: un único empaquetado para todas
+    claridad = _evaluar_empaquetado(
+        resolved_client, sin_asr, clarity(PACKED_TRANSCRIPT_PLACEHOLDER), _normalizar_claridad, **opciones
+    )
+    escucha = _evaluar_empaquetado(
+        resolved_client, elegibles, active_listening(PACKED_TRANSCRIPT_PLACEHOLDER), _normalizar_escucha_activa, **opciones
+    )
+
+    # Métricas que dependen del stage: se empaqueta dentro de cada stage
+    cobertura = {}
+    votos_objetivo = {conv["conversation_id"]: [] for conv in elegibles}
+    for (course_id, stage_id), grupo in _agrupar_por_stage(elegibles).items():
+        key_themes_list = await get_key_themes(course_id, stage_id)
+        cobertura.update(_evaluar_empaquetado(
+            resolved_client, grupo, key_themes(PACKED_TRANSCRIPT_PLACEHOLDER, key_themes_list), _normalizar_cobertura, **opciones
+        ))
+
+        stage_details = await get_courses_details(course_id, stage_id)
+        goal_prompt = goal(PACKED_TRANSCRIPT_PLACEHOLDER, stage_details[0]["stage_objectives"])
+        for _ in range(NUM_LLAMADAS_OBJETIVO):
+            for conv_id, voto in _evaluar_empaquetado(
+                resolved_client, grupo, goal_prompt, _normalizar_objetivo, **opciones
+            ).items():
+                votos_objetivo[conv_id].append(voto)
+
+    for conv in elegibles:
+        conv_id = conv["conversation_id"]
+        transcript = conv["transcript"]
+
+        # Guarda: cualquier métrica cuya respuesta empaquetada no validó se
+        # vuelve a calcular con la llamada individual
+        res_claridad_asr = claridad_asr[conv_id]
+        if res_claridad_asr and res_claridad_asr["fiable"]:
+            res_claridad = res_claridad_asr
+        elif claridad.get(conv_id) is not None:
+            res_claridad = puntuar_claridad(claridad[conv_id])
+        else:
+            print(f"🔁 Claridad empaquetada inválida para {conv_id}, recalculando individualmente")
+            res_claridad = calcular_claridad(resolved_client, transcript, model=model)
+
+        if escucha.get(conv_id) is not None:
+            res_participacion = puntuar_participacion(escucha[conv_id], transcript)
+        else:
+            print(f"🔁 Escucha activa empaquetada inválida para {conv_id}, recalculando individualmente")
+            res_participacion = calcular_participacion_dinamica(resolved_client, transcript, model=model)
+
+        if cobertura.get(conv_id) is not None:
+            res_cobertura = puntuar_cobertura(cobertura[conv_id])
+        else:
+            print(f"🔁 Cobertura empaquetada inválida para {conv_id}, recalculando individualmente")
+            res_cobertura = await calcular_cobertura_temas_json(
+                resolved_client, transcript, conv["course_id"], conv["stage_id"], model=model
+            )
+
+        votos = votos_objetivo[conv_id]
+        if votos and all(voto is not None for voto in votos):
+            objetivo = votar_objetivo(votos)
+        else:
+            print(f"🔁 Objetivo empaquetado inválido para {conv_id}, recalculando individualmente")
+            objetivo = await calcular_objetivo_principal(
+                resolved_client, transcript, conv["course_id"], conv["stage_id"], model=model
+            )
+
+        res_preguntas = {"puntuacion": 0, "feedback": "Métrica desactivada temporalmente"}
+        resultados[conv_id] = combinar_scores(
+            calcular_muletillas(transcript),
+            res_claridad,
+            res_participacion,
+            res_cobertura,
+            res_preguntas,
+            calcular_ppm_variabilidad(transcript),
+            objetivo,
+            calcular_pausas(conv.get("pausas")),
+        )
+        # Indicador complementario (no pondera en la nota global)
+        resultados[conv_id]["claridad_asr"] = res_claridad_asr
+
+    return resultados
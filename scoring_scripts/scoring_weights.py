@@ -0,0 +1,27 @@
+# Pesos de la puntuación global de una conversación
+# Sin dependencias (ni openai ni numpy): los usa también la API para mostrar con
+# qué pesos se calculó cada puntuación (conversations_service).
+
+# Factores de ponderación (preguntas desactivada: su 0.075 pasó a objetivo)
+PESOS = {
+    "muletillas_pausas": 0.025,
+    "pausas": 0.025,
+    "claridad": 0.10,
+    "participacion": 0.10,
+    "cobertura": 0.20,
+    "preguntas": 0.0,  # Métrica desactivada temporalmente
+    "ppm": 0.05,
+    "objetivo": 0.5,
+}
+
+def pesos_efectivos(scores):
+    # Sin medida de pausas su peso vuelve a muletillas_pausas, como antes de medirlas
+    pesos = dict(PESOS)
+    if "pausas" not in scores:
+        pesos["muletillas_pausas"] += pesos.pop("pausas")
+    # Sin ritmo medible su peso se reparte entre el resto
+    if "ppm" not in scores:
+        resto = pesos.pop("ppm")
+        total = sum(pesos.values())
+        pesos = {k: v * (1 + resto / total) for k, v in pesos.items()}
+    return pesos
@@ -0,0 +1,61 @@
+"""Apply the SQL files in migrations/ to the configured database.
+
+Files run in name order, each in its own transaction. They are written to be
+idempotent (IF NOT EXISTS), so applying them again is harmless. The database is
+the one init_db() picks for ENVIRONMENT (DATABASE_URL_PRO / _DEV / DATABASE_URL).
+
+Usage:
+    python scripts/apply_migrations.py [--only 001_realtime_session_metrics.sql] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.db import close_db, get_db_connection, init_db  # noqa: E402
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+
+def migration_files(only=None):
+    names = sorted(name for name in os.listdir(MIGRATIONS_DIR) if name.endswith(".sql"))
+    if only:
+        names = [name for name in names if name in only]
+    return [os.path.join(MIGRATIONS_DIR, name) for name in names]
+
+
+def read_sql(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+async def apply(paths, dry_run: bool):
+    if dry_run:
+        for path in paths:
+            print(f"📝 {os.path.basename(path)} (dry run)\n{read_sql(path)}")
+        return
+    await init_db()
+    try:
+        async with get_db_connection() as conn:
+            for path in paths:
+                sql = read_sql(path)
+                async with conn.transaction():
+                    await conn.execute(sql)
+                print(f"✅ {os.path.basename(path)}")
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", help="file names to apply (default: all)")
+    parser.add_argument("--dry-run", action="store_true", help="print the SQL without running it")
+    args = parser.parse_args()
+    asyncio.run(apply(migration_files(args.only), args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark of the browser-link audio codecs on grabacion.wav.
+
+For each way /ws/audio can carry audio (base64 JSON, binary PCM16, binary
+μ-law) reports:
+  - bytes per second of audio on the wire, and the saving against JSON
+  - CPU per stream: encode + decode time of one chunk, as a fraction of the
+    chunk duration, and how many real-time streams that leaves per core
+  - quality against the original recording: SNR and segmental SNR (20 ms
+    segments, speech only) of the decoded audio
+
+Usage:
+    python scripts/bench_audio_codec.py [--wav grabacion.wav] [--chunk-ms 20] [--seconds 2]
+"""
+
+import argparse
+import base64
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.audio_codecs import decode_audio, encode_audio  # noqa: E402
+from app.services.realtime_frames import (  # noqa: E402
+    BINARY_HEADER, CODEC_MULAW, CODEC_PCM16, FRAME_USER_AUDIO,
+    frontend_audio_payload, pack_audio_frame, unpack_audio_frame,
+)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WAV = os.path.join(REPO_DIR, "grabacion.wav")
+SEGMENT_MS = 20
+SPEECH_RMS = 0.01
+
+
+def load_wav(path: str) -> tuple:
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        pcm = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        channels, rate = w.getnchannels(), w.getframerate()
+    if channels > 1:
+        pcm = pcm[::channels].copy()
+    return pcm, rate
+
+
+def json_roundtrip(pcm: bytes) -> bytes:
+    frame = '{"type":"input_audio_buffer.append","audio":"' + base64.b64encode(pcm).decode() + '"}'
+    return base64.b64decode(frontend_audio_payload(frame)), len(frame)
+
+
+def binary_roundtrip(codec: int):
+    def roundtrip(pcm: bytes):
+        frame = pack_audio_frame(encode_audio(pcm, codec), FRAME_USER_AUDIO, codec)
+        _, frame_codec, payload = unpack_audio_frame(frame)
+        return decode_audio(payload, frame_codec), len(frame)
+    return roundtrip
+
+
+def snr_db(reference: np.ndarray, decoded: np.ndarray) -> float:
+    noise = np.sum((reference - decoded) ** 2)
+    return float("inf") if noise == 0 else 10 * np.log10(np.sum(reference ** 2) / noise)
+
+
+def segmental_snr_db(reference: np.ndarray, decoded: np.ndarray, segment: int) -> float:
+    """Mean SNR over the speech segments (RMS above SPEECH_RMS), each clamped to [-10, 60] dB."""
+    n = len(reference) // segment * segment
+    ref = reference[:n].reshape(-1, segment)
+    err = ref - decoded[:n].reshape(-1, segment)
+    speech = np.sqrt(np.mean(ref ** 2, axis=1)) > SPEECH_RMS
+    if not speech.any():
+        return float("nan")
+    signal = np.sum(ref[speech] ** 2, axis=1)
+    noise = np.maximum(np.sum(err[speech] ** 2, axis=1), 1e-12)
+    return float(np.mean(np.clip(10 * np.log10(signal / noise), -10, 60)))
+
+
+def cpu_per_chunk(fn, chunks, seconds: float) -> float:
+    n = 0
+    start = time.process_time()
+    deadline = start + seconds
+    while True:
+        for chunk in chunks:
+            fn(chunk)
+        n += len(chunks)
+        now = time.process_time()
+        if now >= deadline:
+            return (now - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", default=DEFAULT_WAV)
+    parser.add_argument("--chunk-ms", type=int, default=20, help="audio per frame in milliseconds")
+    parser.add_argument("--seconds", type=float, default=2.0, help="CPU seconds per measurement")
+    args = parser.parse_args()
+
+    pcm, rate = load_wav(args.wav)
+    samples = rate * args.chunk_ms // 1000
+    chunks = [pcm[i:i + samples].tobytes() for i in range(0, len(pcm) - samples + 1, samples)]
+    duration = len(chunks) * args.chunk_ms / 1000
+    reference = pcm[:len(chunks) * samples].astype(np.float64) / 32768.0
+
+    print(f"{os.path.basename(args.wav)}: {duration:.1f}s @ {rate} Hz, {args.chunk_ms} ms chunks "
+          f"({BINARY_HEADER.size}-byte binary header)\n")
+    print(f"{'codec':<14}{'bytes/s':>10}{'vs json':>10}{'CPU/chunk':>12}{'CPU %':>8}"
+          f"{'streams/core':>14}{'SNR':>9}{'segSNR':>9}")
+
+    json_rate = None
+    for name, roundtrip in (
+        ("json base64", json_roundtrip),
+        ("binary pcm16", binary_roundtrip(CODEC_PCM16)),
+        ("binary mulaw", binary_roundtrip(CODEC_MULAW)),
+    ):
+        decoded, wire = [], 0
+        for chunk in chunks:
+            out, size = roundtrip(chunk)
+            decoded.append(out)
+            wire += size
+        decoded = np.frombuffer(b"".join(decoded), dtype=np.int16).astype(np.float64) / 32768.0
+
+        bytes_per_second = wire / duration
+        json_rate = json_rate or bytes_per_second
+        cpu = cpu_per_chunk(roundtrip, chunks, args.seconds)
+        load = cpu / (args.chunk_ms / 1000)
+        print(f"{name:<14}{bytes_per_second:>10,.0f}{1 - bytes_per_second / json_rate:>9.0%} "
+              f"{cpu * 1e6:>9.1f}µs{load:>8.3%}{1 / load:>14,.0f}"
+              f"{snr_db(reference, decoded):>7.1f}dB"
+              f"{segmental_snr_db(reference, decoded, rate * SEGMENT_MS // 1000):>7.1f}dB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Microbenchmark for the realtime bridge frame translation.
+
+Compares the original translation (json.loads + json.dumps of a new dict) with
+the fast path in app.services.realtime_frames, for both directions of the
+audio hot loop. Reports frames/sec on a single core (CPU time).
+
+Usage:
+    python scripts/bench_frame_translation.py [--chunk-ms 100] [--sample-rate 16000] [--seconds 2]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import realtime_frames  # noqa: E402
+from app.services.realtime_frames import (  # noqa: E402
+    elevenlabs_audio_payload,
+    elevenlabs_user_audio_frame,
+    frontend_audio_delta_frame,
+    frontend_audio_payload,
+)
+
+
+def frontend_before(msg):
+    parsed = json.loads(msg)
+    if parsed.get("type") == "input_audio_buffer.append":
+        return json.dumps({"user_audio_chunk": parsed.get("audio")})
+
+
+def frontend_after(msg):
+    audio_b64 = frontend_audio_payload(msg)
+    if audio_b64 is not None:
+        return elevenlabs_user_audio_frame(audio_b64)
+
+
+def upstream_before(msg):
+    data = json.loads(msg)
+    if data.get("type") == "audio":
+        return json.dumps({
+            "type": "response.audio.delta",
+            "delta": data["audio_event"]["audio_base_64"],
+            "item_id": "elevenlabs_audio",
+        })
+
+
+def upstream_after(msg):
+    chunk = elevenlabs_audio_payload(msg)
+    if chunk is not None:
+        return frontend_audio_delta_frame(chunk)
+
+
+def frames_per_second(fn, msg, seconds):
+    # Warm-up and sanity check
+    assert fn(msg) is not None
+    n = 0
+    start = time.process_time()
+    deadline = start + seconds
+    while True:
+        for _ in range(100):
+            fn(msg)
+        n += 100
+        now = time.process_time()
+        if now >= deadline:
+            return n / (now - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-ms", type=int, default=100, help="audio per frame in milliseconds")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="PCM16 sample rate")
+    parser.add_argument("--seconds", type=float, default=2.0, help="CPU seconds per measurement")
+    args = parser.parse_args()
+
+    n_bytes = args.sample_rate * 2 * args.chunk_ms // 1000
+    audio_b64 = base64.b64encode(os.urandom(n_bytes)).decode()
+    frontend_msg = json.dumps({"type": "input_audio_buffer.append", "audio": audio_b64})
+    upstream_msg = json.dumps({"type": "audio", "audio_event": {"audio_base_64": audio_b64, "event_id": 1}})
+
+    print(f"Frame: {args.chunk_ms} ms PCM16 @ {args.sample_rate} Hz ({len(frontend_msg)} bytes JSON)")
+    print(f"Control codec: {'orjson' if realtime_frames.orjson else 'json (stdlib)'}\n")
+    print(f"{'direction':<24}{'before (f/s)':>16}{'after (f/s)':>16}{'speedup':>10}")
+
+    for name, before, after, msg in (
+        ("frontend -> upstream", frontend_before, frontend_after, frontend_msg),
+        ("upstream -> frontend", upstream_before, upstream_after, upstream_msg),
+    ):
+        fps_before = frames_per_second(before, msg, args.seconds)
+        fps_after = frames_per_second(after, msg, args.seconds)
+        print(f"{name:<24}{fps_before:>16,.0f}{fps_after:>16,.0f}{fps_after / fps_before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Load test for the realtime bridge (/ws/audio).
+
+Starts N simulated browsers. Each one streams PCM16 chunks at real-time pace to
+/ws/audio: a lead-in of silence while the agent greets, then grabacion.wav
+followed by a gap of silence so the fake provider closes the turn, looped as
+many times as requested. Every chunk carries a sequence marker on its first
+samples. The fake provider echoes the marker back as agent audio
+(FAKE_ECHO_MARKERS=1), so each browser measures the forwarding round trip
+browser -> bridge -> upstream -> bridge -> browser.
+
+Run the app against the fake upstream and a local database first, e.g.:
+
+    REALTIME_PROVIDER=fake FAKE_ECHO_MARKERS=1 ENVIRONMENT=DEV \\
+        uvicorn app.main:app --port 8000 --workers 2
+
+Reports:
+  - sessions admitted / rejected (1013, worker full) / failed
+  - forwarding round-trip latency percentiles
+  - markers that never came back (held by the silence gate or dropped) and
+    audio frames dropped by the bridge queues
+  - sessions per worker, and CPU per session (from GET /realtime/stats, polled
+    while the test runs)
+
+Markers held by the silence gate and released as pre-roll come back late, and
+markers it suppresses never come back. Agent audio coalescing merges echoed
+markers with other agent audio, so only the first marker of each frame is read.
+Use SILENCE_GATE_ENABLED=0 AGENT_AUDIO_FRAME_MS=0 on the server to measure pure
+forwarding.
+
+Usage:
+    python scripts/load_test_ws_audio.py --sessions 20 [--url ws://localhost:8000/ws/audio]
+        [--loops 2] [--chunk-ms 20] [--binary] [--ramp 5] [--user-id ... --course-id ... --stage-id ...]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+import wave
+from collections import defaultdict
+
+import httpx
+import numpy as np
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.realtime_fake_provider import embed_marker, read_marker  # noqa: E402
+from app.services.realtime_frames import (  # noqa: E402
+    BINARY_SUBPROTOCOL, FRAME_AGENT_AUDIO, FRAME_USER_AUDIO, pack_audio_frame, unpack_audio_frame,
+)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WAV = os.path.join(REPO_DIR, "grabacion.wav")
+STATS_POLL_SECONDS = 1.0
+
+
+def load_wav(path: str) -> tuple:
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        pcm = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        channels, rate = w.getnchannels(), w.getframerate()
+    if channels > 1:
+        pcm = pcm[::channels].copy()
+    return pcm, rate
+
+
+class SimulatedBrowser:
+    """One /ws/audio client streaming the recording in real time."""
+
+    def __init__(self, index: int, args, pcm: np.ndarray, sample_rate: int):
+        self.index = index
+        self.args = args
+        self.pcm = pcm
+        self.chunk = sample_rate * args.chunk_ms // 1000
+        self.gap = np.zeros(sample_rate * args.gap_ms // 1000, dtype=np.int16)
+        self.lead = np.zeros(sample_rate * args.lead_ms // 1000, dtype=np.int16)
+
+        self.status = "pending"      # admitted / rejected / failed
+        self.sent_at = {}            # seq -> perf_counter when sent
+        self.latencies = []          # round-trip seconds of echoed markers
+        self.markers_sent = 0
+        self.agent_audio_chunks = 0
+        self.session_start = None
+        self.time_to_first_audio = None
+
+    async def run(self):
+        kwargs = {"subprotocols": [BINARY_SUBPROTOCOL]} if self.args.binary else {}
+        try:
+            async with websockets.connect(self.args.url, max_size=None, **kwargs) as ws:
+                receiver = asyncio.ensure_future(self._receive(ws))
+                await ws.send(json.dumps({
+                    "type": "input_audio_session.start",
+                    "user_id": self.args.user_id,
+                    "course_id": self.args.course_id,
+                    "stage_id": self.args.stage_id,
+                }))
+                self.session_start = time.perf_counter()
+                await self._stream(ws)
+                if self.status == "pending":
+                    self.status = "admitted"
+                await ws.send(json.dumps({"type": "input_audio_session.end"}))
+                try:
+                    await asyncio.wait_for(receiver, self.args.drain)
+                except asyncio.TimeoutError:
+                    receiver.cancel()
+        except websockets.ConnectionClosed as e:
+            if self.status in ("pending", "rejected"):
+                self.status = "rejected" if e.code == 1013 else "failed"
+        except Exception as e:
+            print(f"⚠️ Session {self.index} failed: {e}")
+            self.status = "failed"
+
+    async def _stream(self, ws):
+        audio = np.concatenate([self.lead] + [np.concatenate([self.pcm, self.gap]) for _ in range(self.args.loops)])
+        interval = self.args.chunk_ms / 1000
+        start = time.perf_counter()
+        for i, offset in enumerate(range(0, len(audio), self.chunk)):
+            if self.status == "rejected":
+                return
+            chunk = audio[offset:offset + self.chunk]
+            self.markers_sent += 1
+            marked = embed_marker(chunk, self.markers_sent)
+            self.sent_at[self.markers_sent] = time.perf_counter()
+            if self.args.binary:
+                await ws.send(pack_audio_frame(marked.tobytes(), FRAME_USER_AUDIO))
+            else:
+                await ws.send('{"type":"input_audio_buffer.append","audio":"'
+                              + base64.b64encode(marked.tobytes()).decode("ascii") + '"}')
+            # Absolute schedule: real-time pace without drift
+            delay = start + (i + 1) * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _receive(self, ws):
+        try:
+            await self._receive_loop(ws)
+        except websockets.ConnectionClosed as e:
+            if e.code == 1013:
+                self.status = "rejected"
+
+    async def _receive_loop(self, ws):
+        async for msg in ws:
+            now = time.perf_counter()
+            if isinstance(msg, bytes):
+                frame_type, _, payload = unpack_audio_frame(msg)
+                if frame_type != FRAME_AGENT_AUDIO:
+                    continue
+                pcm = np.frombuffer(payload, dtype=np.int16)
+            else:
+                data = json.loads(msg)
+                if data.get("type") == "error":
+                    if data.get("error", {}).get("code") == "server_busy":
+                        self.status = "rejected"
+                    continue
+                if data.get("type") != "response.audio.delta":
+                    continue
+                pcm = np.frombuffer(base64.b64decode(data["delta"]), dtype=np.int16)
+
+            seq = read_marker(pcm)
+            if seq is not None:
+                sent = self.sent_at.pop(seq, None)
+                if sent is not None:
+                    self.latencies.append(now - sent)
+                continue
+            self.agent_audio_chunks += 1
+            if self.time_to_first_audio is None and self.session_start is not None:
+                self.time_to_first_audio = now - self.session_start
+
+
+async def poll_server_stats(stats_url: str, samples: dict, stop: asyncio.Event):
+    """Latest /realtime/stats of every worker pid seen, plus its first sample and peak active sessions."""
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while not stop.is_set():
+            try:
+                data = (await client.get(stats_url)).json()
+                worker = samples.setdefault(data["pid"], {"first": data, "peak_active": 0})
+                worker["last"] = data
+                worker["peak_active"] = max(worker["peak_active"], data["capacity"]["active"])
+            except Exception as e:
+                print(f"⚠️ Could not read {stats_url}: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), STATS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+def percentiles_ms(values) -> str:
+    if not values:
+        return "n/a"
+    p50, p90, p99 = np.percentile(np.array(values) * 1000, [50, 90, 99])
+    return f"p50={p50:.1f}ms p90={p90:.1f}ms p99={p99:.1f}ms max={max(values) * 1000:.1f}ms"
+
+
+def report(browsers, workers, wall_seconds: float):
+    by_status = defaultdict(int)
+    for b in browsers:
+        by_status[b.status] += 1
+    admitted = [b for b in browsers if b.status == "admitted"]
+
+    latencies = [x for b in admitted for x in b.latencies]
+    sent = sum(b.markers_sent for b in admitted)
+    ttfa = [b.time_to_first_audio for b in admitted if b.time_to_first_audio is not None]
+
+    print("\n=== Load test ===")
+    print(f"Sessions: {len(browsers)} | admitted={by_status['admitted']} | rejected={by_status['rejected']} "
+          f"| failed={by_status['failed']} | wall={wall_seconds:.1f}s")
+    print(f"Forwarding round trip: {percentiles_ms(latencies)}")
+    print(f"Markers: sent={sent} | echoed={len(latencies)} | not echoed={sent - len(latencies)} "
+          f"(silence gate or dropped)")
+    print(f"Time to first agent audio: {percentiles_ms(ttfa)}")
+    print(f"Load generator CPU: {time.process_time():.2f}s")
+
+    if not workers:
+        print("Server: no /realtime/stats samples")
+        return
+    print(f"\nServer workers seen: {len(workers)}")
+    for pid, w in workers.items():
+        first, last = w["first"], w["last"]
+        cpu = last["cpu_seconds"] - first["cpu_seconds"]
+        sessions = last["sessions"] - first["sessions"]
+        dropped = sum(last["totals"][k] - first["totals"][k]
+                      for k in ("dropped_audio_frontend", "dropped_audio_upstream"))
+        per_session = f"{cpu / sessions:.2f}s" if sessions else "n/a"
+        print(f"  pid {pid}: peak sessions={w['peak_active']} | finished={sessions} | cpu={cpu:.2f}s "
+              f"| cpu/session={per_session} | dropped audio frames={dropped}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent /ws/audio load test with real audio")
+    parser.add_argument("--url", default="ws://localhost:8000/ws/audio")
+    parser.add_argument("--stats-url", default=None, help="Defaults to <host>/realtime/stats")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which sessions are started")
+    parser.add_argument("--loops", type=int, default=2, help="Times the recording is streamed per session")
+    parser.add_argument("--lead-ms", type=int, default=3000, help="Silence before the first pass (agent greeting)")
+    parser.add_argument("--gap-ms", type=int, default=2000, help="Silence after each pass of the recording")
+    parser.add_argument("--chunk-ms", type=int, default=20)
+    parser.add_argument("--drain", type=float, default=10.0, help="Seconds to wait for the server to close")
+    parser.add_argument("--binary", action="store_true", help=f"Use the {BINARY_SUBPROTOCOL} sub-protocol")
+    parser.add_argument("--wav", default=DEFAULT_WAV)
+    parser.add_argument("--user-id", default=os.getenv("LOADTEST_USER_ID"))
+    parser.add_argument("--course-id", default=os.getenv("LOADTEST_COURSE_ID"))
+    parser.add_argument("--stage-id", default=os.getenv("LOADTEST_STAGE_ID"))
+    args = parser.parse_args()
+
+    pcm, sample_rate = load_wav(args.wav)
+    stats_url = args.stats_url or args.url.replace("ws", "http", 1).rsplit("/ws/", 1)[0] + "/realtime/stats"
+    print(f"🎧 {args.sessions} sessions x {args.loops} x {len(pcm) / sample_rate:.1f}s of audio "
+          f"({args.chunk_ms} ms chunks, {'binary' if args.binary else 'json'}) -> {args.url}")
+
+    workers, stop = {}, asyncio.Event()
+    poller = asyncio.ensure_future(poll_server_stats(stats_url, workers, stop))
+    await asyncio.sleep(0.2)
+
+    browsers = [SimulatedBrowser(i, args, pcm, sample_rate) for i in range(args.sessions)]
+    start = time.perf_counter()
+
+    async def launch(browser):
+        await asyncio.sleep(args.ramp * browser.index / max(1, args.sessions))
+        await browser.run()
+
+    await asyncio.gather(*(launch(b) for b in browsers))
+    wall = time.perf_counter() - start
+
+    # Last sample after every session has been closed server-side
+    await asyncio.sleep(STATS_POLL_SECONDS * 2)
+    stop.set()
+    await poller
+    report(browsers, workers, wall)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
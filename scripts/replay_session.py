@@ -0,0 +1,236 @@
+"""Replay a recorded realtime session through the bridge, offline.
+
+Reads a log written by the session recorder (REALTIME_RECORD_DIR) and plays it
+back through RealtimeBridge. The recorded browser frames are fed to the bridge's
+frontend side. The recorded provider frames are fed from a replay upstream that
+stands in for the provider. Both follow the original timeline, scaled by
+--speed (1 = original pace, 10 = ten times faster, 0 = as fast as possible).
+Nothing is sent to the provider or the database: conversation creation,
+transcript writes, metrics and the post-call pipeline are replaced by no-ops.
+
+Both inputs come from one merged timeline, so every run feeds the bridge the
+same frames in the same order. This makes the replay usable as a regression
+benchmark for bridge throughput and forwarding latency.
+
+Reports frames per direction, wall/CPU time, frames per CPU second, and forwarding latency
+percentiles per direction. Latency is matched by audio payload: the time from
+when a chunk entered the bridge to when it left on the other side.
+
+Usage:
+    python scripts/replay_session.py recordings/20250101-120000_<conversation_id>.rtrec [--speed 0] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import message_buffer, realtime_bridge  # noqa: E402
+from app.services.realtime_frames import CODEC_PCM16, unpack_audio_frame  # noqa: E402
+from app.services.realtime_providers import get_provider  # noqa: E402
+from app.services.session_recorder import (  # noqa: E402
+    FRONTEND_IN, FRONTEND_OUT, META, UPSTREAM_IN, UPSTREAM_OUT, read_recording,
+)
+
+# Base64 audio inside any of the JSON envelopes the bridge handles
+_AUDIO_FIELD = re.compile(r'"(?:audio|delta|user_audio_chunk|audio_base_64)"\s*:\s*"([^"]+)"')
+
+
+def audio_key(frame):
+    """Raw PCM carried by a frame (JSON or binary), used to match a chunk across the bridge."""
+    if isinstance(frame, bytes):
+        try:
+            return unpack_audio_frame(frame)[2]
+        except ValueError:
+            return None
+    match = _AUDIO_FIELD.search(frame)
+    return base64.b64decode(match.group(1)) if match else None
+
+
+def use_offline_services():
+    """Replace every DB/provider side effect of the bridge with a no-op."""
+    async def create_conversation(*args):
+        return {"conversation_id": "replay"}
+
+    async def setup(*args):
+        return {"voice_id": "replay", "agent_id": "replay", "master_prompt": ""}
+
+    async def noop(*args, **kwargs):
+        return None
+
+    realtime_bridge.create_conversation = create_conversation
+    realtime_bridge.update_user_course_status = noop
+    realtime_bridge.resolve_session_setup = setup
+    realtime_bridge.take_prewarmed_session = lambda *args: None
+    realtime_bridge.set_realtime_session_metrics = noop
+    realtime_bridge.stop_process = noop
+    realtime_bridge.create_recorder = lambda *args: None
+    message_buffer.send_messages_batch = noop
+
+
+class LatencyProbe:
+    """Matches audio chunks entering the bridge with the same chunk leaving it."""
+
+    def __init__(self):
+        self.pending = {}
+        self.latencies = []
+        self.frames = 0
+
+    def entered(self, frame):
+        key = audio_key(frame)
+        if key is not None:
+            self.pending.setdefault(key, []).append(time.perf_counter())
+
+    def left(self, frame):
+        self.frames += 1
+        key = audio_key(frame)
+        if key is None:
+            return
+        sent = self.pending.get(key)
+        if sent:
+            self.latencies.append(time.perf_counter() - sent.pop(0))
+
+
+class ReplayFrontend:
+    """Stands in for the browser websocket (Starlette API used by the bridge)."""
+
+    def __init__(self, probe: LatencyProbe):
+        self.inbox = asyncio.Queue()
+        self.probe = probe
+
+    async def receive(self):
+        return await self.inbox.get()
+
+    async def send_text(self, frame):
+        self.probe.left(frame)
+
+    async def send_bytes(self, frame):
+        self.probe.left(frame)
+
+    async def close(self):
+        pass
+
+
+class ReplayUpstream:
+    """Stands in for the provider websocket: yields the recorded provider frames."""
+
+    def __init__(self, probe: LatencyProbe):
+        self.inbox = asyncio.Queue()
+        self.probe = probe
+        self.open = True
+
+    async def send(self, frame):
+        self.probe.left(frame)
+
+    async def __aiter__(self):
+        while True:
+            frame = await self.inbox.get()
+            if frame is None:
+                return
+            yield frame
+
+    async def close(self):
+        if self.open:
+            self.open = False
+            self.inbox.put_nowait(None)
+
+
+async def replay(records, meta, speed: float):
+    to_frontend, to_upstream = LatencyProbe(), LatencyProbe()
+    frontend = ReplayFrontend(to_frontend)
+    upstream = ReplayUpstream(to_upstream)
+
+    provider = get_provider(meta.get("provider", "elevenlabs"))
+
+    async def connect():
+        return upstream
+    provider.connect = connect
+
+    bridge = realtime_bridge.RealtimeBridge(
+        frontend,
+        binary_audio=meta.get("binary_audio", False),
+        provider=provider,
+        audio_codec=meta.get("audio_codec", CODEC_PCM16),
+    )
+    run = asyncio.ensure_future(bridge.run())
+
+    fed = {FRONTEND_IN: 0, UPSTREAM_IN: 0}
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    for t, direction, _, frame in records:
+        if speed > 0:
+            delay = start_wall + t / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if direction == FRONTEND_IN:
+            # Latency browser -> provider
+            to_upstream.entered(frame)
+            key = "bytes" if isinstance(frame, bytes) else "text"
+            await frontend.inbox.put({"type": "websocket.receive", key: frame})
+        else:
+            # Latency provider -> browser
+            to_frontend.entered(frame)
+            await upstream.inbox.put(frame)
+        fed[direction] += 1
+        await asyncio.sleep(0)
+
+    # End of the recording: close the session like the provider hanging up
+    await upstream.close()
+    await asyncio.wait_for(run, 30)
+    return {
+        "wall": time.perf_counter() - start_wall,
+        "cpu": time.process_time() - start_cpu,
+        "fed": fed,
+        "to_frontend": to_frontend,
+        "to_upstream": to_upstream,
+    }
+
+
+def percentiles_ms(values) -> str:
+    if not values:
+        return "n/a"
+    p50, p90, p99 = np.percentile(np.array(values) * 1000, [50, 90, 99])
+    return f"p50={p50:.2f}ms p90={p90:.2f}ms p99={p99:.2f}ms max={max(values) * 1000:.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded realtime session through the bridge")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = original pace, 0 = as fast as possible")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    meta, records, recorded = {}, [], {FRONTEND_OUT: 0, UPSTREAM_OUT: 0}
+    for t, direction, kind, frame in read_recording(args.recording):
+        if direction == META:
+            meta.update(frame)
+        elif direction in (FRONTEND_IN, UPSTREAM_IN):
+            records.append((t, direction, kind, frame))
+        else:
+            recorded[direction] += 1
+    duration = records[-1][0] if records else 0.0
+    print(f"📼 {args.recording}: provider={meta.get('provider')} binary={meta.get('binary_audio')} "
+          f"conversation={meta.get('conversation_id')} | {len(records)} input frames over {duration:.1f}s")
+    print(f"   recorded output: frontend={recorded[FRONTEND_OUT]} upstream={recorded[UPSTREAM_OUT]}")
+
+    use_offline_services()
+    for i in range(args.repeat):
+        result = asyncio.run(replay(records, meta, args.speed))
+        frames = sum(result["fed"].values())
+        print(f"\n=== Run {i + 1} (speed {args.speed or 'max'}) ===")
+        print(f"Fed: frontend={result['fed'][FRONTEND_IN]} upstream={result['fed'][UPSTREAM_IN]} | "
+              f"out: frontend={result['to_frontend'].frames} upstream={result['to_upstream'].frames}")
+        print(f"Wall {result['wall']:.2f}s | CPU {result['cpu']:.2f}s | "
+              f"{frames / result['cpu']:,.0f} input frames per CPU second")
+        print(f"Upstream -> frontend: {percentiles_ms(result['to_frontend'].latencies)}")
+        print(f"Frontend -> upstream: {percentiles_ms(result['to_upstream'].latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Importing the services builds the OpenAI client; no call is made in the tests
+os.environ.setdefault("OPENAI_API_KEY", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
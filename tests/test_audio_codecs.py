@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from app.services.audio_codecs import decode_audio, encode_audio, mulaw_decode, mulaw_encode
+from app.services.realtime_frames import CODEC_MULAW, CODEC_PCM16
+
+
+def test_mulaw_halves_the_bytes():
+    pcm = np.arange(-32768, 32768, 7, dtype=np.int16)
+    assert len(mulaw_encode(pcm)) == len(pcm)
+
+
+def test_mulaw_round_trip_error_is_within_the_segment_step():
+    pcm = np.arange(-32768, 32768, dtype=np.int32).astype(np.int16)
+    decoded = mulaw_decode(mulaw_encode(pcm)).astype(np.int32)
+    error = np.abs(decoded - pcm.astype(np.int32))
+    # Quantisation step doubles per segment: relative error stays under ~3 %
+    # (plus the clip at ±32635 and the bias around zero)
+    magnitude = np.maximum(np.abs(pcm.astype(np.int32)), 256)
+    assert np.all(error <= 0.035 * magnitude + 140)
+    assert np.all(np.sign(decoded[np.abs(pcm) > 16]) == np.sign(pcm[np.abs(pcm) > 16]))
+
+
+def test_mulaw_decoded_values_survive_another_round_trip():
+    # Decoded values are exact code points: encoding them again loses nothing
+    # (0x7F and 0xFF are both zero, so compare samples rather than codes)
+    decoded = mulaw_decode(bytes(range(256)))
+    np.testing.assert_array_equal(mulaw_decode(mulaw_encode(decoded)), decoded)
+
+
+@pytest.mark.parametrize("codec", [CODEC_PCM16, CODEC_MULAW])
+def test_frame_payload_round_trip(codec):
+    pcm = (np.sin(np.arange(1600) / 10) * 8000).astype(np.int16).tobytes()
+    decoded = np.frombuffer(decode_audio(encode_audio(pcm, codec), codec), dtype=np.int16)
+    assert len(decoded) == 1600
+    assert np.max(np.abs(decoded.astype(np.int32) - np.frombuffer(pcm, dtype=np.int16))) <= 256
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        decode_audio(b"\x00\x00", 99)
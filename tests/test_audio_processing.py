@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from app.services.audio_processing import PauseDetector, StreamingResampler, VoiceActivityTracker
+
+RATE = 16000
+FRAME = RATE * 20 // 1000
+
+
+def tone(seconds, rms):
+    """Sine at 200 Hz with the given normalised RMS level, as int16."""
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (np.sin(2 * np.pi * 200 * t) * rms * np.sqrt(2) * 32768).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.int16)
+
+
+def feed_in_chunks(tracker, pcm, chunk):
+    return np.concatenate([tracker.feed(pcm[i:i + chunk]) for i in range(0, len(pcm), chunk)])
+
+
+def test_quiet_microphone_counts_as_speech():
+    # Below the old 0.05 threshold, like grabacion.wav (~0.045 peak)
+    vad = VoiceActivityTracker(RATE)
+    speech = vad.feed(np.concatenate((silence(0.2), tone(1.0, 0.03), silence(0.5))))
+    assert speech.sum() == 50
+    assert vad.end_turn() == pytest.approx(1.0)
+
+
+def test_duration_is_the_speech_span_including_gaps_between_words():
+    vad = VoiceActivityTracker(RATE)
+    vad.feed(np.concatenate((tone(0.5, 0.03), silence(0.2), tone(0.5, 0.03), silence(1.0))))
+    assert vad.end_turn() == pytest.approx(1.2)
+    assert vad.end_turn() is None
+
+
+def test_hysteresis_keeps_quieter_syllables_inside_speech():
+    vad = VoiceActivityTracker(RATE, hangover_ms=300)
+    speech = vad.feed(np.concatenate((tone(0.2, 0.03), tone(0.2, 0.012), silence(0.4), tone(0.2, 0.012))))
+    # 0.012 is between close (0.008) and open (0.02): speech only right after loud speech
+    assert speech[:20].all()
+    assert not speech[20:].any()
+
+
+def test_flags_do_not_depend_on_chunk_size():
+    pcm = np.concatenate((silence(0.3), tone(0.7, 0.03), silence(0.6), tone(0.4, 0.015), silence(0.3)))
+    reference = VoiceActivityTracker(RATE).feed(pcm)
+    for chunk in (FRAME, 321, 4000):
+        assert np.array_equal(feed_in_chunks(VoiceActivityTracker(RATE), pcm, chunk), reference)
+
+
+def test_turn_without_speech_has_no_duration():
+    vad = VoiceActivityTracker(RATE)
+    vad.feed(tone(1.0, 0.005))
+    assert vad.end_turn() is None
+
+
+def flags(pattern):
+    """'s' = speech frame, '.' = silent frame (20 ms each)."""
+    return np.array([c == "s" for c in pattern], dtype=bool)
+
+
+def test_pause_detector_counts_mid_turn_pauses_only():
+    pauses = PauseDetector(frame_ms=20, min_pause_ms=500)
+    # leading silence, a 30-frame (600 ms) pause, a 10-frame gap, trailing silence
+    pauses.feed(flags("." * 40 + "s" * 10 + "." * 30 + "s" * 10 + "." * 10 + "s" * 5 + "." * 50))
+    pauses.end_turn()
+    assert pauses.stats() == {"count": 1, "total_seconds": 0.6, "longest_seconds": 0.6, "speech_seconds": 0.5}
+
+
+@pytest.mark.parametrize("split", [1, 7, 13, 25, 26])
+def test_pause_detector_across_chunk_boundaries(split):
+    pattern = flags("s" * 5 + "." * 40 + "s" * 5 + "." * 24 + "s" * 5)
+    reference = PauseDetector(frame_ms=20, min_pause_ms=500)
+    reference.feed(pattern)
+    chunked = PauseDetector(frame_ms=20, min_pause_ms=500)
+    for i in range(0, len(pattern), split):
+        chunked.feed(pattern[i:i + split])
+    assert chunked.stats() == reference.stats()
+    assert reference.stats()["count"] == 1  # 40 frames = 800 ms; 24 frames = 480 ms is not a pause
+
+
+def test_pause_detector_does_not_join_turns():
+    pauses = PauseDetector(frame_ms=20, min_pause_ms=500)
+    pauses.feed(flags("s" * 5 + "." * 20))
+    pauses.end_turn()
+    pauses.feed(flags("." * 20 + "s" * 5))
+    assert pauses.stats()["count"] == 0
+
+
+def test_pauses_measured_on_quiet_microphone_audio():
+    vad, pauses = VoiceActivityTracker(RATE), PauseDetector()
+    pcm = np.concatenate((tone(1.0, 0.03), silence(1.0), tone(1.0, 0.03)))
+    for i in range(0, len(pcm), 999):
+        pauses.feed(vad.feed(pcm[i:i + 999]))
+    stats = pauses.stats()
+    assert stats["count"] == 1
+    assert stats["total_seconds"] == pytest.approx(1.0, abs=0.04)
+    assert stats["speech_seconds"] == pytest.approx(2.0, abs=0.04)
+
+
+@pytest.mark.parametrize("input_rate", [48000, 44100])
+@pytest.mark.parametrize("chunk", [1, 441, 480, 1024, 4801])
+def test_resampler_output_does_not_depend_on_the_chunk_size(input_rate, chunk):
+    t = np.arange(input_rate // 2) / input_rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 12000).astype(np.int16)
+    whole = StreamingResampler(input_rate, RATE).process(pcm)
+
+    resampler = StreamingResampler(input_rate, RATE)
+    pieces = np.concatenate([resampler.process(pcm[i:i + chunk]) for i in range(0, len(pcm), chunk)])
+
+    assert len(whole) == RATE // 2
+    np.testing.assert_array_equal(pieces, whole)
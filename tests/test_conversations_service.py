@@ -0,0 +1,39 @@
+import pytest
+
+from app.services.conversations_service import scoring_weights
+
+NOMINAL = {
+    "fillerwords_weight": 0.025,
+    "pauses_weight": 0.025,
+    "clarity_weight": 0.10,
+    "participation_weight": 0.10,
+    "keythemes_weight": 0.20,
+    "rhythm_weight": 0.05,
+    "objective_weight": 0.5,
+}
+
+
+def row(general_score=70, pauses_scoring=80, rhythm_scoring=60):
+    return {"general_score": general_score, "pauses_scoring": pauses_scoring, "rhythm_scoring": rhythm_scoring}
+
+
+def test_conversation_with_every_metric_has_the_nominal_weights():
+    assert scoring_weights(row()) == NOMINAL
+
+
+def test_conversation_scored_without_pauses():
+    # Scored before pauses were measured, or with no audio: their weight went to filler words
+    weights = scoring_weights(row(pauses_scoring=None))
+    assert weights["pauses_weight"] == 0
+    assert weights["fillerwords_weight"] == 0.05
+
+
+def test_conversation_without_rhythm_spreads_its_weight():
+    weights = scoring_weights(row(rhythm_scoring=None))
+    assert weights["rhythm_weight"] == 0
+    assert weights["objective_weight"] > NOMINAL["objective_weight"]
+    assert sum(weights.values()) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_unscored_conversation_has_the_nominal_weights():
+    assert scoring_weights(row(general_score=None, pauses_scoring=None, rhythm_scoring=None)) == NOMINAL
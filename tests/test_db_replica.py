@@ -0,0 +1,82 @@
+import uuid
+
+import pytest
+
+from app.services import db
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetch(self, query, *args):
+        return [{"pool": self.pool.name}]
+
+    async def fetchrow(self, query, *args):
+        return self.pool.row
+
+    async def fetchval(self, query, *args):
+        return 0.0
+
+
+class FakePool:
+    def __init__(self, name, row=None):
+        self.name = name
+        self.row = row
+
+    async def acquire(self):
+        return FakeConnection(self)
+
+    async def release(self, connection):
+        pass
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    primary, replica = FakePool("primary"), FakePool("replica")
+    monkeypatch.setattr(db, "_pool", primary)
+    monkeypatch.setattr(db, "_replica_pool", replica)
+    routing = db.ReplicaRouting()
+    routing.lag_seconds = 0.0
+    routing.lag_checked_at = float("inf")  # no background lag check
+    monkeypatch.setattr(db, "replica_routing", routing)
+    return primary, replica
+
+
+async def read_pool(*args):
+    rows = await db.execute_read("SELECT 1", *args)
+    return rows[0]["pool"]
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_without_recent_writes(pools):
+    assert await read_pool(str(uuid.uuid4())) == "replica"
+
+
+@pytest.mark.asyncio
+async def test_written_param_sticks_to_primary(pools):
+    user_id = uuid.uuid4()
+    await db.execute_query("UPDATE users SET name = $2 WHERE user_id = $1", user_id, "x")
+    assert await read_pool(str(user_id)) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_array_param_ids_are_marked(pools):
+    conv_ids = [uuid.uuid4(), uuid.uuid4()]
+    await db.execute_query("INSERT INTO m SELECT * FROM unnest($1::uuid[])", conv_ids)
+    assert await read_pool(conv_ids[1]) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_returning_ids_are_marked(pools):
+    primary, _ = pools
+    conversation_id = uuid.uuid4()
+    primary.row = {"conversation_id": conversation_id}
+    await db.execute_query_one("INSERT INTO c DEFAULT VALUES RETURNING conversation_id")
+    assert await read_pool(conversation_id) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_is_skipped(pools):
+    db.replica_routing.lag_seconds = db.DB_REPLICA_STICKY_SECONDS + 1
+    assert await read_pool() == "primary"
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.services import elevenlabs_client
+from app.services.elevenlabs_client import ElevenLabsConnectionPool
+
+
+class FakeSocket:
+    def __init__(self):
+        self.open = True
+
+    async def close(self):
+        self.open = False
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+
+    async def connect(agent_id):
+        ws = FakeSocket()
+        opened.append(ws)
+        return ws
+
+    monkeypatch.setattr(elevenlabs_client, "connect_elevenlabs_ws", connect)
+    return opened
+
+
+@pytest.mark.asyncio
+async def test_idle_sockets_are_closed_without_prewarm(connections):
+    pool = ElevenLabsConnectionPool(size=1, idle_seconds=0.05)
+    pool.fill("agent")
+    await asyncio.sleep(0.12)
+    assert len(connections) == 1
+    assert pool.checkout("agent") is None
+
+
+@pytest.mark.asyncio
+async def test_pool_stays_warm_while_prewarm_is_valid(connections):
+    pool = ElevenLabsConnectionPool(size=1, idle_seconds=0.05)
+    pool.fill("agent", keep_warm_seconds=0.3)
+    await asyncio.sleep(0.17)
+    # The first socket expired and was replaced
+    assert len(connections) >= 3
+    assert not connections[0].open
+    ws = pool.checkout("agent")
+    assert ws is connections[-1] and ws.open
+
+    await asyncio.sleep(0.35)
+    count = len(connections)
+    await asyncio.sleep(0.12)
+    assert len(connections) == count  # no refills after keep_warm_seconds
+
+
+@pytest.mark.asyncio
+async def test_checkout_uses_up_the_prewarm(connections):
+    pool = ElevenLabsConnectionPool(size=2, idle_seconds=0.05)
+    pool.fill("agent", keep_warm_seconds=1.0)
+    await asyncio.sleep(0.01)
+    assert pool.checkout("agent") is not None
+
+    # The session got its socket: the other one expires and is not replaced
+    count = len(connections)
+    await asyncio.sleep(0.15)
+    assert len(connections) == count
+    assert pool.stats() == {"agent": 0}
+
+
+@pytest.mark.asyncio
+async def test_one_socket_is_kept_per_outstanding_prewarm(connections):
+    pool = ElevenLabsConnectionPool(size=2, idle_seconds=0.05)
+    pool.fill("agent", keep_warm_seconds=1.0)
+    pool.fill("agent", keep_warm_seconds=1.0)
+    await asyncio.sleep(0.01)
+    pool.checkout("agent")
+    await asyncio.sleep(0.08)
+    # One pre-warm still waiting for its session: one replacement socket
+    assert pool.stats() == {"agent": 1}
+    assert pool.checkout("agent") is not None
+    await asyncio.sleep(0.08)
+    assert pool.stats() == {"agent": 0}
@@ -0,0 +1,41 @@
+from scoring_scripts.get_conver_scores import PESOS, calcular_pausas, calcular_ppm_variabilidad, combinar_scores
+
+
+def res(puntuacion, feedback="ok"):
+    return {"puntuacion": puntuacion, "feedback": feedback}
+
+
+OBJETIVO = {"accomplished": True, "señales": "ok"}
+
+
+def test_ppm_without_durations_is_not_measured():
+    transcript = [
+        {"speaker": "vendedor", "text": "hola qué tal", "duracion": None},
+        {"speaker": "cliente", "text": "bien", "duracion": 1.0},
+    ]
+    assert calcular_ppm_variabilidad(transcript) is None
+
+
+def test_ppm_with_durations():
+    transcript = [{"speaker": "vendedor", "text": " ".join(["palabra"] * 140), "duracion": 60.0}]
+    assert calcular_ppm_variabilidad(transcript)["media_ppm"] == 140
+
+
+def test_missing_ppm_weight_is_spread_over_the_rest():
+    resultado = combinar_scores(res(100), res(100), res(100), res(100), res(0), None, OBJETIVO, res(100))
+    assert "ppm" not in resultado["detalle"]
+    # Every weighted metric at 100 (preguntas weighs 0): the global score stays 100
+    assert PESOS["preguntas"] == 0
+    assert resultado["puntuacion_global"] == 100
+
+
+def test_pausas_without_speech_are_not_scored():
+    assert calcular_pausas(None) is None
+    assert calcular_pausas({"count": 0, "total_seconds": 0, "longest_seconds": 0, "speech_seconds": 0}) is None
+
+
+def test_pausas_penalise_frequent_and_long_pauses():
+    pocas = calcular_pausas({"count": 3, "total_seconds": 2.0, "longest_seconds": 1.0, "speech_seconds": 60})
+    muchas = calcular_pausas({"count": 12, "total_seconds": 15.0, "longest_seconds": 3.0, "speech_seconds": 60})
+    assert pocas["puntuacion"] == 100
+    assert muchas["puntuacion"] == 100 - 6 * 10 - 15
@@ -0,0 +1,140 @@
+import json
+import re
+
+import pytest
+
+from scoring_scripts import get_conver_scores_packed as packed_scoring
+from scoring_scripts.get_conver_scores_packed import (
+    OUTPUT_TOKENS_PER_CONVERSATION,
+    _normalizar_claridad,
+    _normalizar_cobertura,
+    _normalizar_escucha_activa,
+    _normalizar_objetivo,
+    estimate_tokens,
+    get_conver_scores_packed,
+    pack_conversations,
+)
+
+
+def conv(conv_id, palabras=120, **extra):
+    transcript = [
+        {"speaker": "vendedor", "text": " ".join(["palabra"] * palabras), "duracion": palabras / 2.5},
+        {"speaker": "cliente", "text": "de acuerdo", "duracion": 1.0},
+    ]
+    return {"conversation_id": conv_id, "transcript": transcript, "course_id": "curso", "stage_id": "stage", **extra}
+
+
+def cost(c):
+    return estimate_tokens(str(c["transcript"])) + OUTPUT_TOKENS_PER_CONVERSATION
+
+
+# --- pack_conversations ------------------------------------------------------
+
+def test_pack_keeps_order_and_fills_up_to_the_budget():
+    conversations = [conv(i) for i in range(5)]
+    budget = 100 + 2 * cost(conversations[0])
+    packs = pack_conversations(conversations, 100, token_budget=budget, max_conversations=10)
+    assert [[c["conversation_id"] for c in pack] for pack in packs] == [[0, 1], [2, 3], [4]]
+
+
+def test_pack_respects_max_conversations():
+    packs = pack_conversations([conv(i) for i in range(5)], 0, token_budget=10**6, max_conversations=2)
+    assert [len(pack) for pack in packs] == [2, 2, 1]
+
+
+def test_oversized_conversation_gets_its_own_pack():
+    conversations = [conv(0), conv(1, palabras=5000), conv(2)]
+    packs = pack_conversations(conversations, 100, token_budget=100 + cost(conversations[0]) + 10)
+    assert [[c["conversation_id"] for c in pack] for pack in packs] == [[0], [1], [2]]
+
+
+def test_pack_of_nothing():
+    assert pack_conversations([], 100) == []
+
+
+# --- Validación de las respuestas empaquetadas -------------------------------
+
+@pytest.mark.parametrize("respuesta, esperado", [
+    ({"veces_falta_claridad": 2, "feedback": "ok"}, {"veces_falta_claridad": 2, "feedback": "ok"}),
+    ({"veces_falta_claridad": " 3 ", "feedback": "ok"}, {"veces_falta_claridad": 3, "feedback": "ok"}),
+    ({"veces_falta_claridad": True, "feedback": "ok"}, None),
+    ({"veces_falta_claridad": 2}, None),
+    ({"veces_falta_claridad": "dos", "feedback": "ok"}, None),
+    (None, None),
+])
+def test_normalizar_claridad(respuesta, esperado):
+    assert _normalizar_claridad(respuesta) == esperado
+
+
+def test_normalizar_escucha_activa_puts_the_number_first():
+    texto = _normalizar_escucha_activa({"n": "4", "señales": "resume lo dicho"})
+    assert json.loads(texto) == {"n": 4, "señales": "resume lo dicho"}
+    assert re.search(r"\d+", texto).group() == "4"
+    assert _normalizar_escucha_activa({"señales": "sin número"}) is None
+    assert _normalizar_escucha_activa("4") is None
+
+
+@pytest.mark.parametrize("respuesta, valido", [
+    ({"n_temas_abordados": 2, "n_temas_olvidados": "1"}, True),
+    ({"n_temas_abordados": 0, "n_temas_olvidados": 0}, False),
+    ({"n_temas_abordados": 2}, False),
+    ([], False),
+])
+def test_normalizar_cobertura(respuesta, valido):
+    resultado = _normalizar_cobertura(respuesta)
+    if valido:
+        assert resultado["n_temas_abordados"] == 2 and resultado["n_temas_olvidados"] == 1
+    else:
+        assert resultado is None
+
+
+@pytest.mark.parametrize("respuesta, esperado", [
+    ({"indicador": True, "señales": "cierra"}, (True, "cierra")),
+    ({"indicador": " False ", "señales": "no cierra"}, (False, "no cierra")),
+    ({"indicador": "quizás", "señales": "?"}, None),
+    ({"indicador": 1, "señales": "?"}, None),
+    ({"indicador": True}, None),
+])
+def test_normalizar_objetivo(respuesta, esperado):
+    assert _normalizar_objetivo(respuesta) == esperado
+
+
+# --- get_conver_scores_packed ------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_reliable_asr_clarity_skips_the_packed_clarity_call(monkeypatch):
+    prompts = []
+
+    def fake_call_gpt(client, prompt, model=None):
+        prompts.append(prompt)
+        claves = re.search(r"Identificadores que deben aparecer: (.*)", prompt).group(1).split(", ")
+        respuesta = {
+            "veces_falta_claridad": 1, "feedback": "ok", "n": 3, "señales": "ok",
+            "n_temas_abordados": 2, "n_temas_olvidados": 0, "indicador": True,
+        }
+        return json.dumps({"conversaciones": {clave.strip(): respuesta for clave in claves}})
+
+    async def fake_key_themes(course_id, stage_id):
+        return ["precio"]
+
+    async def fake_courses_details(course_id, stage_id):
+        return [{"stage_objectives": "cerrar la venta"}]
+
+    monkeypatch.setattr(packed_scoring, "call_gpt", fake_call_gpt)
+    monkeypatch.setattr(packed_scoring, "clarity", lambda transcript: f"RUBRICA CLARIDAD {transcript}")
+    monkeypatch.setattr(packed_scoring, "get_key_themes", fake_key_themes)
+    monkeypatch.setattr(packed_scoring, "get_courses_details", fake_courses_details)
+
+    asr_fiable = {"tokens": 400, "turns": 1, "low_fraction": 0.0, "mean_logprob": -0.05}
+    resultados = await get_conver_scores_packed(
+        [conv("a", claridad_asr=asr_fiable), conv("b"), conv("corta", palabras=10)], client=object()
+    )
+
+    claridad_prompts = [prompt for prompt in prompts if "RUBRICA CLARIDAD" in prompt]
+    assert len(claridad_prompts) == 1
+    assert "Identificadores que deben aparecer: c1\n" in claridad_prompts[0]
+
+    assert resultados["a"]["claridad_asr"]["fiable"]
+    assert resultados["a"]["detalle"]["claridad"] == resultados["a"]["claridad_asr"]["puntuacion"]
+    assert resultados["b"]["claridad_asr"] is None
+    assert resultados["corta"]["puntuacion_global"] == 0
@@ -0,0 +1,34 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import health
+from app.services.auth_service import validate_user
+from app.services.query_registry import record_query, top_queries
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(health.router)
+    app.dependency_overrides[validate_user] = lambda: {"user_id": "admin"}
+    return TestClient(app)
+
+
+def test_queries_can_be_ordered_by_a_stat(client):
+    record_query("tests.health", 0.01, rows=3)
+    response = client.get("/health/db/queries", params={"order_by": "rows"})
+    assert response.status_code == 200
+    assert any(row["name"] == "tests.health" for row in response.json()["queries"])
+
+
+def test_unknown_order_is_rejected(client):
+    assert client.get("/health/db/queries", params={"order_by": "foo"}).status_code == 422
+    with pytest.raises(ValueError):
+        top_queries(order_by="foo")
+
+
+def test_db_endpoints_require_authentication():
+    app = FastAPI()
+    app.include_router(health.router)
+    assert TestClient(app).get("/health/db/queries").status_code in (401, 403)
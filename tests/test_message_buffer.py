@@ -0,0 +1,90 @@
+import uuid
+
+import pytest
+
+from app.services import message_buffer
+from app.services.message_buffer import MessageWriteBuffer
+
+
+class FakeDB:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    async def send_messages_batch(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("db down")
+        self.batches.append([m["content"] for m in batch])
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(message_buffer, "send_messages_batch", fake.send_messages_batch)
+    return fake
+
+
+def buffer():
+    return MessageWriteBuffer(uuid.uuid4(), conversation_id=uuid.uuid4(), max_delay=60)
+
+
+@pytest.mark.asyncio
+async def test_held_message_keeps_the_later_ones_until_released(db):
+    messages = buffer()
+    messages.add("hola", "user")
+    agent = messages.add("buenas", "assistant", hold=True)
+    messages.add("¿qué tal?", "user")
+
+    await messages._flush()
+    assert db.batches == [["hola"]]
+
+    messages.release(agent, duration=1.5)
+    await messages._flush()
+    assert db.batches == [["hola"], ["buenas", "¿qué tal?"]]
+    assert agent["duration"] == 1.5
+    await messages.close()
+
+
+@pytest.mark.asyncio
+async def test_nothing_is_written_before_the_conversation_exists(db):
+    messages = MessageWriteBuffer(uuid.uuid4(), max_delay=60)
+    messages.add("hola", "user")
+    await messages._flush()
+    assert db.batches == []
+
+    messages.set_conversation(uuid.uuid4())
+    await messages.close()
+    assert db.batches == [["hola"]]
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_retried_in_order(db):
+    db.failures = 1
+    messages = buffer()
+    messages.add("uno", "user")
+    await messages._flush()
+    assert db.batches == []
+
+    messages.add("dos", "assistant")
+    await messages.close()
+    assert db.batches == [["uno", "dos"]]
+    assert [turn["text"] for turn in messages.transcript()] == ["uno", "dos"]
+
+
+@pytest.mark.asyncio
+async def test_close_releases_held_messages_and_retries_once(db):
+    db.failures = 1
+    messages = buffer()
+    messages.add("buenas", "assistant", hold=True)
+    await messages.close()
+    assert db.batches == [["buenas"]]
+
+
+@pytest.mark.asyncio
+async def test_transcript_is_none_if_something_was_not_saved(db):
+    db.failures = 3
+    messages = buffer()
+    messages.add("hola", "user")
+    await messages.close()
+    assert messages.transcript() is None
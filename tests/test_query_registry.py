@@ -0,0 +1,55 @@
+import pytest
+
+from app.services import query_registry
+from app.services.query_registry import describe_statement, query_name, register_query
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM profiles WHERE id = $1", "SELECT profiles"),
+    ("\n    INSERT INTO recordings (user_id) VALUES ($1) RETURNING *", "INSERT recordings"),
+    ("UPDATE conversaapp.conversations SET end_timestamp = NOW()", "UPDATE conversaapp.conversations"),
+    ('DELETE FROM "conversaapp".messages WHERE id = $1', "DELETE conversaapp.messages"),
+    ("WITH last AS (SELECT * FROM a) INSERT INTO b SELECT * FROM last", "INSERT b"),
+    ("-- comentario FROM x\nSELECT name FROM master_courses", "SELECT master_courses"),
+    ("SELECT 1 AS ok", None),
+])
+def test_describe_statement(sql, expected):
+    assert describe_statement(sql) == expected
+
+
+def _execute(sql):
+    # stands in for db.execute_query: the name comes from its caller
+    return query_name(sql)
+
+
+def _shared_helper(sql):
+    return _execute(sql)
+
+
+def test_derived_names_keep_each_statement_apart():
+    names = {_shared_helper(sql) for sql in (
+        "INSERT INTO profiles (id) VALUES ($1)",
+        "INSERT INTO recordings (id) VALUES ($1)",
+        "SELECT * FROM recordings",
+    )}
+    assert names == {
+        "test_query_registry._shared_helper:INSERT profiles",
+        "test_query_registry._shared_helper:INSERT recordings",
+        "test_query_registry._shared_helper:SELECT recordings",
+    }
+
+
+def test_registered_name_wins(monkeypatch):
+    monkeypatch.setattr(query_registry, "_registry", {})
+    sql = register_query("tests.named", "SELECT * FROM profiles")
+    assert _shared_helper(sql) == "tests.named"
+    with pytest.raises(ValueError):
+        register_query("tests.other", sql)
+
+
+def test_derived_name_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(query_registry, "_caller_names", {})
+    monkeypatch.setattr(query_registry, "CALLER_NAMES_MAX", 3)
+    names = {_shared_helper(f"SELECT * FROM profiles WHERE id = {i}") for i in range(10)}
+    assert names == {"test_query_registry._shared_helper:SELECT profiles"}
+    assert len(query_registry._caller_names) == 3
@@ -0,0 +1,202 @@
+import asyncio
+import base64
+import gc
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services import message_buffer, realtime_bridge, realtime_service, session_recorder
+from app.services.realtime_fake_provider import FakeElevenLabsSocket
+from app.services.realtime_providers import FakeProvider, get_provider
+
+RATE = 16000
+
+
+@pytest.fixture
+def record_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_recorder, "REALTIME_RECORD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_rejected_session_leaves_no_recording(record_dir):
+    # The router builds the bridge before admission; a rejected one never runs
+    realtime_bridge.RealtimeBridge(frontend_ws=None, provider=get_provider("fake"))
+    assert os.listdir(record_dir) == []
+
+
+class UnpacedFakeProvider(FakeProvider):
+    """In-process fake that streams the agent audio without real-time pacing."""
+
+    async def connect(self):
+        return FakeElevenLabsSocket(pacing=0)
+
+
+class FrontendSocket:
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        pass
+
+    def send_json(self, message):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(message)})
+
+    def types(self):
+        return [json.loads(frame)["type"] for frame in self.sent if isinstance(frame, str)]
+
+
+@pytest.fixture
+def offline_services(monkeypatch):
+    """Replaces every DB/post-call dependency of the bridge; records what it was given."""
+    calls = {"messages": [], "stop_process": None}
+
+    async def create_conversation(user_id, course_id, stage_id):
+        return {"conversation_id": "conv-1"}
+
+    async def noop(*args, **kwargs):
+        return None
+
+    async def resolve_session_setup(course_id, stage_id):
+        return {"voice_id": "voz", "agent_id": "agente", "master_prompt": "prompt"}
+
+    async def send_messages_batch(batch):
+        calls["messages"].extend((m["role"], m["content"]) for m in batch)
+
+    async def stop_process(user_id, conversation_id, *args, transcript=None, **kwargs):
+        calls["stop_process"] = {"conversation_id": conversation_id, "transcript": transcript, **kwargs}
+
+    monkeypatch.setattr(realtime_bridge, "create_conversation", create_conversation)
+    monkeypatch.setattr(realtime_bridge, "update_user_course_status", noop)
+    monkeypatch.setattr(realtime_bridge, "resolve_session_setup", resolve_session_setup)
+    monkeypatch.setattr(realtime_bridge, "set_realtime_session_metrics", noop)
+    monkeypatch.setattr(realtime_bridge, "user_msg_processed", noop)
+    monkeypatch.setattr(realtime_bridge, "stop_process", stop_process)
+    monkeypatch.setattr(message_buffer, "send_messages_batch", send_messages_batch)
+    monkeypatch.setattr(session_recorder, "REALTIME_RECORD_DIR", None)
+    return calls
+
+
+def audio_chunks(pcm, chunk=RATE // 10):
+    for i in range(0, len(pcm), chunk):
+        yield base64.b64encode(pcm[i:i + chunk].tobytes()).decode("ascii")
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_offline_session_with_the_fake_provider(offline_services):
+    frontend = FrontendSocket()
+    bridge = realtime_bridge.RealtimeBridge(frontend, provider=UnpacedFakeProvider())
+    session = asyncio.ensure_future(bridge.run())
+
+    frontend.send_json({"type": "input_audio_session.start", "user_id": "user-1", "course_id": "c", "stage_id": "s"})
+    # Greeting from the agent
+    await wait_for(lambda: "response.audio.delta" in frontend.types())
+
+    t = np.arange(RATE) / RATE
+    speech = (np.sin(2 * np.pi * 200 * t) * 0.1 * 32767).astype(np.int16)
+    for audio in audio_chunks(np.concatenate((speech, np.zeros(RATE, dtype=np.int16)))):
+        frontend.send_json({"type": "input_audio_buffer.append", "audio": audio})
+
+    # The fake detects the end of the turn, transcribes it and answers
+    await wait_for(lambda: "conversation.item.input_audio_transcription.completed" in frontend.types())
+    await wait_for(lambda: frontend.types().count("response.audio_transcript.done") >= 2)
+
+    frontend.send_json({"type": "input_audio_session.end"})
+    await asyncio.wait_for(session, 5)
+
+    # Greeting, user turn and answer: written to the DB and handed to the post-call pipeline in order
+    messages = offline_services["messages"]
+    assert [role for role, _ in messages] == ["assistant", "user", "assistant"]
+    stop = offline_services["stop_process"]
+    assert stop["conversation_id"] == "conv-1"
+    assert [turn["text"] for turn in stop["transcript"]] == [content for _, content in messages]
+    assert stop["pauses"]["speech_seconds"] == pytest.approx(1.0, abs=0.1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("conversation_created", [True, False])
+async def test_failed_session_setup_closes_the_conversation(offline_services, monkeypatch, conversation_created):
+    closed = []
+    loop_errors = []
+    asyncio.get_running_loop().set_exception_handler(lambda loop, context: loop_errors.append(context))
+
+    async def resolve_session_setup(course_id, stage_id):
+        raise RuntimeError("course not found")
+
+    async def create_conversation(user_id, course_id, stage_id):
+        if not conversation_created:
+            raise ConnectionError("db down")
+        return {"conversation_id": "conv-1"}
+
+    async def close_conversation(user_id, conversation_id, conversation_id_elevenlabs, agent_id):
+        closed.append(conversation_id)
+
+    monkeypatch.setattr(realtime_bridge, "resolve_session_setup", resolve_session_setup)
+    monkeypatch.setattr(realtime_bridge, "create_conversation", create_conversation)
+    monkeypatch.setattr(realtime_bridge, "close_conversation", close_conversation)
+
+    frontend = FrontendSocket()
+    bridge = realtime_bridge.RealtimeBridge(frontend, provider=UnpacedFakeProvider())
+    session = asyncio.ensure_future(bridge.run())
+    frontend.send_json({"type": "input_audio_session.start", "user_id": "user-1", "course_id": "c", "stage_id": "s"})
+    await asyncio.wait_for(session, 5)
+    await asyncio.sleep(0)
+    gc.collect()  # an unretrieved gather exception is reported when it is collected
+
+    assert closed == (["conv-1"] if conversation_created else [])
+    assert offline_services["stop_process"] is None
+    assert loop_errors == []
+
+
+@pytest.mark.asyncio
+async def test_slow_post_call_pipeline_does_not_stall_other_sessions(offline_services, monkeypatch):
+    # The pipeline blocks its worker (like the synchronous LLM calls do) for 2 s
+    def slow_pipeline(*args, **kwargs):
+        time.sleep(2.0)
+
+    executor = ThreadPoolExecutor(max_workers=1)  # stands in for the worker processes
+    monkeypatch.setattr(realtime_service, "_post_call_executor", executor)
+    monkeypatch.setattr(realtime_service, "run_post_call_pipeline", slow_pipeline)
+
+    ended = FrontendSocket()
+    stop = asyncio.ensure_future(realtime_service.stop_process(
+        "user-0", "conv-0", ended, "c", "s", "fake-conv", "agente", transcript=[], pauses={}, asr_clarity={}))
+
+    frontend = FrontendSocket()
+    bridge = realtime_bridge.RealtimeBridge(frontend, provider=UnpacedFakeProvider())
+    session = asyncio.ensure_future(bridge.run())
+    frontend.send_json({"type": "input_audio_session.start", "user_id": "user-1", "course_id": "c", "stage_id": "s"})
+    t = np.arange(RATE) / RATE
+    speech = (np.sin(2 * np.pi * 200 * t) * 0.1 * 32767).astype(np.int16)
+    for audio in audio_chunks(np.concatenate((speech, np.zeros(RATE, dtype=np.int16)))):
+        frontend.send_json({"type": "input_audio_buffer.append", "audio": audio})
+
+    # The other session is served (greeting, user turn, answer) while the pipeline still runs
+    await wait_for(lambda: "conversation.item.input_audio_transcription.completed" in frontend.types(), timeout=1.5)
+    assert not stop.done()
+
+    frontend.send_json({"type": "input_audio_session.end"})
+    await asyncio.wait_for(session, 5)
+    await asyncio.wait_for(stop, 5)
+    assert ended.types() == ["conversation.scoring.completed"]
+    executor.shutdown()
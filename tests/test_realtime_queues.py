@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.services.realtime_queues import OutboundQueue
+
+
+class BlockedSocket:
+    """send() that waits until released, so frames stay queued."""
+
+    def __init__(self):
+        self.sent = []
+        self.open = asyncio.Event()
+
+    async def send(self, frame):
+        await self.open.wait()
+        self.sent.append(frame)
+
+
+@pytest.mark.asyncio
+async def test_discarded_audio_bytes_are_counted():
+    socket = BlockedSocket()
+    queue = OutboundQueue("test", socket.send, maxsize=10)
+    queue.start()
+    await queue.put("a1", is_audio=True, audio_bytes=100)
+    await asyncio.sleep(0)  # a1 is now in flight, not queued
+    await queue.put("a2", is_audio=True, audio_bytes=200)
+    await queue.put("ctl")
+    await queue.put("a3", is_audio=True, audio_bytes=300)
+
+    assert queue.discard_audio() == 2
+    assert queue.dropped_audio_bytes == 500
+
+    socket.open.set()
+    await queue.close()
+    assert socket.sent == ["a1", "ctl"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_the_oldest_audio_frame():
+    socket = BlockedSocket()
+    queue = OutboundQueue("test", socket.send, maxsize=3)
+    queue.start()
+    await queue.put("a1", is_audio=True, audio_bytes=100)
+    await asyncio.sleep(0)  # a1 in flight
+    await queue.put("a2", is_audio=True, audio_bytes=200)
+    await queue.put("ctl")
+    await queue.put("a3", is_audio=True, audio_bytes=300)
+    await queue.put("a4", is_audio=True, audio_bytes=400)
+
+    assert queue.dropped_audio == 1
+    assert queue.dropped_audio_bytes == 200
+    assert queue.depth == 3
+
+    socket.open.set()
+    await queue.close()
+    assert socket.sent == ["a1", "ctl", "a3", "a4"]
+
+
+@pytest.mark.asyncio
+async def test_control_frames_wait_for_space_instead_of_dropping():
+    socket = BlockedSocket()
+    queue = OutboundQueue("test", socket.send, maxsize=2)
+    queue.start()
+    await queue.put("c1")
+    await asyncio.sleep(0)  # c1 in flight
+    await queue.put("c2")
+    await queue.put("c3")
+
+    put = asyncio.ensure_future(queue.put("c4"))
+    await asyncio.sleep(0.01)
+    assert not put.done()
+
+    socket.open.set()
+    await asyncio.wait_for(put, 1)
+    await queue.close()
+    assert socket.sent == ["c1", "c2", "c3", "c4"]
+    assert queue.dropped_audio == 0
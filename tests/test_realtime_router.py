@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import realtime_router
+from app.services.auth_service import validate_user
+
+USER_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+
+    async def prewarm_session(user_id, course_id, stage_id):
+        calls.append(user_id)
+        return {"voice_id": "v", "agent_id": "a", "expires_in": 120}
+
+    monkeypatch.setattr(realtime_router, "prewarm_session", prewarm_session)
+    app = FastAPI()
+    app.include_router(realtime_router.router)
+    app.dependency_overrides[validate_user] = lambda: {"user_id": USER_ID}
+    client = TestClient(app)
+    client.calls = calls
+    return client
+
+
+def body(user_id):
+    return {"user_id": str(user_id), "course_id": str(uuid.uuid4()), "stage_id": str(uuid.uuid4())}
+
+
+def test_prewarm_requires_authentication():
+    app = FastAPI()
+    app.include_router(realtime_router.router)
+    response = TestClient(app).post("/realtime/prewarm", json=body(USER_ID))
+    assert response.status_code in (401, 403)
+
+
+def test_prewarm_own_session(client):
+    assert client.post("/realtime/prewarm", json=body(USER_ID)).status_code == 200
+    assert client.calls == [USER_ID]
+
+
+def test_prewarm_for_another_user_is_forbidden(client):
+    assert client.post("/realtime/prewarm", json=body(uuid.uuid4())).status_code == 403
+    assert client.calls == []
+
+
+def test_stats_requires_authentication(client):
+    assert client.get("/realtime/stats").status_code == 200
+    app = FastAPI()
+    app.include_router(realtime_router.router)
+    assert TestClient(app).get("/realtime/stats").status_code in (401, 403)
+
+
+def test_gateway_mounts_health_router():
+    from app.realtime_main import app
+
+    paths = {route.path for route in app.routes}
+    assert {"/health/readiness", "/health/liveness", "/health/db/pool"} <= paths
@@ -0,0 +1,67 @@
+import numpy as np
+
+from app.services.silence_gate import SilenceGate
+
+RATE = 16000
+CHUNK = RATE // 10  # 100 ms
+
+
+def chunk(rms):
+    t = np.arange(CHUNK) / RATE
+    return (np.sin(2 * np.pi * 200 * t) * rms * np.sqrt(2) * 32768).astype(np.int16)
+
+
+SPEECH = chunk(0.05)
+SILENCE = np.zeros(CHUNK, dtype=np.int16)
+
+
+def gate(**kwargs):
+    options = dict(sample_rate=RATE, enabled=True, open_rms=0.02, close_rms=0.008,
+                   preroll_ms=300, hangover_ms=500, keepalive_ms=10_000)
+    options.update(kwargs)
+    return SilenceGate(**options)
+
+
+def run(gate, chunks):
+    """Feed (pcm, name) chunks; returns the names forwarded by each one."""
+    return [gate.process(pcm, name) for pcm, name in chunks]
+
+
+def test_preroll_is_sent_ahead_of_the_opening_chunk():
+    g = gate()
+    out = run(g, [(SILENCE, f"s{i}") for i in range(5)] + [(SPEECH, "v")])
+    assert out[:5] == [[]] * 5
+    # Only the last 300 ms of silence are kept, in order
+    assert out[5] == ["s2", "s3", "s4", "v"]
+    assert g.is_open
+    assert g.suppressed_samples == 2 * CHUNK
+
+
+def test_hangover_keeps_the_gate_open_after_speech():
+    g = gate()
+    out = run(g, [(SPEECH, "v")] + [(SILENCE, f"s{i}") for i in range(7)])
+    # 500 ms of hangover: four quiet chunks still go through, the fifth closes it
+    assert out[1:5] == [["s0"], ["s1"], ["s2"], ["s3"]]
+    assert out[5:] == [[], [], []]
+    assert not g.is_open
+
+
+def test_quiet_syllable_above_close_level_does_not_close_the_gate():
+    g = gate(hangover_ms=200)
+    out = run(g, [(SPEECH, "v"), (chunk(0.01), "q1"), (chunk(0.01), "q2"), (chunk(0.01), "q3"), (SPEECH, "v2")])
+    assert out == [["v"], ["q1"], ["q2"], ["q3"], ["v2"]]
+
+
+def test_keepalive_forwards_one_chunk_while_closed():
+    g = gate(keepalive_ms=1000)
+    out = run(g, [(SILENCE, f"s{i}") for i in range(25)])
+    forwarded = [names for names in out if names]
+    # One chunk per second of silence, without the (older) pre-roll ahead of it
+    assert forwarded == [["s9"], ["s19"]]
+    assert g.keepalives == 2
+    assert not g.is_open
+
+
+def test_disabled_gate_forwards_everything():
+    g = gate(enabled=False)
+    assert run(g, [(SILENCE, "s"), (SPEECH, "v")]) == [["s"], ["v"]]